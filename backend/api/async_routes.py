@@ -0,0 +1,201 @@
+# backend/api/async_routes.py
+# Async handlers for the request-heavy product, user and inventory routes. With
+# DB_ASYNC_MODE they replace their sync counterparts in api/routes.py (same paths, same
+# responses); everything else keeps running on the sync routes.
+
+from schemas import product as product_schema
+from crud import crud_product, crud_product_async
+from database import get_async_db
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from schemas import user as user_schema
+from crud import crud_user_async
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from security import (
+    create_access_token, get_current_user_async, get_current_manager_async,
+    get_password_hash_offloaded, verify_password_offloaded
+)
+from schemas import inventory as inventory_schema
+from crud import crud_inventory_async
+from api.routes import Token
+from sqlalchemy.exc import IntegrityError
+import response_cache as response_cache_module
+from response_cache import response_cache
+from config import settings
+from write_combining import movement_combiner
+
+
+router = APIRouter()
+
+@router.post("/login/token", response_model=Token)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await crud_user_async.get_user_by_email(db, email=form_data.username)
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_password_offloaded(form_data.password, user.hashed_password)
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if new_hash:
+        await crud_user_async.update_password_hash(db, user, new_hash)
+    access_token_data = {"sub": user.email, "uid": str(user.id)}
+    access_token = create_access_token(data=access_token_data, user_role=user.role)
+    return {"access_token": access_token, "token_type": "bearer", "user_role": user.role}
+
+@router.post("/products/", response_model=product_schema.Product)
+async def create_new_product(
+    product: product_schema.ProductCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_manager_async)
+):
+    return await crud_product_async.create_product(db=db, product=product)
+
+@router.get("/products/", response_model=list[product_schema.Product])
+async def read_products(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_user_async)
+):
+    after = None
+    if cursor:
+        try:
+            after = crud_product.decode_product_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def build():
+        products = await crud_product_async.get_products(db, skip=skip, limit=limit, after=after)
+        headers = {}
+        if limit > 0 and len(products) == limit:
+            headers["X-Next-Cursor"] = crud_product.encode_product_cursor(products[-1])
+        return products, headers
+
+    return await response_cache.respond_async(
+        request, [response_cache_module.CATALOG_SCOPE], build, list[product_schema.Product]
+    )
+
+@router.get("/products/search", response_model=list[product_schema.Product])
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_user_async)
+):
+    async def build():
+        return await crud_product_async.search_products(db, q, limit=limit), {}
+
+    return await response_cache.respond_async(
+        request, [response_cache_module.CATALOG_SCOPE], build, list[product_schema.Product]
+    )
+
+@router.get("/products/{product_id}", response_model=product_schema.Product)
+async def read_product(
+    product_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_user_async)
+):
+    async def build():
+        db_product = await crud_product_async.get_product(db, product_id=product_id)
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return db_product, {}
+
+    return await response_cache.respond_async(
+        request, response_cache_module.product_scopes(product_id), build, product_schema.Product
+    )
+
+@router.put("/products/{product_id}", response_model=product_schema.Product)
+async def update_existing_product(
+    product_id: uuid.UUID,
+    product_in: product_schema.ProductUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_manager_async)
+):
+    db_product = await crud_product_async.get_product(db, product_id=product_id)
+    if db_product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return await crud_product_async.update_product(db=db, db_product=db_product, product_in=product_in)
+
+@router.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_existing_product(
+    product_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_manager_async)
+):
+    try:
+        db_product = await crud_product_async.delete_product(db, product_id=product_id)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Cannot delete product with existing inventory movements. Remove or reassign those records first.")
+
+    if db_product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return None
+
+@router.post("/users/", response_model=user_schema.User, status_code=status.HTTP_201_CREATED)
+async def register_new_user(
+    user: user_schema.UserCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_user = await crud_user_async.get_user_by_email(db, email=user.email)
+    if db_user:
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered",
+        )
+    hashed_password = await get_password_hash_offloaded(user.password)
+    return await crud_user_async.create_user(db=db, user=user, hashed_password=hashed_password)
+
+@router.post("/inventory/move", response_model=product_schema.Product)
+async def create_move(
+    movement: inventory_schema.InventoryMovementCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_user_async)
+):
+    if settings.MOVEMENT_COMBINING:
+        # Applied together with the other moves on this product arriving in the same window
+        updated_product = await movement_combiner.submit_async(
+            movement.product_id, (movement, current_user.id),
+            lambda entries: crud_inventory_async.apply_combined_movements(db, entries)
+        )
+    else:
+        updated_product = await crud_inventory_async.create_inventory_movement(
+            db=db, movement=movement, user_id=current_user.id
+        )
+    if updated_product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return updated_product
+
+@router.post("/inventory/moves", response_model=list[inventory_schema.InventoryMovementResult])
+async def create_moves(
+    movements: list[inventory_schema.InventoryMovementCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schema.User = Depends(get_current_user_async)
+):
+    return await crud_inventory_async.create_inventory_movements(
+        db=db, movements=movements, user_id=current_user.id
+    )
+
+
+def with_async_routes(sync_router: APIRouter) -> APIRouter:
+    """
+    A router with the sync routes, where every route that has an async variant here is
+    swapped for it in place, because route order decides which route matches a path.
+    """
+    async_routes = {(route.path, frozenset(route.methods)): route for route in router.routes}
+    combined = APIRouter()
+    combined.routes.extend(
+        async_routes.get((route.path, frozenset(route.methods)), route) for route in sync_router.routes
+    )
+    return combined
@@ -4,46 +4,80 @@ from schemas import product as product_schema
 from crud import crud_product
 from database import get_db
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import io
+import json
+import secrets
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from schemas import user as user_schema
 from crud import crud_user
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from security import verify_password, create_access_token, get_current_user, get_current_manager
+from security import (
+    create_access_token, get_current_user, get_current_manager,
+    get_password_hash_offloaded, verify_password_offloaded
+)
+from password_hashing import password_hasher
+from config import settings
+import stock_events
+import metrics
+from forecast_pool import ForecastTimeout, forecast_pool
+from write_combining import movement_combiner
+from profiling import profiler
+import response_cache as response_cache_module
+from response_cache import response_cache
 from schemas import inventory as inventory_schema
 from crud import crud_inventory
 from schemas import analytics as analytics_schema
 from crud import crud_analytics
+from crud import crud_snapshots
 from models import product as product_model
 from sqlalchemy.exc import IntegrityError
 
 
 router = APIRouter()
 
+SSE_KEEPALIVE_SECONDS = 15
+
 class Token(BaseModel):
     access_token: str
     token_type: str
     user_role: str
 
 @router.post("/login/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # async so that waiting for the bcrypt pool does not hold a threadpool thread;
+    # the blocking database calls still go through the threadpool
+    user = await run_in_threadpool(crud_user.get_user_by_email, db, email=form_data.username)
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_password_offloaded(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_data = {"sub": user.email}
+    # Read before the rehash commit below expires the row: reloading it here would run
+    # a blocking query on the event loop
+    email, user_id, user_role = user.email, user.id, user.role
+    if new_hash:
+        # Stored with an outdated cost factor: upgrade it now that we know the password
+        await run_in_threadpool(crud_user.update_password_hash, db, user, new_hash)
+    access_token_data = {"sub": email, "uid": str(user_id)}
     # Pass the user's role to the token creation function
-    access_token = create_access_token(data=access_token_data, user_role=user.role) 
+    access_token = create_access_token(data=access_token_data, user_role=user_role) 
     
     # Return the role in the response body
-    return {"access_token": access_token, "token_type": "bearer", "user_role": user.role}
+    return {"access_token": access_token, "token_type": "bearer", "user_role": user_role}
 
 @router.post("/products/", response_model=product_schema.Product)
 def create_new_product(
@@ -55,24 +89,147 @@ def create_new_product(
 
 @router.get("/products/", response_model=list[product_schema.Product])
 def read_products(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_user)
+):
+    # `cursor` (from a previous page's X-Next-Cursor header) selects keyset pagination;
+    # skip/limit keep working as before
+    after = None
+    if cursor:
+        try:
+            after = crud_product.decode_product_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def build():
+        products = crud_product.get_products(db, skip=skip, limit=limit, after=after)
+        headers = {}
+        if limit > 0 and len(products) == limit:
+            headers["X-Next-Cursor"] = crud_product.encode_product_cursor(products[-1])
+        return products, headers
+
+    return response_cache.respond(
+        request, [response_cache_module.CATALOG_SCOPE], build, list[product_schema.Product]
+    )
+
+# Search, the low-stock routes and bulk import/export are declared before
+# /products/{product_id} so the path parameter does not capture them
+@router.get("/products/search", response_model=list[product_schema.Product])
+def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_user)
+):
+    # Prefix and fuzzy matches on SKU, name and description, best first
+    def build():
+        return crud_product.search_products(db, q, limit=limit), {}
+
+    return response_cache.respond(
+        request, [response_cache_module.CATALOG_SCOPE], build, list[product_schema.Product]
+    )
+
+@router.get("/products/low-stock", response_model=list[product_schema.Product])
+def read_low_stock_products(
+    request: Request,
+    limit: int = 100,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_user)
 ):
-    products = crud_product.get_products(db, skip=skip, limit=limit)
-    return products
+    # Largest shortfall first; follow X-Next-Cursor for the next page
+    after = None
+    if cursor:
+        try:
+            after = crud_product.decode_low_stock_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def build():
+        products = crud_product.get_low_stock_products(db, limit=limit, after=after)
+        headers = {}
+        if limit > 0 and len(products) == limit:
+            headers["X-Next-Cursor"] = crud_product.encode_low_stock_cursor(products[-1])
+        return products, headers
+
+    return response_cache.respond(
+        request, [response_cache_module.CATALOG_SCOPE], build, list[product_schema.Product]
+    )
+
+@router.get("/products/low-stock/stream")
+async def stream_low_stock_changes(
+    request: Request,
+    current_user: user_schema.User = Depends(get_current_user)
+):
+    # Server-sent events: "low_stock" when a product falls below its reorder point,
+    # "restocked" when it climbs back, for changes handled by this API process
+    async def events():
+        queue = stock_events.broker.subscribe()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event['product'])}\n\n"
+        finally:
+            stock_events.broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+_PRODUCT_FILE_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+@router.post("/products/import", response_model=product_schema.ProductImportSummary)
+def import_products(
+    file: UploadFile = File(...),
+    file_format: Literal["csv", "ndjson"] | None = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    # Upserts on SKU. The upload is spooled to disk by the form parser and read row by row.
+    if file_format is None:
+        file_format = "ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv"
+    text_stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    rows = crud_product.read_product_import_rows(text_stream, file_format)
+    return crud_product.import_products(db, rows, batch_size=settings.PRODUCT_IMPORT_BATCH_SIZE)
+
+@router.get("/products/export")
+def export_products(
+    file_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    return StreamingResponse(
+        crud_product.export_products(file_format),
+        media_type=_PRODUCT_FILE_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="products.{file_format}"'},
+    )
 
 @router.get("/products/{product_id}", response_model=product_schema.Product)
 def read_product(
     product_id: uuid.UUID,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_user)
 ):
-    db_product = crud_product.get_product(db, product_id=product_id)
-    if db_product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+    def build():
+        db_product = crud_product.get_product(db, product_id=product_id)
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return db_product, {}
+
+    return response_cache.respond(
+        request, response_cache_module.product_scopes(product_id), build, product_schema.Product
+    )
 
 @router.put("/products/{product_id}", response_model=product_schema.Product)
 def update_existing_product(
@@ -111,18 +268,89 @@ def delete_existing_product(
     return None
 
 @router.post("/users/", response_model=user_schema.User, status_code=status.HTTP_201_CREATED)
-def register_new_user(
+async def register_new_user(
     user: user_schema.UserCreate,
     db: Session = Depends(get_db)
 ):
     # Check if user with this email already exists
-    db_user = crud_user.get_user_by_email(db, email=user.email)
+    db_user = await run_in_threadpool(crud_user.get_user_by_email, db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered",
         )
-    return crud_user.create_user(db=db, user=user)
+    hashed_password = await get_password_hash_offloaded(user.password)
+    return await run_in_threadpool(crud_user.create_user, db=db, user=user, hashed_password=hashed_password)
+
+@router.patch("/users/{user_id}/role", response_model=user_schema.User)
+def update_user_role(
+    user_id: uuid.UUID,
+    role_in: user_schema.UserRoleUpdate,
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    """
+    Changes another user's role. It applies at once in this API process, which drops the
+    user's cached principal. Other workers keep their cached principal, with the old role,
+    for up to AUTH_PRINCIPAL_CACHE_TTL_SECONDS (at most 60 s). With AUTH_TRUST_TOKEN_CLAIMS
+    the role is read from the token, so the change waits for the token to expire.
+    """
+    # Managers cannot demote themselves, so there is always one left to promote others
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="You cannot change your own role")
+    db_user = crud_user.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return crud_user.update_user_role(db, db_user=db_user, role=role_in.role)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics(request: Request):
+    # Prometheus scrape target; see metrics.py for what is recorded
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.post("/metrics/profiler/start", status_code=status.HTTP_202_ACCEPTED)
+def start_profiler(
+    interval: float = Query(0.01, gt=0, le=1),
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    if not profiler.start(interval=interval, max_seconds=settings.PROFILER_MAX_SECONDS):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return {"interval": interval, "max_seconds": settings.PROFILER_MAX_SECONDS}
+
+@router.post("/metrics/profiler/stop", response_class=PlainTextResponse)
+def stop_profiler(
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    # Collapsed stacks of every thread of this API process, ready for flamegraph.pl / speedscope
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    return PlainTextResponse(profiler.stop())
+
+@router.get("/metrics/response-cache")
+def read_response_cache_metrics(
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    # Hit/miss/304 counters of the response cache in this API process
+    return response_cache.stats()
+
+@router.get("/metrics/password-hashing")
+def read_password_hashing_metrics(
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    # Queue depth and latency of the bcrypt pool in this API process
+    return password_hasher.stats()
 
 @router.post("/inventory/move", response_model=product_schema.Product)
 def create_move(
@@ -130,19 +358,70 @@ def create_move(
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_user)
 ):
-    updated_product = crud_inventory.create_inventory_movement(
-        db=db, movement=movement, user_id=current_user.id
-    )
+    if settings.MOVEMENT_COMBINING:
+        # Applied together with the other moves on this product arriving in the same window
+        updated_product = movement_combiner.submit(
+            movement.product_id, (movement, current_user.id),
+            lambda entries: crud_inventory.apply_combined_movements(db, entries)
+        )
+    else:
+        updated_product = crud_inventory.create_inventory_movement(
+            db=db, movement=movement, user_id=current_user.id
+        )
     if updated_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return updated_product
 
+@router.post("/inventory/moves", response_model=list[inventory_schema.InventoryMovementResult])
+def create_moves(
+    movements: list[inventory_schema.InventoryMovementCreate],
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_user)
+):
+    # Apply the whole batch under one transaction; unknown products are reported per item
+    return crud_inventory.create_inventory_movements(
+        db=db, movements=movements, user_id=current_user.id
+    )
+
+@router.post(
+    "/inventory/schedule",
+    response_model=inventory_schema.ScheduledMovement,
+    status_code=status.HTTP_201_CREATED
+)
+def schedule_move(
+    movement: inventory_schema.InventoryMovementSchedule,
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_user)
+):
+    # Applied by the scheduler job (jobs/apply_scheduled.py) once scheduled_for has passed
+    db_movement = crud_inventory.schedule_inventory_movement(
+        db=db, movement=movement, user_id=current_user.id
+    )
+    if db_movement is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return db_movement
+
+@router.delete("/inventory/schedule/{movement_id}", response_model=inventory_schema.ScheduledMovement)
+def cancel_scheduled_move(
+    movement_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_user)
+):
+    db_movement = crud_inventory.cancel_scheduled_movement(db=db, movement_id=movement_id)
+    if db_movement is None:
+        raise HTTPException(status_code=404, detail="Scheduled movement not found")
+    return db_movement
+
 @router.get("/analytics/kpis", response_model=analytics_schema.DashboardKPIs)
 def read_dashboard_kpis(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_manager)
 ):
-    return crud_analytics.get_dashboard_kpis(db=db)
+    return response_cache.respond(
+        request, [response_cache_module.CATALOG_SCOPE],
+        lambda: (crud_analytics.get_dashboard_kpis(db=db), {}), analytics_schema.DashboardKPIs
+    )
 
 @router.get(
     "/analytics/historical/{product_id}",
@@ -150,21 +429,100 @@ def read_dashboard_kpis(
 )
 def read_product_historical_data(
     product_id: uuid.UUID,
+    request: Request,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    max_points: int = Query(1000, ge=2, le=10_000),
+    resolution: Literal["raw", "minute", "hour", "day", "week"] | None = None,
+    mode: Literal["last", "minmax"] = "last",
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_manager)
 ):
-    return crud_analytics.get_product_historical_data(db=db, product_id=product_id)
+    # At most max_points points, downsampled in SQL; resolution=raw streams every movement
+    if resolution == "raw":
+        return StreamingResponse(
+            crud_analytics.iter_product_historical_data(product_id=product_id, start=start, end=end),
+            media_type="application/json",
+        )
+    return response_cache.respond(
+        request, response_cache_module.product_scopes(product_id),
+        lambda: (crud_analytics.get_product_historical_data(
+            db=db, product_id=product_id, start=start, end=end,
+            max_points=max_points, resolution=resolution, mode=mode
+        ), {}),
+        list[analytics_schema.HistoricalDataPoint]
+    )
+
+@router.post("/analytics/forecast/batch")
+async def read_demand_forecast_batch(
+    product_ids: list[uuid.UUID],
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    # Streams one NDJSON line (ForecastBatchItem) per product in completion order: the
+    # answers that need no fit first, then each fit as soon as it finishes, so one slow
+    # or failing SKU does not hold up the rest
+    product_ids = list(dict.fromkeys(product_ids))
+    if len(product_ids) > settings.FORECAST_BATCH_MAX_PRODUCTS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.FORECAST_BATCH_MAX_PRODUCTS} products per batch"
+        )
+    # All database work happens here, before the response starts
+    ready, fits = await run_in_threadpool(crud_analytics.prepare_forecast_batch, db, product_ids)
+
+    async def fit(product_id, watermark, bucket_starts, demand):
+        timeout = settings.FORECAST_BATCH_TIMEOUT_SECONDS
+        try:
+            with metrics.span("forecast_batch_fit"):
+                points = await forecast_pool.fit(bucket_starts, demand, settings.FORECAST_BUCKET, timeout)
+        except ForecastTimeout:
+            return {"product_id": product_id, "status": "timeout", "detail": f"No forecast within {timeout:g}s"}
+        except Exception as e:
+            return {"product_id": product_id, "status": "failed", "detail": str(e) or type(e).__name__}
+        if points is None:
+            return {"product_id": product_id, "status": "failed", "detail": "Forecasting failed"}
+        crud_analytics.cache_fitted_forecast(product_id, watermark, points)
+        return {"product_id": product_id, "status": "ok", "source": "fitted", "points": points}
+
+    def ndjson_line(item):
+        return analytics_schema.ForecastBatchItem.model_validate(item).model_dump_json() + "\n"
+
+    async def stream_results():
+        for item in ready:
+            yield ndjson_line(item)
+        tasks = [asyncio.ensure_future(fit(product_id, *args)) for product_id, args in fits.items()]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield ndjson_line(await next_result)
+        finally:
+            # Client disconnected: fits that have not started are dropped
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @router.get(
     "/analytics/forecast/{product_id}",
     response_model=list[analytics_schema.HistoricalDataPoint]
 )
 def read_product_demand_forecast(
     product_id: uuid.UUID,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_manager)
 ):
-    forecast_data = crud_analytics.get_product_demand_forecast(db=db, product_id=product_id)
-    return forecast_data
+    def build():
+        # Serve the forecast precomputed by the background refresh job (jobs/forecast_refresh.py)
+        stored_forecast = crud_analytics.get_stored_product_forecast(db=db, product_id=product_id)
+        if stored_forecast is not None:
+            return stored_forecast.points, {"X-Forecast-Computed-At": stored_forecast.computed_at.isoformat()}
+        # Not refreshed yet (e.g. a brand new product): fit inline, the next refresh pass stores it
+        return crud_analytics.get_product_demand_forecast(db=db, product_id=product_id), {}
+
+    return response_cache.respond(
+        request, [response_cache_module.FORECASTS_SCOPE, *response_cache_module.product_scopes(product_id)],
+        build, list[analytics_schema.HistoricalDataPoint]
+    )
 
 @router.get(
     "/analytics/scheduled/{product_id}",
@@ -172,35 +530,69 @@ def read_product_demand_forecast(
 )
 def read_product_scheduled_data(
     product_id: uuid.UUID,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_manager)
 ):
-    return crud_analytics.get_product_scheduled_data(db=db, product_id=product_id)
+    return response_cache.respond(
+        request, response_cache_module.product_scopes(product_id),
+        lambda: (crud_analytics.get_product_scheduled_data(db=db, product_id=product_id), {}),
+        list[analytics_schema.HistoricalDataPoint]
+    )
+
+@router.get("/analytics/stock-as-of", response_model=list[analytics_schema.StockLevel])
+def read_stock_as_of(
+    ts: datetime,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(get_current_manager)
+):
+    # Rebuilt from the nearest stock checkpoint plus the movements between it and ts. Inside
+    # an archived day the levels are for its midnight, which X-Effective-At reports.
+    levels, snapshot_at, effective_at = crud_snapshots.get_stock_as_of(db, ts)
+    if snapshot_at is not None:
+        response.headers["X-Snapshot-At"] = snapshot_at.isoformat()
+    response.headers["X-Effective-At"] = effective_at.isoformat()
+    return levels
 
 @router.get("/products/sku/{sku}", response_model=product_schema.Product)
 def read_product_by_sku(
     sku: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_user)
 ):
-    # Find the first product that matches the SKU
-    db_product = db.query(product_model.Product).filter(
-        product_model.Product.sku == sku,
-        product_model.Product.is_deleted == False
-    ).first()
-    if db_product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+    def build():
+        # Find the first product that matches the SKU
+        db_product = db.query(product_model.Product).filter(
+            product_model.Product.sku == sku,
+            product_model.Product.is_deleted == False
+        ).first()
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return db_product, {}
+
+    return response_cache.respond(
+        request, [response_cache_module.CATALOG_SCOPE], build, product_schema.Product
+    )
 
 @router.get(
     "/analytics/anomalies",
     response_model=list[analytics_schema.AnomalyDataPoint]
 )
 def read_anomalous_movements(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_manager)
 ):
-    return crud_analytics.get_anomalous_movements(db=db)
+    # Anomalies are flagged incrementally by jobs/anomaly_refresh.py; this only pages through them
+    return response_cache.respond(
+        request, [response_cache_module.ANOMALIES_SCOPE],
+        lambda: (crud_analytics.get_stored_anomalies(db=db, skip=skip, limit=limit), {}),
+        list[analytics_schema.AnomalyDataPoint]
+    )
 
 @router.get(
     "/analytics/anomalies/{product_id}",
@@ -208,7 +600,15 @@ def read_anomalous_movements(
 )
 def read_anomalies_for_product(
     product_id: uuid.UUID,
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(get_current_manager)
 ):
-    return crud_analytics.get_anomalies_for_product(db=db, product_id=product_id)
\ No newline at end of file
+    # Newest first, paged like /analytics/anomalies
+    return response_cache.respond(
+        request, [response_cache_module.ANOMALIES_SCOPE],
+        lambda: (crud_analytics.get_anomalies_for_product(db=db, product_id=product_id, skip=skip, limit=limit), {}),
+        list[analytics_schema.AnomalyDataPoint]
+    )
\ No newline at end of file
@@ -0,0 +1,111 @@
+# backend/benchmarks/_common.py
+"""
+Shared setup for the benchmark scripts.
+
+Run the benchmarks from the backend directory, e.g. `python -m benchmarks.bench_inventory_moves`.
+They never touch the database configured in `.env`: they use BENCHMARK_DATABASE_URL,
+or a throwaway SQLite file when it is not set, and drop/recreate every table.
+"""
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ["DATABASE_URL"] = os.environ.get(
+    "BENCHMARK_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "inventory_benchmark.db"),
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert, text
+
+from database import Base, SessionLocal, engine
+from models import product as product_model, user as user_model, inventory as inventory_model  # noqa: F401
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reset_database():
+    """Drop and recreate every table on the benchmark database, then apply the migrations."""
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    Base.metadata.create_all(bind=engine)
+    apply_migrations()
+
+
+def apply_migrations():
+    alembic_config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    alembic_config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(alembic_config, "head")
+
+
+def create_user(db, email="bench@example.com", role="manager"):
+    db_user = user_model.User(email=email, hashed_password="not-a-real-hash", role=role)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+def create_products(db, count, quantity_on_hand=0, reorder_point=10):
+    """Bulk-insert `count` synthetic products and return their ids."""
+    rows = [
+        {
+            "id": uuid.uuid4(), "sku": f"BENCH-{i:08d}", "name": f"Benchmark product {i:08d}",
+            "description": None, "reorder_point": reorder_point,
+            "quantity_on_hand": quantity_on_hand, "is_deleted": False,
+        }
+        for i in range(count)
+    ]
+    for start in range(0, len(rows), 10_000):
+        db.execute(insert(product_model.Product), rows[start:start + 10_000])
+    db.commit()
+    return [row["id"] for row in rows]
+
+
+def create_movements(db, product_ids, user_id, count, days=365, sales_only=False, seed=7):
+    """
+    Bulk-insert `count` completed movements at irregular timestamps spread over the last
+    `days` days, across the given products. Mostly small sales with occasional restocks.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for start in range(0, count, 10_000):
+        rows = []
+        for _ in range(min(10_000, count - start)):
+            change = -rng.randint(1, 5) if sales_only or rng.random() < 0.9 else rng.randint(20, 100)
+            rows.append({
+                "id": uuid.uuid4(), "product_id": rng.choice(product_ids), "user_id": user_id,
+                "change_quantity": change, "new_quantity_on_hand": rng.randint(0, 500),
+                "reason": "benchmark", "status": "COMPLETED",
+                "created_at": now - timedelta(seconds=rng.uniform(0, days * 86_400)),
+            })
+        db.execute(insert(inventory_model.InventoryMovement), rows)
+    db.commit()
+
+
+class Timer:
+    """Context manager that records the elapsed wall-clock time in `elapsed`."""
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self._started
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(value).ljust(w) for value, w in zip(row, widths)))
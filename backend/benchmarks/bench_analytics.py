@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_analytics.py
+"""
+Micro-benchmarks for the analytics hot paths at growing ledger sizes:
+
+* get_product_demand_forecast on one product owning every movement (cache cleared per run)
+* _find_anomalies_in_movements on in-memory columns
+* get_anomalous_movements over the whole ledger
+
+    python -m benchmarks.bench_analytics --sizes 1000 100000 1000000
+"""
+import argparse
+import logging
+
+import numpy as np
+
+from benchmarks._common import (
+    SessionLocal, Timer, create_movements, create_products, create_user, print_table, reset_database
+)
+from crud import crud_analytics
+from models import inventory as inventory_model
+
+
+def run(sizes, products):
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    rows = []
+    for size in sizes:
+        reset_database()
+        with SessionLocal() as db:
+            user_id = create_user(db).id
+            product_ids = create_products(db, products)
+            # The first product owns every movement so the forecast sees the full history
+            create_movements(db, product_ids[:1], user_id, size)
+
+            crud_analytics._forecast_cache.clear()
+            with Timer() as forecast:
+                crud_analytics.get_product_demand_forecast(db, product_ids[0])
+
+            change_quantity, created_at = map(np.asarray, zip(*db.query(
+                inventory_model.InventoryMovement.change_quantity,
+                inventory_model.InventoryMovement.created_at
+            ).all()))
+            with Timer() as detection:
+                crud_analytics._find_anomalies_in_movements(change_quantity, created_at)
+
+            with Timer() as global_scan:
+                flagged = crud_analytics.get_anomalous_movements(db)
+
+        rows.append([
+            f"{size:,}", f"{forecast.elapsed:.3f}", f"{detection.elapsed:.3f}",
+            f"{global_scan.elapsed:.3f}", f"{len(flagged):,}"
+        ])
+    print_table(
+        ["movements", "forecast (s)", "find_anomalies (s)", "anomalous_movements (s)", "flagged"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--products", type=int, default=100)
+    args = parser.parse_args()
+    run(args.sizes, args.products)
@@ -0,0 +1,114 @@
+# backend/benchmarks/bench_async_api.py
+"""
+Requests per second and latency percentiles of the API served by uvicorn in the sync
+mode (threadpool routes) and in DB_ASYNC_MODE, under the same concurrent load.
+
+Each mode runs in its own uvicorn process against the benchmark database; the load is a
+mix of GET /products/ pages and GET /products/{id}, plus POST /inventory/move when
+--write-ratio is set (keep it low on SQLite, which serialises writers).
+
+    python -m benchmarks.bench_async_api --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks._common import BACKEND_DIR, SessionLocal, create_products, create_user, print_table, reset_database
+from main import app  # noqa: F401  (imported first: it sets up the crud <-> security import order)
+from security import create_access_token
+
+
+def _start_server(port, async_mode):
+    env = dict(os.environ, DB_ASYNC_MODE=str(async_mode).lower())
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def _load(base_url, headers, product_ids, concurrency, duration, write_ratio, seed):
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            product_id = rng.choice(product_ids)
+            roll = rng.random()
+            started = time.perf_counter()
+            if roll < write_ratio:
+                response = await client.post("/inventory/move", json={
+                    "product_id": str(product_id), "change_quantity": rng.choice([-1, 1]), "reason": "benchmark"
+                })
+            elif roll < (1 + write_ratio) / 2:
+                response = await client.get("/products/", params={"limit": 50})
+            else:
+                response = await client.get(f"/products/{product_id}")
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(product_count, concurrency, duration, write_ratio, port):
+    reset_database()
+    with SessionLocal() as db:
+        user = create_user(db)
+        product_ids = create_products(db, product_count, quantity_on_hand=1_000_000)
+        token = create_access_token(data={"sub": user.email, "uid": str(user.id)}, user_role=user.role)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    rows = []
+    for name, async_mode in [("sync", False), ("async", True)]:
+        server = _start_server(port, async_mode)
+        try:
+            latencies, errors, elapsed = asyncio.run(_load(
+                f"http://127.0.0.1:{port}", headers, product_ids, concurrency, duration, write_ratio, seed=7
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+        latencies.sort()
+        rows.append([
+            name, f"{len(latencies) / elapsed:.0f}",
+            f"{_percentile(latencies, 0.50) * 1000:.1f}", f"{_percentile(latencies, 0.99) * 1000:.1f}", errors
+        ])
+    print_table(["mode", "requests/s", "p50 (ms)", "p99 (ms)", "errors"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--write-ratio", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    run(args.products, args.concurrency, args.duration, args.write_ratio, args.port)
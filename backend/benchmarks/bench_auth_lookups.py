@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_auth_lookups.py
+"""
+Database statements and throughput per authenticated request (GET /products/{id}) with the
+principal cache disabled, enabled, and with AUTH_TRUST_TOKEN_CLAIMS.
+
+    python -m benchmarks.bench_auth_lookups --requests 2000 --concurrency 8
+"""
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import SessionLocal, Timer, create_products, create_user, print_table, reset_database
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app  # imported first: it sets up the crud <-> security import order
+import security
+from config import settings
+from database import engine
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+def _run_mode(client, headers, product_id, request_count, concurrency, cache_ttl, trust_claims):
+    settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS = cache_ttl
+    settings.AUTH_TRUST_TOKEN_CLAIMS = trust_claims
+    security._principal_cache.clear()
+
+    def request(_):
+        response = client.get(f"/products/{product_id}", headers=headers)
+        response.raise_for_status()
+
+    counter = _StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        with Timer() as timer, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(request, range(request_count)))
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return counter.count / request_count, request_count / timer.elapsed
+
+
+def run(request_count, concurrency):
+    reset_database()
+    with SessionLocal() as db:
+        user = create_user(db)
+        product_id = create_products(db, 1)[0]
+        token = security.create_access_token(
+            data={"sub": user.email, "uid": str(user.id)}, user_role=user.role
+        )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    modes = [
+        ("no cache", 0, False),
+        ("principal cache", 60, False),
+        ("trusted claims", 60, True),
+    ]
+    rows = []
+    with TestClient(app) as client:
+        for name, cache_ttl, trust_claims in modes:
+            statements, throughput = _run_mode(
+                client, headers, product_id, request_count, concurrency, cache_ttl, trust_claims
+            )
+            rows.append([name, f"{statements:.2f}", f"{throughput:.0f}"])
+    print_table(["mode", "statements/request", "requests/s"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency)
@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_forecast_aggregation.py
+"""
+Fit time of the demand forecast against history length, feeding Prophet one row per raw
+sale (the old behaviour) versus the SQL-aggregated bucketed series.
+
+    python -m benchmarks.bench_forecast_aggregation --lengths 1000 10000 50000 --bucket day
+"""
+import argparse
+import logging
+
+import pandas as pd
+from prophet import Prophet
+
+from benchmarks._common import (
+    SessionLocal, Timer, create_movements, create_products, create_user, print_table, reset_database
+)
+from config import settings
+from crud import crud_analytics
+from models import inventory as inventory_model
+
+
+def _fit_raw(db, product_id):
+    """The pre-aggregation path: every sale is its own Prophet row."""
+    sales = db.query(
+        inventory_model.InventoryMovement.created_at,
+        inventory_model.InventoryMovement.change_quantity
+    ).filter(
+        inventory_model.InventoryMovement.product_id == product_id,
+        inventory_model.InventoryMovement.change_quantity < 0
+    ).order_by(inventory_model.InventoryMovement.created_at.asc()).all()
+    history_df = pd.DataFrame({"ds": [s[0] for s in sales], "y": [abs(s[1]) for s in sales]})
+    history_df["ds"] = pd.to_datetime(history_df["ds"]).dt.tz_localize(None)
+    model = Prophet()
+    model.fit(history_df)
+    return model.predict(model.make_future_dataframe(periods=30))
+
+
+def run(lengths, bucket):
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    settings.FORECAST_BUCKET = bucket
+    rows = []
+    for length in lengths:
+        reset_database()
+        with SessionLocal() as db:
+            user_id = create_user(db).id
+            product_id = create_products(db, 1)[0]
+            create_movements(db, [product_id], user_id, length, sales_only=True)
+            with Timer() as raw:
+                _fit_raw(db, product_id)
+            with Timer() as aggregated:
+                crud_analytics._fit_product_demand_forecast(db, product_id)
+        rows.append([
+            length, f"{raw.elapsed:.2f}", f"{aggregated.elapsed:.2f}", f"{raw.elapsed / aggregated.elapsed:.1f}x"
+        ])
+    print_table(["sales rows", "raw fit (s)", f"{bucket} buckets fit (s)", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--bucket", choices=["hour", "day", "week"], default="day")
+    args = parser.parse_args()
+    run(args.lengths, args.bucket)
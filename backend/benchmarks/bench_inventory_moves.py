@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_inventory_moves.py
+"""
+Compares N calls to `create_inventory_movement` against the same N movements sent
+through `create_inventory_movements` in batches.
+
+    python -m benchmarks.bench_inventory_moves --movements 5000 --products 50 --batch-size 500
+"""
+import argparse
+import random
+
+from benchmarks._common import SessionLocal, Timer, create_products, create_user, print_table, reset_database
+from crud import crud_inventory
+from schemas import inventory as inventory_schema
+
+
+def _make_movements(product_ids, count, seed=42):
+    rng = random.Random(seed)
+    return [
+        inventory_schema.InventoryMovementCreate(
+            product_id=rng.choice(product_ids),
+            change_quantity=rng.choice([-3, -2, -1, 1, 2, 5]),
+            reason="benchmark",
+        )
+        for _ in range(count)
+    ]
+
+
+def run(movement_count, product_count, batch_size):
+    rows = []
+
+    reset_database()
+    with SessionLocal() as db:
+        user_id = create_user(db).id
+        product_ids = create_products(db, product_count, quantity_on_hand=1_000)
+        movements = _make_movements(product_ids, movement_count)
+        with Timer() as single:
+            for movement in movements:
+                crud_inventory.create_inventory_movement(db=db, movement=movement, user_id=user_id)
+    rows.append(["single", movement_count, f"{single.elapsed:.3f}", f"{movement_count / single.elapsed:,.0f}"])
+
+    reset_database()
+    with SessionLocal() as db:
+        user_id = create_user(db).id
+        product_ids = create_products(db, product_count, quantity_on_hand=1_000)
+        movements = _make_movements(product_ids, movement_count)
+        with Timer() as batched:
+            for start in range(0, movement_count, batch_size):
+                crud_inventory.create_inventory_movements(
+                    db=db, movements=movements[start:start + batch_size], user_id=user_id
+                )
+    rows.append([f"batch({batch_size})", movement_count, f"{batched.elapsed:.3f}", f"{movement_count / batched.elapsed:,.0f}"])
+
+    print_table(["mode", "movements", "seconds", "movements/s"], rows)
+    print(f"speedup: {single.elapsed / batched.elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movements", type=int, default=5_000)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    run(args.movements, args.products, args.batch_size)
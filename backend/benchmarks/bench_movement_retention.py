@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_movement_retention.py
+"""
+The analytics reads over a two-year ledger before and after jobs.movement_retention has
+archived everything older than MOVEMENT_RETENTION_MONTHS into daily rollups: a product's
+full history at day resolution, the catalog's weekly demand series, a recent 30-day
+history and the catalog stock a year and a half back (without checkpoints). Also prints
+the ledger size and the time the archiving pass took.
+
+    python -m benchmarks.bench_movement_retention --products 200 --movements 400000
+"""
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from benchmarks._common import (
+    SessionLocal, Timer, create_movements, create_products, create_user, print_table, reset_database
+)
+from config import settings
+from crud import crud_analytics, crud_snapshots
+from jobs import movement_retention
+from models import inventory as inventory_model
+
+
+def _best_of(runs, function):
+    best = None
+    for _ in range(runs):
+        with Timer() as timer:
+            function()
+        best = timer.elapsed if best is None else min(best, timer.elapsed)
+    return best
+
+
+def _measure(db, product_ids, now, runs):
+    product_id = product_ids[0]
+    return {
+        "full history, day buckets": _best_of(runs, lambda: crud_analytics.get_product_historical_data(
+            db, product_id, resolution="day", max_points=1000
+        )),
+        "weekly demand, all products": _best_of(runs, lambda: crud_analytics.load_demand_series(
+            db, product_ids, "week"
+        )),
+        "last 30 days history": _best_of(runs, lambda: crud_analytics.get_product_historical_data(
+            db, product_id, start=now - timedelta(days=30)
+        )),
+        "stock as of 18 months ago": _best_of(runs, lambda: crud_snapshots.stock_levels_as_of(
+            db, now - timedelta(days=548)
+        )),
+    }
+
+
+def run(product_count, movement_count, runs):
+    reset_database()
+    settings.MOVEMENT_ARCHIVE_DIR = tempfile.mkdtemp(prefix="movement_archive_")
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        user_id = create_user(db).id
+        product_ids = create_products(db, product_count)
+        create_movements(db, product_ids, user_id, movement_count, days=730)
+        before = _measure(db, product_ids, now, runs)
+
+    with Timer() as archiving:
+        archived = movement_retention.archive_due_months(now)
+
+    with SessionLocal() as db:
+        after = _measure(db, product_ids, now, runs)
+        remaining = db.query(func.count(inventory_model.InventoryMovement.id)).scalar()
+
+    print(f"Archived {len(archived)} months ({sum(rows for _, rows in archived)} movements) "
+          f"in {archiving.elapsed:.2f}s; {remaining} of {movement_count} movements left in the ledger")
+    print_table(
+        ["query", "before ms", "after ms", "speedup"],
+        [
+            [name, f"{before[name] * 1000:.1f}", f"{after[name] * 1000:.1f}", f"{before[name] / after[name]:.1f}x"]
+            for name in before
+        ],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--movements", type=int, default=400_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    run(args.products, args.movements, args.runs)
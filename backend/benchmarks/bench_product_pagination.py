@@ -0,0 +1,61 @@
+# backend/benchmarks/bench_product_pagination.py
+"""
+Latency of GET /products/ pages deep into a large catalog: OFFSET (skip/limit) versus
+keyset cursors on (name, id).
+
+    python -m benchmarks.bench_product_pagination --products 500000 --pages 1 10 100 1000 5000
+"""
+import argparse
+import statistics
+
+from benchmarks._common import SessionLocal, Timer, create_products, print_table, reset_database
+from crud import crud_product
+from models import product as product_model
+
+
+def _median_seconds(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            run()
+        samples.append(timer.elapsed)
+    return statistics.median(samples)
+
+
+def run(product_count, pages, page_size, repeat):
+    reset_database()
+    rows = []
+    with SessionLocal() as db:
+        create_products(db, product_count)
+        for page in pages:
+            skip = (page - 1) * page_size
+            if skip >= product_count:
+                continue
+            after = None
+            if skip:
+                # Cursor of the previous page's last row (setup, not timed)
+                previous = db.query(product_model.Product).filter(
+                    product_model.Product.is_deleted == False
+                ).order_by(
+                    product_model.Product.name.asc(), product_model.Product.id.asc()
+                ).offset(skip - 1).limit(1).one()
+                after = crud_product.decode_product_cursor(crud_product.encode_product_cursor(previous))
+
+            offset_seconds = _median_seconds(
+                lambda: crud_product.get_products(db, skip=skip, limit=page_size), repeat
+            )
+            keyset_seconds = _median_seconds(
+                lambda: crud_product.get_products(db, limit=page_size, after=after), repeat
+            )
+            rows.append([page, f"{offset_seconds * 1000:.2f}", f"{keyset_seconds * 1000:.2f}"])
+    print_table(["page", "offset (ms)", "keyset (ms)"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=500_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1_000, 5_000])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.products, args.pages, args.page_size, args.repeat)
@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_product_search.py
+"""
+GET /products/search latency on a large synthetic catalog: crud_product.search_products
+per kind of query (short and long SKU prefixes, an unknown SKU, name prefixes, a word
+inside the name, a word only found in descriptions, a misspelt word, no match), median
+and p95 over a set of different queries of each kind. The catalog has realistic-looking
+names built from a small vocabulary, so common words match many products.
+
+    python -m benchmarks.bench_product_search --products 1000000
+"""
+import argparse
+import random
+import statistics
+import uuid
+
+from sqlalchemy import insert
+
+from benchmarks._common import SessionLocal, Timer, print_table, reset_database
+from crud import crud_product
+from models import product as product_model
+
+CATEGORIES = ["BRK", "FAS", "HNG", "PIP", "VAL", "TOL", "ELC", "LGT", "ADH", "SEA", "FIL", "GAS"]
+ADJECTIVES = [
+    "heavy", "light", "compact", "industrial", "marine", "precision", "flexible", "rigid", "angled",
+    "threaded", "insulated", "reinforced", "adjustable", "folding", "sealed", "universal",
+]
+MATERIALS = ["steel", "stainless", "brass", "copper", "aluminium", "nylon", "rubber", "oak", "zinc", "titanium"]
+NOUNS = [
+    "bracket", "hinge", "washer", "bolt", "anchor", "clamp", "coupling", "valve", "gasket", "fitting",
+    "flange", "spacer", "hook", "latch", "rivet", "sleeve", "nozzle", "filter", "switch", "socket",
+    "cable", "spring", "pulley", "bearing", "shackle", "grommet", "bushing", "plug", "elbow", "tee",
+]
+DESCRIPTION_WORDS = ["corrosion", "resistant", "outdoor", "food", "grade", "certified", "pack", "spare", "kit", "rated"]
+
+
+def create_catalog(db, count, seed=11):
+    """Bulk-inserts the catalog; returns a sample of its non-deleted SKUs."""
+    rng = random.Random(seed)
+    sample = []
+    for start in range(0, count, 10_000):
+        rows = []
+        for i in range(start, min(start + 10_000, count)):
+            noun = rng.choice(NOUNS)
+            rows.append({
+                "id": uuid.uuid4(), "sku": f"{rng.choice(CATEGORIES)}-{i:07d}",
+                "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(MATERIALS)} {noun} {rng.randint(4, 120)}mm",
+                "description": f"{' '.join(rng.sample(DESCRIPTION_WORDS, 3))} {noun}" if rng.random() < 0.7 else None,
+                "reorder_point": 10, "quantity_on_hand": rng.randint(0, 200), "is_deleted": rng.random() < 0.02,
+            })
+        db.execute(insert(product_model.Product), rows)
+        sample += [row["sku"] for row in rows[::100] if not row["is_deleted"]]
+    db.commit()
+    return sample
+
+
+def _misspell(rng, word):
+    position = rng.randrange(len(word) - 1)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def query_sets(skus, rng):
+    return {
+        "sku prefix (2 chars)": [rng.choice(CATEGORIES)[:2] for _ in range(20)],
+        "sku prefix (all but 1)": [rng.choice(skus)[:-1] for _ in range(20)],
+        "unknown sku": [f"{rng.choice(CATEGORIES)}-9{rng.randrange(10**6):06d}" for _ in range(20)],
+        "name prefix": [rng.choice(ADJECTIVES)[:5] for _ in range(20)],
+        "word in name": [f"{rng.choice(MATERIALS)} {rng.choice(NOUNS)}" for _ in range(20)],
+        "description only": [rng.choice(DESCRIPTION_WORDS) for _ in range(20)],
+        "misspelt": [_misspell(rng, rng.choice(NOUNS)) for _ in range(20)],
+        "no match": [f"zq{rng.randrange(10_000)}x" for _ in range(20)],
+    }
+
+
+def run(product_count, runs, limit):
+    reset_database()
+    with SessionLocal() as db:
+        with Timer() as build:
+            skus = create_catalog(db, product_count)
+    print(f"Built a {product_count} product catalog (with its search indexes) in {build.elapsed:.1f}s")
+
+    rows = []
+    with SessionLocal() as db:
+        for kind, queries in query_sets(skus, random.Random(5)).items():
+            timings, results = [], []
+            for q in queries:
+                best = None
+                for _ in range(runs):
+                    with Timer() as timer:
+                        found = crud_product.search_products(db, q, limit=limit)
+                    best = timer.elapsed if best is None else min(best, timer.elapsed)
+                timings.append(best * 1000)
+                results.append(len(found))
+            timings.sort()
+            rows.append([
+                kind, queries[0], f"{statistics.median(timings):.1f}",
+                f"{timings[int(len(timings) * 0.95) - 1]:.1f}", f"{statistics.mean(results):.0f}",
+            ])
+    print_table(["query kind", "example", "median ms", "p95 ms", "results"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    run(args.products, args.runs, args.limit)
@@ -0,0 +1,88 @@
+# backend/benchmarks/bench_response_cache.py
+"""
+Throughput and database statements of a polled product list (GET /products/?limit=100)
+without the response cache, with it, and with conditional requests (If-None-Match -> 304).
+
+    python -m benchmarks.bench_response_cache --requests 2000 --concurrency 8
+"""
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import SessionLocal, Timer, create_products, create_user, print_table, reset_database
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app  # imported first: it sets up the crud <-> security import order
+import response_cache
+import security
+from config import settings
+from database import engine
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+def _run_mode(client, headers, request_count, concurrency, backend, conditional):
+    response_cache.response_cache.backend = backend
+    etag = client.get("/products/?limit=100", headers=headers).headers.get("etag")
+    request_headers = {**headers, "If-None-Match": etag} if conditional and etag else headers
+
+    def request(_):
+        response = client.get("/products/?limit=100", headers=request_headers)
+        if response.status_code not in (200, 304):
+            response.raise_for_status()
+        return len(response.content)
+
+    counter = _StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        with Timer() as timer, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            sizes = list(pool.map(request, range(request_count)))
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return counter.count / request_count, request_count / timer.elapsed, sum(sizes) / request_count
+
+
+def run(request_count, concurrency, product_count):
+    reset_database()
+    with SessionLocal() as db:
+        user = create_user(db)
+        create_products(db, product_count)
+        token = security.create_access_token(
+            data={"sub": user.email, "uid": str(user.id)}, user_role=user.role
+        )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    memory_backend = response_cache.MemoryCacheBackend(
+        maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+    )
+    modes = [
+        ("no cache", None, False),
+        ("cache, full body", memory_backend, False),
+        ("cache, If-None-Match", memory_backend, True),
+    ]
+    rows = []
+    with TestClient(app) as client:
+        for name, backend, conditional in modes:
+            statements, throughput, body_bytes = _run_mode(
+                client, headers, request_count, concurrency, backend, conditional
+            )
+            rows.append([name, f"{statements:.2f}", f"{throughput:.0f}", f"{body_bytes:.0f}"])
+    print_table(["mode", "statements/request", "requests/s", "body bytes/request"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.products)
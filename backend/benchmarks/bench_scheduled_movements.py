@@ -0,0 +1,66 @@
+# backend/benchmarks/bench_scheduled_movements.py
+"""
+Throughput of the scheduler (jobs/apply_scheduled.py): movements applied per minute for a
+backlog of due scheduled movements, per batch size and number of scheduler processes.
+
+Several processes need PostgreSQL (BENCHMARK_DATABASE_URL): they rely on
+FOR UPDATE SKIP LOCKED, which SQLite does not have.
+
+    python -m benchmarks.bench_scheduled_movements --movements 50000 --batch-sizes 100 1000 5000
+"""
+import argparse
+import random
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from benchmarks._common import SessionLocal, Timer, create_products, create_user, print_table, reset_database
+from jobs.apply_scheduled import apply_due
+from models import inventory as inventory_model
+
+
+def _schedule_due_movements(db, product_ids, user_id, count, seed=7):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for start in range(0, count, 10_000):
+        db.execute(insert(inventory_model.InventoryMovement), [
+            {
+                "id": uuid.uuid4(), "product_id": rng.choice(product_ids), "user_id": user_id,
+                "change_quantity": rng.choice([-2, -1, 1, 2]), "new_quantity_on_hand": 0,
+                "reason": "benchmark", "status": "SCHEDULED",
+                "created_at": now - timedelta(hours=2),
+                "scheduled_for": now - timedelta(seconds=rng.uniform(0, 3_600)),
+            }
+            for _ in range(min(10_000, count - start))
+        ])
+    db.commit()
+
+
+def run(movement_count, product_count, batch_sizes, workers):
+    rows = []
+    for batch_size in batch_sizes:
+        reset_database()
+        with SessionLocal() as db:
+            user_id = create_user(db).id
+            product_ids = create_products(db, product_count, quantity_on_hand=1_000_000)
+            _schedule_due_movements(db, product_ids, user_id, movement_count)
+        with Timer() as timer:
+            if workers == 1:
+                applied = apply_due(batch_size)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    applied = sum(pool.map(apply_due, [batch_size] * workers))
+        rows.append([batch_size, workers, applied, f"{timer.elapsed:.2f}", f"{applied / timer.elapsed * 60:,.0f}"])
+    print_table(["batch size", "processes", "applied", "seconds", "movements/min"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movements", type=int, default=50_000)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1_000, 5_000])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    run(args.movements, args.products, args.batch_sizes, args.workers)
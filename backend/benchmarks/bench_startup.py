@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_startup.py
+"""
+Cold start of an API worker: time to import the app and resident memory once it can
+serve requests, with the analytics engines loaded lazily (default) and with
+ANALYTICS_PRELOAD. Also reports the memory after the first analytics request pulls them
+in, and the packages that dominate `python -X importtime` for the default setup.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks._common import BACKEND_DIR, print_table
+
+# Runs in a fresh interpreter per measurement
+_WORKER = """
+import json, time
+started = time.perf_counter()
+import main
+ready = time.perf_counter() - started
+from metrics import resident_memory_bytes
+ready_rss = resident_memory_bytes()
+from crud import crud_analytics
+crud_analytics.preload()
+print(json.dumps({"ready": ready, "ready_rss": ready_rss, "analytics_rss": resident_memory_bytes()}))
+"""
+
+
+def _start_worker(preload: bool, importtime: bool = False):
+    env = dict(os.environ, ANALYTICS_PRELOAD=str(preload).lower())
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _WORKER]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _slowest_packages(importtime_output: str, count: int):
+    """Self import time (microseconds) of the app import, summed per top-level package."""
+    totals = defaultdict(int)
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, module = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if self_us.isdigit():
+            totals[module.split(".")[0]] += int(self_us)
+        if module == "main":
+            # Modules finish in order, so everything after this is the analytics preload
+            break
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def run(runs):
+    rows = []
+    for name, preload in [("lazy (default)", False), ("ANALYTICS_PRELOAD", True)]:
+        samples = [_start_worker(preload)[0] for _ in range(runs)]
+        rows.append([
+            name,
+            f"{statistics.median(sample['ready'] for sample in samples):.2f}",
+            f"{statistics.median(sample['ready_rss'] for sample in samples) / 2**20:.0f}",
+            f"{statistics.median(sample['analytics_rss'] for sample in samples) / 2**20:.0f}",
+        ])
+    print_table(["mode", "startup s", "RSS at ready MB", "RSS after analytics MB"], rows)
+
+    _, importtime_output = _start_worker(False, importtime=True)
+    print()
+    print_table(
+        ["package", "self import s (lazy startup)"],
+        [[package, f"{micros / 1e6:.3f}"] for package, micros in _slowest_packages(importtime_output, 10)]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    run(args.runs)
@@ -0,0 +1,69 @@
+# backend/benchmarks/bench_stock_as_of.py
+"""
+Catalog-wide "stock as of" at a point in time: replaying the ledger (latest
+new_quantity_on_hand per product before the cutoff, with a window function) versus
+rebuilding from the nearest checkpoint (crud_snapshots), as the history grows.
+
+    python -m benchmarks.bench_stock_as_of --products 1000 --movements 20000 100000 400000
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from benchmarks._common import (
+    SessionLocal, Timer, create_movements, create_products, create_user, print_table, reset_database
+)
+from crud import crud_snapshots
+from models import inventory as inventory_model
+
+
+def _replay_ledger(db, ts):
+    movement = inventory_model.InventoryMovement
+    latest = db.query(
+        movement.product_id,
+        movement.new_quantity_on_hand,
+        func.row_number().over(
+            partition_by=movement.product_id, order_by=(movement.created_at.desc(), movement.id.desc())
+        ).label("position")
+    ).filter(movement.status == 'COMPLETED', movement.created_at <= ts).subquery()
+    return dict(db.query(latest.c.product_id, latest.c.new_quantity_on_hand).filter(latest.c.position == 1).all())
+
+
+def _best_of(runs, function):
+    best = None
+    for _ in range(runs):
+        with Timer() as timer:
+            function()
+        best = timer.elapsed if best is None else min(best, timer.elapsed)
+    return best
+
+
+def run(product_count, movement_counts, runs):
+    rows = []
+    for movement_count in movement_counts:
+        reset_database()
+        with SessionLocal() as db:
+            user_id = create_user(db).id
+            product_ids = create_products(db, product_count)
+            create_movements(db, product_ids, user_id, movement_count)
+            # Daily checkpoint at the last midnight; ask for the state a few hours later
+            checkpoint = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+            crud_snapshots.take_snapshot(db, checkpoint)
+            ts = checkpoint + timedelta(hours=7)
+
+            replay = _best_of(runs, lambda: _replay_ledger(db, ts))
+            from_checkpoint = _best_of(runs, lambda: crud_snapshots.get_stock_as_of(db, ts))
+        rows.append([
+            movement_count, f"{replay * 1000:.1f}", f"{from_checkpoint * 1000:.1f}", f"{replay / from_checkpoint:.1f}x"
+        ])
+    print_table(["movements", "ledger replay ms", "from checkpoint ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--movements", type=int, nargs="+", default=[20_000, 100_000, 400_000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    run(args.products, args.movements, args.runs)
@@ -0,0 +1,75 @@
+# backend/benchmarks/check_history_buckets.py
+"""
+Dialect check for the bucketing of GET /analytics/history: stores movements at and just
+around bucket boundaries (midnights, Mondays, the middle of a bucket) and fails (exit
+status 1) if crud_analytics.history_bucket puts any of them in a different bucket than
+flooring in Python does. Run it against both SQLite and PostgreSQL (BENCHMARK_DATABASE_URL):
+PostgreSQL rounds a numeric cast to integer where SQLite truncates.
+
+    python -m benchmarks.check_history_buckets
+"""
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from benchmarks._common import SessionLocal, create_products, create_user, reset_database
+from crud import crud_analytics
+from models import inventory as inventory_model
+
+WIDTHS = {"hour": 3600, "day": 86_400, "week": 7 * 86_400, "odd (7001s)": 7001}
+OFFSETS = (-1, -0.001, 0, 0.001, 1)
+
+
+def _timestamps():
+    """Timestamps around every midnight and noon of two weeks, Mondays included."""
+    monday = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    for hours in range(0, 14 * 24, 12):
+        boundary = monday + timedelta(hours=hours)
+        for seconds in OFFSETS:
+            yield boundary + timedelta(seconds=seconds)
+
+
+def _expected(created_at, width):
+    return int((created_at.timestamp() - crud_analytics.HISTORY_BUCKET_ANCHOR) // width)
+
+
+def main():
+    reset_database()
+    mismatches = []
+    with SessionLocal() as db:
+        user_id = create_user(db).id
+        product_id = create_products(db, 1)[0]
+        timestamps = list(_timestamps())
+        db.execute(insert(inventory_model.InventoryMovement), [
+            {
+                "id": uuid.uuid4(), "product_id": product_id, "user_id": user_id, "change_quantity": 1,
+                "new_quantity_on_hand": index, "reason": "bucket check", "status": "COMPLETED", "created_at": at,
+            }
+            for index, at in enumerate(timestamps)
+        ])
+        db.commit()
+
+        movement = inventory_model.InventoryMovement
+        for name, width in WIDTHS.items():
+            rows = db.query(
+                movement.new_quantity_on_hand, crud_analytics.history_bucket(db, movement.created_at, width)
+            ).all()
+            for index, bucket in rows:
+                expected = _expected(timestamps[index], width)
+                if bucket != expected:
+                    mismatches.append((name, timestamps[index], bucket, expected))
+        dialect = db.get_bind().dialect.name
+
+    checked = len(timestamps) * len(WIDTHS)
+    if mismatches:
+        for name, at, bucket, expected in mismatches:
+            print(f"{name}: {at.isoformat()} in bucket {bucket}, expected {expected}")
+        print(f"{len(mismatches)} of {checked} timestamps bucketed differently on {dialect}")
+        sys.exit(1)
+    print(f"All {checked} timestamps bucketed as expected on {dialect}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# backend/benchmarks/check_query_plans.py
+"""
+EXPLAIN-based regression check for the hot queries in crud_analytics and crud_product.
+
+Runs each hot path against a freshly migrated benchmark database, captures the SQL it
+issues, EXPLAINs every statement and fails (exit status 1) if any of them reads
+`products` or `inventory_movements` with a full table scan instead of an index.
+A scan over a partial index counts as indexed, since its predicate bounds it. On PostgreSQL
+sequential scans are disabled for the EXPLAIN, so the check asserts that a matching index
+exists rather than depending on table statistics.
+
+    python -m benchmarks.check_query_plans
+"""
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from benchmarks._common import SessionLocal, create_movements, create_products, create_user, engine, reset_database
+from crud import crud_analytics, crud_inventory, crud_product, crud_snapshots, crud_stats
+
+CHECKED_TABLES = ("products", "inventory_movements")
+
+
+def _capture_statements(run):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def _partial_indexes(connection):
+    """Names of partial indexes; a scan over one of them is bounded by its predicate."""
+    if connection.dialect.name == "postgresql":
+        rows = connection.exec_driver_sql("SELECT indexname, indexdef FROM pg_indexes")
+    else:
+        rows = connection.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'index'")
+    return {name for name, definition in rows if definition and " WHERE " in definition.upper()}
+
+
+def _full_scans_postgresql(connection, statement, parameters):
+    """Sequential scans, and index scans without an index condition on a non-partial index."""
+    partial = _partial_indexes(connection)
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        node_type, relation = node.get("Node Type", ""), node.get("Relation Name")
+        if node_type == "Seq Scan" and relation in CHECKED_TABLES:
+            scans.append(f"Seq Scan on {relation}")
+        elif (
+            node_type in ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+            and "Index Cond" not in node and node.get("Index Name") not in partial
+            and (relation in CHECKED_TABLES or node_type == "Bitmap Index Scan")
+        ):
+            scans.append(f"full {node_type} using {node.get('Index Name')}")
+    return scans
+
+
+def _full_scans_sqlite(connection, statement, parameters):
+    """SCAN steps over a checked table, unless they walk a partial index."""
+    partial = _partial_indexes(connection)
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        if not any(detail.startswith(f"SCAN {table}") for table in CHECKED_TABLES):
+            continue
+        index_name = detail.split(" INDEX ", 1)[1].split()[0] if " INDEX " in detail else None
+        if index_name not in partial:
+            scans.append(detail)
+    return scans
+
+
+def main():
+    reset_database()
+    with SessionLocal() as db:
+        user_id = create_user(db).id
+        product_ids = create_products(db, 50)
+        create_movements(db, product_ids, user_id, 5_000)
+        product_id = product_ids[0]
+        # A checkpoint to rebuild point-in-time stock from (the very first one scans the ledger)
+        snapshot_at = datetime.now(timezone.utc) - timedelta(days=30)
+        crud_snapshots.take_snapshot(db, snapshot_at)
+
+        hot_paths = {
+            "crud_analytics.get_product_historical_data": lambda: crud_analytics.get_product_historical_data(db, product_id),
+            "crud_analytics.get_product_historical_data (minmax)": lambda: crud_analytics.get_product_historical_data(
+                db, product_id, max_points=20, mode="minmax"
+            ),
+            "crud_analytics.get_product_scheduled_data": lambda: crud_analytics.get_product_scheduled_data(db, product_id),
+            "crud_analytics._get_sales_watermark": lambda: crud_analytics._get_sales_watermark(db, product_id),
+            "crud_analytics._fit_product_demand_forecast": lambda: crud_analytics._fit_product_demand_forecast(db, product_id),
+            "crud_analytics.get_anomalies_for_product": lambda: crud_analytics.get_anomalies_for_product(db, product_id),
+            "crud_analytics.get_stored_anomalies": lambda: crud_analytics.get_stored_anomalies(db),
+            "crud_stats.compute_stock_stats": lambda: crud_stats.compute_stock_stats(db),
+            "crud_product.get_product": lambda: crud_product.get_product(db, product_id),
+            "crud_inventory.apply_due_movements": lambda: crud_inventory.apply_due_movements(db, batch_size=100),
+            "crud_snapshots.get_stock_as_of": lambda: crud_snapshots.get_stock_as_of(
+                db, snapshot_at + timedelta(days=2)
+            ),
+            "crud_snapshots.get_stock_as_of (before checkpoint)": lambda: crud_snapshots.get_stock_as_of(
+                db, snapshot_at - timedelta(days=2)
+            ),
+            "crud_product.get_products": lambda: crud_product.get_products(db, skip=0, limit=100),
+            "crud_product.get_low_stock_products": lambda: crud_product.get_low_stock_products(db, limit=20),
+            "crud_product.get_low_stock_products (cursor)": lambda: crud_product.get_low_stock_products(
+                db, limit=20, after=(5, product_id)
+            ),
+            "crud_product.search_products (prefix)": lambda: crud_product.search_products(db, "be"),
+            "crud_product.search_products": lambda: crud_product.search_products(db, "product 0001"),
+            "crud_product.search_products (fuzzy)": lambda: crud_product.search_products(db, "prodcut"),
+        }
+
+        failures = 0
+        explain = _full_scans_postgresql if engine.dialect.name == "postgresql" else _full_scans_sqlite
+        for name, run in hot_paths.items():
+            for statement, parameters in _capture_statements(run):
+                with engine.connect() as connection:
+                    scans = explain(connection, statement, parameters)
+                if scans:
+                    failures += 1
+                    print(f"FAIL {name}: {', '.join(scans)}\n     {' '.join(statement.split())}")
+                else:
+                    print(f"ok   {name}")
+
+    if failures:
+        print(f"{failures} hot queries read a table without an index")
+        sys.exit(1)
+    print("All hot queries use an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,119 @@
 # backend/config.py
+from typing import Literal
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Serve the product, user and inventory routes from async handlers on an AsyncEngine.
+    # ASYNC_DATABASE_URL defaults to DATABASE_URL with the asyncpg / aiosqlite driver.
+    DB_ASYNC_MODE: bool = False
+    ASYNC_DATABASE_URL: str | None = None
 
     # JWT Settings
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Authenticated principals are cached per token subject for this long (0 disables).
+    # Each API process has its own cache, so this is also how long a role change can take
+    # to reach the other workers; it is capped at a minute for that reason.
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10_000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = Field(60, ge=0, le=60)
+    # Trust the signed uid/role claims instead of looking the user up. Role changes and
+    # removed users then only take effect once their tokens expire.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    # bcrypt cost factor; stored hashes with a different cost are rehashed on the next login
+    BCRYPT_ROUNDS: int = 12
+    # Dedicated password hashing pool. Once MAX_PENDING jobs are running or queued, logins
+    # and registrations get a 503 with Retry-After instead of waiting.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Coalesce POST /inventory/move calls on the same product that arrive within WINDOW ms
+    # into one locked transaction (per API process). Every move then waits up to WINDOW.
+    MOVEMENT_COMBINING: bool = False
+    MOVEMENT_COMBINE_WINDOW_MS: float = 10
+    MOVEMENT_COMBINE_MAX_BATCH: int = 100
+
+    # Bulk product import: rows per INSERT ... ON CONFLICT statement and commit
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+
+    # Scheduled movements applied per transaction by jobs/apply_scheduled.py
+    SCHEDULER_BATCH_SIZE: int = 1000
+    # Run the scheduler inside the API process every INTERVAL seconds instead of as a job,
+    # so its low-stock events and cache invalidations reach this process's clients
+    SCHEDULER_IN_API: bool = False
+    SCHEDULER_INTERVAL_SECONDS: float = 5
+
+    # Ledger retention (jobs/movement_retention.py): whole months older than RETENTION_MONTHS
+    # (and than the anomaly training window) are rolled up into daily aggregates, written
+    # to gzip CSV files under ARCHIVE_DIR and dropped from inventory_movements. On
+    # PostgreSQL the job also creates the monthly partitions PARTITIONS_AHEAD months ahead.
+    MOVEMENT_RETENTION_MONTHS: int = 12
+    MOVEMENT_ARCHIVE_DIR: str = "archive/movements"
+    MOVEMENT_PARTITIONS_AHEAD: int = 3
+
+    # Stock checkpoints (jobs/stock_snapshots.py) behind /analytics/stock-as-of: one every
+    # INTERVAL hours, written once a boundary is LAG minutes old
+    STOCK_SNAPSHOT_INTERVAL_HOURS: int = 24
+    STOCK_SNAPSHOT_LAG_MINUTES: int = 10
+
+    # Cached GET responses with ETags. "memory" is per API process; "sqlite" is a file
+    # shared by every process on the host (a stand-in for a shared cache); "none" disables.
+    # Entries expire after the TTL, which bounds staleness for writes that do not bump the
+    # versions of this process's backend.
+    RESPONSE_CACHE_BACKEND: Literal["memory", "sqlite", "none"] = "memory"
+    RESPONSE_CACHE_SIZE: int = 4096
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_SQLITE_PATH: str | None = None
+
+    # Prometheus-format metrics at GET /metrics (request latency, SQL per request, pool
+    # checkout wait, model fit spans). Off by default: the endpoint has no user login.
+    # When METRICS_TOKEN is set, scrapes must send it as "Authorization: Bearer <token>".
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str | None = None
+    # Allow managers to run the sampling profiler through /metrics/profiler/start and /stop.
+    # A session stops by itself after PROFILER_MAX_SECONDS.
+    PROFILER_ENABLED: bool = False
+    PROFILER_MAX_SECONDS: int = 300
+
+    # Import pandas/Prophet/scikit-learn when the API starts instead of on the first
+    # analytics request. Useful with a preforking server (shared pages), wasted on workers
+    # that never serve forecasts or anomaly scans.
+    ANALYTICS_PRELOAD: bool = False
+
+    # POST /analytics/forecast/batch: Prophet fits run on this many worker processes per
+    # API process; a fit running longer than the timeout is reported as "timeout"
+    FORECAST_BATCH_WORKERS: int = 2
+    FORECAST_BATCH_TIMEOUT_SECONDS: float = 60
+    FORECAST_BATCH_MAX_PRODUCTS: int = 500
+
+    # Demand forecast cache (per API process)
+    FORECAST_CACHE_SIZE: int = 512
+    FORECAST_CACHE_TTL_SECONDS: int = 3600
+    # Size of the demand buckets the sales history is aggregated into before forecasting.
+    # The forecast covers the buckets starting within 30 days (4 with "week").
+    FORECAST_BUCKET: Literal["hour", "day", "week"] = "day"
+
+    # Catalog-wide anomaly scan: training sample bounds and scoring chunk size
+    ANOMALY_TRAINING_WINDOW_DAYS: int = 90
+    ANOMALY_TRAINING_SAMPLE_SIZE: int = 100_000
+    ANOMALY_SCAN_CHUNK_SIZE: int = 10_000
+    # The scan watermark stays this far behind now, so a movement whose transaction commits
+    # after the pass started (dated earlier) is not stepped over; keep it above the longest
+    # movement-writing transaction
+    ANOMALY_SCAN_LAG_SECONDS: int = 60
+    # Per-product models: retrain after this many new movements, or when a scoring batch of
+    # at least ANOMALY_DRIFT_MIN_ROWS flags more than the training rate plus this margin
+    ANOMALY_RETRAIN_ROWS: int = 500
+    ANOMALY_DRIFT_MIN_ROWS: int = 20
+    ANOMALY_DRIFT_MARGIN: float = 0.15
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,138 +1,546 @@
+from sqlalchemy import Integer, cast, func, null, or_
 from sqlalchemy.orm import Session
-from models import product as product_model, inventory as inventory_model
+from database import SessionLocal, as_utc
+from models import product as product_model, inventory as inventory_model, forecast as forecast_model, anomaly as anomaly_model
+from models import rollup as rollup_model
+from cache import TTLCache
+from crud import crud_ledger, crud_stats
+from config import settings
+import metrics
+import json
+import logging
+import math
 import uuid
-import pandas as pd
-from prophet import Prophet
-from sklearn.ensemble import IsolationForest
+from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
 
-def get_dashboard_kpis(db: Session):
-    total_products = db.query(product_model.Product).count()
+# numpy, pandas, Prophet (with cmdstanpy) and scikit-learn take seconds and hundreds of MB
+# to import, so they are imported by the functions that use them: a worker only pays for
+# them once it serves a forecast or anomaly request (or at startup with ANALYTICS_PRELOAD).
+
+def preload():
+    """Imports the analytics engines up front, e.g. before forking workers."""
+    import numpy, pandas, prophet, sklearn.ensemble  # noqa: F401
+
+# Fitted 30-day forecasts keyed by product id. Each entry remembers the sales watermark
+# it was fitted on, so a refit only happens once new sales have been recorded.
+_forecast_cache = TTLCache(
+    maxsize=settings.FORECAST_CACHE_SIZE, ttl=settings.FORECAST_CACHE_TTL_SECONDS
+)
 
-    low_stock_items = db.query(product_model.Product).filter(
-        product_model.Product.quantity_on_hand < product_model.Product.reorder_point
-    ).count()
 
-    return {"total_products": total_products, "low_stock_items": low_stock_items}
+def get_dashboard_kpis(db: Session):
+    # Counters are maintained by the product and inventory CRUD; see crud_stats
+    return crud_stats.get_stock_stats(db)
+
+# Fixed bucket widths (seconds) a caller can ask the historical series for
+HISTORY_RESOLUTIONS = {"minute": 60, "hour": 3_600, "day": 86_400, "week": 604_800}
+# Epoch seconds of Monday 1970-01-05 00:00 UTC
+HISTORY_BUCKET_ANCHOR = 345_600
 
-def get_product_historical_data(db: Session, product_id: uuid.UUID):
-    movements = db.query(inventory_model.InventoryMovement).filter(
+def _historical_filters(product_id: uuid.UUID, start: datetime | None, end: datetime | None):
+    filters = [
         inventory_model.InventoryMovement.product_id == product_id,
         # ONLY FETCH COMPLETED
         inventory_model.InventoryMovement.status == 'COMPLETED'
-    ).order_by(inventory_model.InventoryMovement.created_at.asc()).all()
+    ]
+    if start is not None:
+        filters.append(inventory_model.InventoryMovement.created_at >= start)
+    if end is not None:
+        filters.append(inventory_model.InventoryMovement.created_at <= end)
+    return filters
+
+def _historical_source(db: Session, product_id: uuid.UUID, start: datetime | None, end: datetime | None):
+    """
+    The product's completed movements in [start, end] as a (created_at,
+    new_quantity_on_hand, id) subquery. Archived days (before the archive horizon) take
+    part through their rollups instead: their lowest, highest and closing levels, with a
+    NULL id. That is exactly what a bucket of a day or more keeps from them.
+    """
+    movement = inventory_model.InventoryMovement
+    ledger = db.query(
+        movement.created_at.label("created_at"),
+        movement.new_quantity_on_hand.label("new_quantity_on_hand"),
+        movement.id.label("id")
+    ).filter(*_historical_filters(product_id, start, end))
+    horizon = crud_ledger.archive_horizon(db)
+    if horizon is None or (start is not None and start >= horizon):
+        return ledger.subquery()
+
+    rollup = rollup_model.MovementDailyRollup
+    def rollup_points(at, quantity, *conditions):
+        filters = [rollup.product_id == product_id, *conditions]
+        if start is not None:
+            filters.append(at >= start)
+        if end is not None:
+            filters.append(at <= end)
+        return db.query(at, quantity, null()).filter(*filters)
+    return ledger.union_all(
+        rollup_points(rollup.last_at, rollup.closing_quantity),
+        rollup_points(rollup.min_at, rollup.min_quantity, rollup.min_at != rollup.last_at),
+        rollup_points(
+            rollup.max_at, rollup.max_quantity, rollup.max_at != rollup.last_at, rollup.max_at != rollup.min_at
+        ),
+    ).subquery()
+
+def epoch_seconds(db: Session, column):
+    """SQL expression for a timestamp column as (fractional) seconds since the Unix epoch."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.extract("epoch", column)
+    return (func.julianday(column) - 2440587.5) * 86400.0
 
-    # Format the data for the chart
+def get_product_historical_data(
+    db: Session,
+    product_id: uuid.UUID,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    max_points: int = 1000,
+    resolution: str | None = None,
+    mode: str = "last"
+):
+    """
+    Stock level series of a product's completed movements in [start, end], at most
+    `max_points` points whatever the history length. Short histories come back raw;
+    longer ones, or any request with a `resolution`, are downsampled in SQL into
+    equal-width time buckets at least `resolution` wide, keeping per bucket either the
+    last movement ("last") or the movements with the lowest and highest level ("minmax",
+    two points per bucket, which keeps spikes visible the way LTTB-style chart
+    downsampling does). Archived days are read from their rollups, so before the archive
+    horizon the series has at most day resolution.
+    """
+    start, end = as_utc(start), as_utc(end)
+    source = _historical_source(db, product_id, start, end)
+    first_at, last_at, row_count = db.query(
+        func.min(source.c.created_at),
+        func.max(source.c.created_at),
+        func.count()
+    ).one()
+
+    if row_count == 0:
+        return []
+    if row_count <= max_points and resolution is None:
+        movements = db.query(
+            source.c.created_at,
+            source.c.new_quantity_on_hand
+        ).order_by(source.c.created_at.asc()).all()
+        # Format the data for the chart
+        return [
+            {"timestamp": created_at, "quantity": quantity}
+            for created_at, quantity in movements
+        ]
+
+    # Buckets are aligned to HISTORY_BUCKET_ANCHOR, so day buckets start at midnight UTC
+    # and week buckets on Monday. A span of (n - 1) bucket widths touches at most n buckets.
+    bucket_count = max(1, max_points // 2 if mode == "minmax" else max_points)
+    span_seconds = (as_utc(last_at) - as_utc(first_at)).total_seconds()
+    bucket_seconds = max(
+        HISTORY_RESOLUTIONS.get(resolution, 0),
+        math.ceil(span_seconds / max(bucket_count - 1, 1)),
+        1
+    )
+    bucket = history_bucket(db, source.c.created_at, bucket_seconds)
+    if mode == "minmax":
+        ranks = [
+            func.row_number().over(partition_by=bucket, order_by=(
+                source.c.new_quantity_on_hand.asc(),
+                source.c.created_at.asc()
+            )),
+            func.row_number().over(partition_by=bucket, order_by=(
+                source.c.new_quantity_on_hand.desc(),
+                source.c.created_at.asc()
+            )),
+        ]
+    else:
+        ranks = [
+            func.row_number().over(partition_by=bucket, order_by=(
+                source.c.created_at.desc(),
+                source.c.id.desc()
+            )),
+        ]
+    ranked = db.query(
+        source.c.created_at,
+        source.c.new_quantity_on_hand,
+        *(rank.label(f"rank_{index}") for index, rank in enumerate(ranks))
+    ).subquery()
+    movements = db.query(
+        ranked.c.created_at, ranked.c.new_quantity_on_hand
+    ).filter(
+        or_(*(ranked.c[f"rank_{index}"] == 1 for index in range(len(ranks))))
+    ).order_by(ranked.c.created_at.asc()).all()
     return [
-        {"timestamp": move.created_at, "quantity": move.new_quantity_on_hand}
-        for move in movements
+        {"timestamp": created_at, "quantity": quantity}
+        for created_at, quantity in movements
     ]
 
+def iter_product_historical_data(
+    product_id: uuid.UUID, start: datetime | None = None, end: datetime | None = None, batch_size: int = 5000
+):
+    """
+    Yields every completed movement in range (for archived days, their rollup points) as
+    JSON array text chunks, read through a server-side cursor. Opens its own session: it
+    runs while the response streams.
+    """
+    start, end = as_utc(start), as_utc(end)
+    with SessionLocal() as db:
+        source = _historical_source(db, product_id, start, end)
+        result = db.execute(
+            db.query(
+                source.c.created_at,
+                source.c.new_quantity_on_hand
+            ).order_by(source.c.created_at.asc()).statement,
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        separator = "["
+        for partition in result.partitions():
+            yield separator + ",".join(
+                json.dumps({"timestamp": created_at.isoformat(), "quantity": quantity})
+                for created_at, quantity in partition
+            )
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+def _get_sales_watermark(db: Session, product_id: uuid.UUID):
+    """Latest sale timestamp and number of sales for a product; changes whenever a sale is recorded."""
+    latest_sale, sale_count = db.query(
+        func.max(inventory_model.InventoryMovement.created_at),
+        func.count(inventory_model.InventoryMovement.id)
+    ).filter(
+        inventory_model.InventoryMovement.product_id == product_id,
+        inventory_model.InventoryMovement.is_sale
+    ).one()
+    return (latest_sale, sale_count)
+
 def get_product_demand_forecast(db: Session, product_id: uuid.UUID):
-    try:
-        sales_movements = db.query(inventory_model.InventoryMovement).filter(
-            inventory_model.InventoryMovement.product_id == product_id,
-            inventory_model.InventoryMovement.change_quantity < 0
-        ).order_by(inventory_model.InventoryMovement.created_at.asc()).all()
+    watermark = _get_sales_watermark(db, product_id)
+    cached = _forecast_cache.get(product_id)
+    if cached is not None and cached[0] == watermark:
+        return cached[1]
+
+    forecast_data = _fit_product_demand_forecast(db, product_id)
+    if forecast_data is not None:
+        _forecast_cache.set(product_id, (watermark, forecast_data))
+        return forecast_data
+    return []
+
+def _sales_source(db: Session, product_ids, bucket: str):
+    """
+    The products' sales as a (product_id, sold_at, quantity) subquery. Archived days take
+    part with their daily totals from the rollups, dated at midnight, except in hourly
+    series, which they are too coarse for.
+    """
+    movement = inventory_model.InventoryMovement
+    sales = db.query(
+        movement.product_id.label("product_id"),
+        movement.created_at.label("sold_at"),
+        (-movement.change_quantity).label("quantity")
+    ).filter(
+        movement.product_id.in_(product_ids),
+        movement.is_sale
+    )
+    if bucket == "hour" or crud_ledger.archive_horizon(db) is None:
+        return sales.subquery()
+    rollup = rollup_model.MovementDailyRollup
+    return sales.union_all(
+        db.query(rollup.product_id, rollup.day, rollup.sales_quantity).filter(
+            rollup.product_id.in_(product_ids), rollup.sales_quantity > 0
+        )
+    ).subquery()
+
+def load_demand_series(db: Session, product_ids, bucket: str):
+    """
+    Loads the bucketed demand of several products in one aggregated query, grouped per
+    product: {product_id: (bucket_starts, demand)}.
+    """
+    series = {product_id: ([], []) for product_id in product_ids}
+    source = _sales_source(db, product_ids, bucket)
+    bucket_start = time_bucket(db, source.c.sold_at, bucket).label("bucket_start")
+    demand = db.query(
+        source.c.product_id,
+        bucket_start,
+        func.sum(source.c.quantity)
+    ).group_by(
+        source.c.product_id, bucket_start
+    ).order_by(bucket_start)
+    for product_id, start, quantity in demand:
+        series[product_id][0].append(start)
+        series[product_id][1].append(quantity)
+    return series
+
+def _get_sales_watermarks(db: Session, product_ids):
+    """_get_sales_watermark for several products in one query; (None, 0) for products without sales."""
+    watermarks = {product_id: (None, 0) for product_id in product_ids}
+    rows = db.query(
+        inventory_model.InventoryMovement.product_id,
+        func.max(inventory_model.InventoryMovement.created_at),
+        func.count(inventory_model.InventoryMovement.id)
+    ).filter(
+        inventory_model.InventoryMovement.product_id.in_(product_ids),
+        inventory_model.InventoryMovement.is_sale
+    ).group_by(inventory_model.InventoryMovement.product_id)
+    for product_id, latest_sale, sale_count in rows:
+        watermarks[product_id] = (latest_sale, sale_count)
+    return watermarks
+
+def prepare_forecast_batch(db: Session, product_ids: list[uuid.UUID]):
+    """
+    Database side of a batch forecast, in a handful of queries for the whole batch.
+    Returns (ready, fits): `ready` holds the items that need no fit (unknown products,
+    stored forecasts, fits still in this process's cache, histories too short to fit) and
+    `fits` maps each remaining product to (watermark, bucket_starts, demand).
+    Products are answered the way GET /analytics/forecast/{product_id} answers them.
+    """
+    existing = {
+        product_id for (product_id,) in db.query(product_model.Product.id).filter(
+            product_model.Product.id.in_(product_ids), product_model.Product.is_deleted == False
+        )
+    }
+    ready = [
+        {"product_id": product_id, "status": "not_found", "detail": "Product not found"}
+        for product_id in product_ids if product_id not in existing
+    ]
+    remaining = [product_id for product_id in product_ids if product_id in existing]
+
+    stored = {
+        forecast.product_id: forecast for forecast in db.query(forecast_model.ProductForecast).filter(
+            forecast_model.ProductForecast.product_id.in_(remaining)
+        )
+    }
+    for product_id in remaining:
+        if product_id in stored:
+            ready.append({
+                "product_id": product_id, "status": "ok", "source": "stored",
+                "computed_at": stored[product_id].computed_at, "points": stored[product_id].points
+            })
+    remaining = [product_id for product_id in remaining if product_id not in stored]
+
+    watermarks = _get_sales_watermarks(db, remaining)
+    to_fit = []
+    for product_id in remaining:
+        cached = _forecast_cache.get(product_id)
+        if cached is not None and cached[0] == watermarks[product_id]:
+            ready.append({"product_id": product_id, "status": "ok", "source": "cache", "points": cached[1]})
+        else:
+            to_fit.append(product_id)
+
+    series = load_demand_series(db, to_fit, settings.FORECAST_BUCKET) if to_fit else {}
+    fits = {}
+    for product_id in to_fit:
+        bucket_starts, demand = series[product_id]
+        if len(bucket_starts) < 2:
+            ready.append({"product_id": product_id, "status": "ok", "source": "fitted", "points": []})
+        else:
+            fits[product_id] = (watermarks[product_id], bucket_starts, demand)
+    return ready, fits
+
+def cache_fitted_forecast(product_id: uuid.UUID, watermark, points):
+    """Keeps a forecast fitted outside get_product_demand_forecast for its next callers."""
+    _forecast_cache.set(product_id, (watermark, points))
+
+# pandas frequency and number of forecast periods per bucket size: the buckets that start
+# within 30 days of the last observed one (4 for weeks, whose fifth would start on day 35)
+_BUCKET_FREQUENCIES = {"hour": ("h", 30 * 24), "day": ("D", 30), "week": ("W-MON", 30 // 7)}
+
+def history_bucket(db: Session, column, bucket_seconds: int):
+    """
+    SQL expression numbering the bucket_seconds wide buckets, aligned to
+    HISTORY_BUCKET_ANCHOR, that a timestamp column falls in. Floored before the cast:
+    PostgreSQL rounds a numeric cast to integer, SQLite truncates.
+    """
+    return cast(func.floor((epoch_seconds(db, column) - HISTORY_BUCKET_ANCHOR) / bucket_seconds), Integer)
+
+def time_bucket(db: Session, column, bucket: str):
+    """SQL expression truncating a timestamp column to the start of its hour, day or week."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(bucket, column)
+    # SQLite has no date_trunc; weeks start on Monday like PostgreSQL's
+    if bucket == "hour":
+        return func.strftime('%Y-%m-%d %H:00:00', column)
+    if bucket == "week":
+        return func.strftime('%Y-%m-%d 00:00:00', column, 'weekday 0', '-6 days')
+    return func.strftime('%Y-%m-%d 00:00:00', column)
 
-        if len(sales_movements) < 2:
+def _fit_product_demand_forecast(db: Session, product_id: uuid.UUID):
+    """Fits Prophet on the product's bucketed sales history. Returns None if fitting failed."""
+    bucket = settings.FORECAST_BUCKET
+    # Aggregated in SQL so only one row per bucket leaves the database
+    bucket_starts, demand = load_demand_series(db, [product_id], bucket)[product_id]
+    return fit_demand_forecast(bucket_starts, demand, bucket)
+
+def fit_demand_forecast(bucket_starts: list, demand: list, bucket: str = "day"):
+    """
+    Fits Prophet on a demand series (units sold per bucket) and returns the 30-day forecast
+    points. Buckets without sales are filled with zero first. Takes plain lists so it can
+    also run in a worker process. Returns None if fitting failed.
+    """
+    import pandas as pd
+    from prophet import Prophet
+
+    try:
+        if len(bucket_starts) < 2:
             return []
 
-        # Prophet needs a DataFrame with 'ds' (datestamp) and 'y' (value)
-        history_df = pd.DataFrame([
-            {'ds': move.created_at, 'y': abs(move.change_quantity)}
-            for move in sales_movements
-        ])
+        frequency, horizon = _BUCKET_FREQUENCIES[bucket]
 
-        # Ensure 'ds' is timezone-naive for Prophet
-        history_df['ds'] = pd.to_datetime(history_df['ds']).dt.tz_localize(None)
+        # Prophet needs a DataFrame with 'ds' (datestamp) and 'y' (value)
+        history = pd.Series(
+            demand,
+            # Ensure 'ds' is timezone-naive for Prophet
+            index=pd.to_datetime(pd.Series(bucket_starts)).dt.tz_localize(None),
+            dtype="float64"
+        )
+        history = history.groupby(level=0).sum()
+        full_range = pd.date_range(history.index[0], history.index[-1], freq=frequency)
+        history_df = pd.DataFrame({
+            'ds': full_range,
+            'y': history.reindex(full_range, fill_value=0.0).to_numpy()
+        })
 
         model = Prophet()
-        model.fit(history_df)
+        with metrics.span("prophet_fit"):
+            model.fit(history_df)
         
-        future = model.make_future_dataframe(periods=30)
-        forecast = model.predict(future)
+        future = model.make_future_dataframe(periods=horizon, freq=frequency)
+        with metrics.span("prophet_predict"):
+            forecast = model.predict(future)
         
-        return [
-            {'timestamp': row['ds'], 'quantity': round(row['yhat'])}
-            for index, row in forecast.iterrows() if row['yhat'] >= 0
-        ]
-    except Exception as e:
-        print(f"Prophet forecasting failed: {e}")
-        return []
-    
+        return _forecast_points(forecast)
+    except Exception:
+        logger.exception("Prophet forecasting failed (%d buckets)", len(bucket_starts))
+        return None
     
+def _forecast_points(forecast):
+    """Shapes Prophet's output into response points, dropping negative predictions."""
+    import numpy as np
+    import pandas as pd
+
+    yhat = forecast['yhat'].to_numpy()
+    keep = yhat >= 0
+    timestamps = pd.DatetimeIndex(forecast['ds'].to_numpy()[keep]).to_pydatetime()
+    quantities = np.rint(yhat[keep]).astype(np.int64)
+    return [
+        {'timestamp': timestamp, 'quantity': quantity}
+        for timestamp, quantity in zip(timestamps.tolist(), quantities.tolist())
+    ]
+
+def get_stored_product_forecast(db: Session, product_id: uuid.UUID):
+    """Returns the forecast precomputed by the background refresh job, if there is one."""
+    return db.query(forecast_model.ProductForecast).filter(
+        forecast_model.ProductForecast.product_id == product_id
+    ).first()
+
 def get_product_scheduled_data(db: Session, product_id: uuid.UUID):
-    movements = db.query(inventory_model.InventoryMovement).filter(
+    movements = db.query(
+        inventory_model.InventoryMovement.scheduled_for,
+        inventory_model.InventoryMovement.new_quantity_on_hand
+    ).filter(
         inventory_model.InventoryMovement.product_id == product_id,
         # ONLY FETCH SCHEDULED
         inventory_model.InventoryMovement.status == 'SCHEDULED'
-    ).order_by(inventory_model.InventoryMovement.created_at.asc()).all()
+    ).order_by(inventory_model.InventoryMovement.scheduled_for.asc()).all()
     return [
-        {"timestamp": move.created_at, "quantity": move.new_quantity_on_hand}
-        for move in movements
+        {"timestamp": scheduled_for, "quantity": quantity}
+        for scheduled_for, quantity in movements
     ]
 
-def _find_anomalies_in_movements(movements: list):
-    """Helper function that takes a list of movement objects and returns the anomalous ones."""
-    if len(movements) < 10:
-        return []
+# Columns loaded for anomaly detection, in query order
+_ANOMALY_COLUMNS = ['id', 'product_id', 'product_name', 'change_quantity', 'reason', 'created_at']
+
+def _movement_columns():
+    return (
+        inventory_model.InventoryMovement.id,
+        inventory_model.InventoryMovement.product_id,
+        product_model.Product.name,
+        inventory_model.InventoryMovement.change_quantity,
+        inventory_model.InventoryMovement.reason,
+        inventory_model.InventoryMovement.created_at,
+    )
+
+def _find_anomalies_in_movements(change_quantity, created_at):
+    """
+    Helper function that takes the change quantities and timestamps of a set of movements
+    and returns a boolean mask flagging the anomalous ones.
+    """
+    import numpy as np
+    from sklearn.ensemble import IsolationForest
+
+    if len(change_quantity) < 10:
+        return np.zeros(len(change_quantity), dtype=bool)
 
-    df_for_model = pd.DataFrame([
-        {
-            'change_quantity': move.change_quantity,
-            'hour_of_day': move.created_at.hour,
-            'day_of_week': move.created_at.weekday(),
-        } for move in movements
-    ])
-    features = ['change_quantity', 'hour_of_day', 'day_of_week']
     model = IsolationForest(contamination='auto', random_state=42)
-    predictions = model.fit_predict(df_for_model[features])
-    anomalies = [movements[i] for i, pred in enumerate(predictions) if pred == -1]
-    return anomalies
+    with metrics.span("isolation_forest_fit"):
+        predictions = model.fit_predict(anomaly_features(change_quantity, created_at))
+    return predictions == -1
+
+def anomaly_features(change_quantity, created_at):
+    """IsolationForest feature matrix: change quantity, hour of day and day of week."""
+    import numpy as np
+    import pandas as pd
+
+    created_at = pd.DatetimeIndex(pd.to_datetime(created_at, utc=True))
+    return np.column_stack((
+        np.asarray(change_quantity, dtype=np.int64),
+        created_at.hour.to_numpy(),
+        created_at.dayofweek.to_numpy(),
+    ))
+
+def _anomaly_response(movements):
+    """Runs detection over a column-tuple query result and shapes the flagged rows for the API."""
+    import pandas as pd
+
+    if not movements:
+        return []
+    frame = pd.DataFrame.from_records(movements, columns=_ANOMALY_COLUMNS)
+    is_anomaly = _find_anomalies_in_movements(frame['change_quantity'].to_numpy(), frame['created_at'])
+    anomalies = frame.loc[is_anomaly, ['id', 'product_id', 'product_name', 'change_quantity', 'reason']]
+    anomalies['product_name'] = anomalies['product_name'].fillna("Unknown")
+    # Keep the simple string date the clients display
+    anomalies['event_date'] = pd.DatetimeIndex(
+        pd.to_datetime(frame.loc[is_anomaly, 'created_at'], utc=True)
+    ).strftime('%Y-%m-%d %H:%M')
+    anomalies['reason'] = anomalies['reason'].astype(object).where(anomalies['reason'].notna(), None)
+    return anomalies.to_dict('records')
 
 # --- These two functions perform the data transformation ---
 def get_anomalous_movements(db: Session):
-    # This query now JOINS the two tables to get the product name
-    movements = db.query(
-        inventory_model.InventoryMovement, product_model.Product.name
-    ).join(
+    # This query JOINS the two tables to get the product name and loads plain column tuples
+    movements = db.query(*_movement_columns()).join(
         product_model.Product, inventory_model.InventoryMovement.product_id == product_model.Product.id
     ).order_by(inventory_model.InventoryMovement.created_at.desc()).all()
 
-    # The movements list now contains tuples: (movement_object, product_name)
-    all_movement_objects = [move[0] for move in movements]
-    anomalous_movement_objects = _find_anomalies_in_movements(all_movement_objects)
-    
-    # Create a mapping for easy lookup
-    movement_to_name_map = {move[0].id: move[1] for move in movements}
+    return _anomaly_response(movements)
+
+def get_stored_anomalies(
+    db: Session,
+    detector: str = "global",
+    product_id: uuid.UUID | None = None,
+    skip: int = 0,
+    limit: int = 100
+):
+    """A newest-first page of the anomalies persisted by the background scan (jobs/anomaly_refresh.py)."""
+    query = db.query(
+        anomaly_model.MovementAnomaly, product_model.Product.name
+    ).outerjoin(
+        product_model.Product, anomaly_model.MovementAnomaly.product_id == product_model.Product.id
+    ).filter(
+        anomaly_model.MovementAnomaly.detector == detector
+    )
+    if product_id is not None:
+        query = query.filter(anomaly_model.MovementAnomaly.product_id == product_id)
+    anomalies = query.order_by(
+        anomaly_model.MovementAnomaly.created_at.desc()
+    ).offset(skip).limit(limit).all()
 
-    # Manually build the response with the simple string date
     return [
         {
-            "id": move.id, "product_id": move.product_id,
-            "product_name": movement_to_name_map.get(move.id, "Unknown"),
-            "change_quantity": move.change_quantity, "reason": move.reason,
-            "event_date": move.created_at.strftime('%Y-%m-%d %H:%M')
+            "id": anomaly.movement_id, "product_id": anomaly.product_id,
+            "product_name": product_name or "Unknown",
+            "change_quantity": anomaly.change_quantity, "reason": anomaly.reason,
+            "event_date": anomaly.created_at.strftime('%Y-%m-%d %H:%M')
         }
-        for move in anomalous_movement_objects
+        for anomaly, product_name in anomalies
     ]
 
-def get_anomalies_for_product(db: Session, product_id: uuid.UUID):
-    movements = db.query(inventory_model.InventoryMovement).filter(
-        inventory_model.InventoryMovement.product_id == product_id
-    ).order_by(inventory_model.InventoryMovement.created_at.desc()).all()
-    
-    anomalous_movements = _find_anomalies_in_movements(movements)
-    
-    # Manually build the response here as well
-    product_name = db.query(product_model.Product.name).filter(product_model.Product.id == product_id).scalar()
-    return [
-        {
-            "id": move.id, "product_id": move.product_id,
-            "product_name": product_name,
-            "change_quantity": move.change_quantity, "reason": move.reason,
-            "event_date": move.created_at.strftime('%Y-%m-%d %H:%M')
-        }
-        for move in anomalous_movements
-    ]
\ No newline at end of file
+def get_anomalies_for_product(db: Session, product_id: uuid.UUID, skip: int = 0, limit: int = 100):
+    # Flags written by the product's own stored model; nothing is refitted on request
+    return get_stored_anomalies(db, detector="product", product_id=product_id, skip=skip, limit=limit)
@@ -1,8 +1,28 @@
 # backend/crud/crud_inventory.py
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 from models import product as product_model, inventory as inventory_model
-from schemas import inventory as inventory_schema
+from schemas import inventory as inventory_schema, product as product_schema
+from crud import crud_stats
+import stock_events
+import response_cache
+from ids import uuid7
 import uuid
+from datetime import datetime, timedelta, timezone
+
+def _lock_products(db: Session, product_ids):
+    """
+    Lock the given product rows with SELECT ... FOR UPDATE and return them keyed by id.
+    Rows are always locked in ascending id order, so two batches touching the same
+    products acquire their locks in the same sequence and cannot deadlock.
+    """
+    unique_ids = sorted(set(product_ids))
+    if not unique_ids:
+        return {}
+    db_products = db.query(product_model.Product).filter(
+        product_model.Product.id.in_(unique_ids)
+    ).order_by(product_model.Product.id.asc()).with_for_update().all()
+    return {db_product.id: db_product for db_product in db_products}
 
 def create_inventory_movement(db: Session, movement: inventory_schema.InventoryMovementCreate, user_id: uuid.UUID):
     # Get the product and lock the row for update
@@ -13,7 +33,12 @@ def create_inventory_movement(db: Session, movement: inventory_schema.InventoryM
     if not db_product:
         return None
 
+    was_low_stock = crud_stats.is_low_stock(db_product)
     db_product.quantity_on_hand += movement.change_quantity
+    # Only movements that cross the reorder point change the low-stock count
+    low_stock_delta = int(crud_stats.is_low_stock(db_product)) - int(was_low_stock)
+    crud_stats.adjust_stock_stats(db, low_stock_delta=low_stock_delta)
+    events = [stock_events.threshold_event(db_product)] if low_stock_delta else []
 
     # Create the movement log record
     db_movement = inventory_model.InventoryMovement(
@@ -28,5 +53,249 @@ def create_inventory_movement(db: Session, movement: inventory_schema.InventoryM
     db.add(db_movement)
     db.add(db_product)
     db.commit()
+    stock_events.publish(events)
     db.refresh(db_product)
-    return db_product
\ No newline at end of file
+    response_cache.invalidate_products([db_product.id])
+    return db_product
+
+def _plan_combined_movements(db_product, entries):
+    """
+    Applies the (movement, user_id) entries of one locked product in arrival order and
+    returns (movement_rows, levels, low_stock_delta, events), with `levels` holding each
+    entry's new_quantity_on_hand.
+    """
+    was_low_stock = crud_stats.is_low_stock(db_product)
+    # Offset by a microsecond each, like a batch, so the ledger keeps the arrival order
+    batch_started_at = datetime.now(timezone.utc)
+    movement_rows = []
+    levels = []
+    for index, (movement, user_id) in enumerate(entries):
+        db_product.quantity_on_hand += movement.change_quantity
+        levels.append(db_product.quantity_on_hand)
+        movement_rows.append({
+            "id": uuid7(),
+            "product_id": db_product.id,
+            "user_id": user_id,
+            "change_quantity": movement.change_quantity,
+            "new_quantity_on_hand": db_product.quantity_on_hand,
+            "reason": movement.reason,
+            "status": 'COMPLETED',
+            "created_at": batch_started_at + timedelta(microseconds=index)
+        })
+    # Only a net crossing of the reorder point counts, as for a batch
+    low_stock_delta = int(crud_stats.is_low_stock(db_product)) - int(was_low_stock)
+    events = [stock_events.threshold_event(db_product)] if low_stock_delta else []
+    return movement_rows, levels, low_stock_delta, events
+
+def _combined_results(db_product, levels):
+    product = product_schema.Product.model_validate(db_product)
+    return [product.model_copy(update={"quantity_on_hand": level}) for level in levels]
+
+def apply_combined_movements(db: Session, entries):
+    """
+    Applies single movements on one product that the write combiner collected, as
+    (movement, user_id) entries in arrival order, under one row lock and one commit.
+    Returns one product per entry showing the stock right after that entry's movement, or
+    None if the product does not exist.
+    """
+    db_product = db.query(product_model.Product).filter(
+        product_model.Product.id == entries[0][0].product_id
+    ).with_for_update().first()
+    if not db_product:
+        return None
+
+    movement_rows, levels, low_stock_delta, events = _plan_combined_movements(db_product, entries)
+    db.execute(insert(inventory_model.InventoryMovement), movement_rows)
+    crud_stats.adjust_stock_stats(db, low_stock_delta=low_stock_delta)
+    db.commit()
+    stock_events.publish(events)
+    db.refresh(db_product)
+    response_cache.invalidate_products([db_product.id])
+    return _combined_results(db_product, levels)
+
+def _plan_movements(
+    locked_products: dict,
+    movements: list[inventory_schema.InventoryMovementCreate],
+    user_id: uuid.UUID
+):
+    """
+    Applies the movements to the locked products in request order and returns
+    (results, movement_rows, low_stock_delta, events) for the caller to insert and commit;
+    `events` are the threshold crossings to publish after the commit.
+    """
+    was_low_stock = {
+        product_id: crud_stats.is_low_stock(db_product) for product_id, db_product in locked_products.items()
+    }
+
+    # Rows in one batch would otherwise share a single transaction timestamp; offsetting
+    # them by a microsecond each keeps the ledger ordered the way it was applied.
+    batch_started_at = datetime.now(timezone.utc)
+
+    results = []
+    movement_rows = []
+    for index, movement in enumerate(movements):
+        db_product = locked_products.get(movement.product_id)
+        if db_product is None:
+            results.append({
+                "index": index, "product_id": movement.product_id, "status": "not_found",
+                "movement_id": None, "new_quantity_on_hand": None
+            })
+            continue
+
+        db_product.quantity_on_hand += movement.change_quantity
+        movement_id = uuid7()
+        movement_rows.append({
+            "id": movement_id,
+            "product_id": movement.product_id,
+            "user_id": user_id,
+            "change_quantity": movement.change_quantity,
+            "new_quantity_on_hand": db_product.quantity_on_hand,
+            "reason": movement.reason,
+            "status": 'COMPLETED',
+            "created_at": batch_started_at + timedelta(microseconds=index)
+        })
+        results.append({
+            "index": index, "product_id": movement.product_id, "status": "applied",
+            "movement_id": movement_id, "new_quantity_on_hand": db_product.quantity_on_hand
+        })
+
+    crossed = [
+        db_product for product_id, db_product in locked_products.items()
+        if crud_stats.is_low_stock(db_product) != was_low_stock[product_id]
+    ]
+    low_stock_delta = sum(1 if crud_stats.is_low_stock(db_product) else -1 for db_product in crossed)
+    events = [stock_events.threshold_event(db_product) for db_product in crossed]
+    return results, movement_rows, low_stock_delta, events
+
+def create_inventory_movements(
+    db: Session,
+    movements: list[inventory_schema.InventoryMovementCreate],
+    user_id: uuid.UUID
+):
+    """
+    Apply a batch of movements in a single transaction.
+
+    Every affected product is locked once, the movements are applied in request order
+    so each row records the correct running `new_quantity_on_hand`, the movement rows
+    are bulk-inserted and the whole batch is committed once. Returns one result per
+    input movement, in the same order.
+    """
+    locked_products = _lock_products(db, [movement.product_id for movement in movements])
+    results, movement_rows, low_stock_delta, events = _plan_movements(locked_products, movements, user_id)
+    if movement_rows:
+        db.execute(insert(inventory_model.InventoryMovement), movement_rows)
+    crud_stats.adjust_stock_stats(db, low_stock_delta=low_stock_delta)
+    db.commit()
+    stock_events.publish(events)
+    response_cache.invalidate_products(locked_products)
+    return results
+
+def schedule_inventory_movement(
+    db: Session, movement: inventory_schema.InventoryMovementSchedule, user_id: uuid.UUID
+):
+    """
+    Records a movement to be applied at `scheduled_for` by the scheduler job. Its
+    new_quantity_on_hand holds the projected level: the current stock plus every change
+    scheduled up to that time. Returns None if the product does not exist.
+    """
+    db_product = db.query(product_model.Product).filter(
+        product_model.Product.id == movement.product_id,
+        product_model.Product.is_deleted == False
+    ).first()
+    if db_product is None:
+        return None
+    # In UTC and in the future (see InventoryMovementSchedule)
+    scheduled_for = movement.scheduled_for
+    pending_change = db.query(
+        func.coalesce(func.sum(inventory_model.InventoryMovement.change_quantity), 0)
+    ).filter(
+        inventory_model.InventoryMovement.product_id == movement.product_id,
+        inventory_model.InventoryMovement.status == 'SCHEDULED',
+        inventory_model.InventoryMovement.scheduled_for <= scheduled_for
+    ).scalar()
+    db_movement = inventory_model.InventoryMovement(
+        product_id=movement.product_id,
+        user_id=user_id,
+        change_quantity=movement.change_quantity,
+        new_quantity_on_hand=db_product.quantity_on_hand + pending_change + movement.change_quantity,
+        reason=movement.reason,
+        status='SCHEDULED',
+        scheduled_for=scheduled_for
+    )
+    db.add(db_movement)
+    db.commit()
+    db.refresh(db_movement)
+    # The projected series (/analytics/scheduled) changed
+    response_cache.invalidate_products([db_movement.product_id])
+    return db_movement
+
+def cancel_scheduled_movement(db: Session, movement_id: uuid.UUID):
+    """Cancels a movement that has not been applied yet. Returns None if there is none."""
+    db_movement = db.query(inventory_model.InventoryMovement).filter(
+        inventory_model.InventoryMovement.id == movement_id,
+        inventory_model.InventoryMovement.is_scheduled
+    ).with_for_update().first()
+    if db_movement is None:
+        return None
+    db_movement.status = 'CANCELLED'
+    db.commit()
+    db.refresh(db_movement)
+    # The projected series (/analytics/scheduled) changed
+    response_cache.invalidate_products([db_movement.product_id])
+    return db_movement
+
+def apply_due_movements(db: Session, batch_size: int, now: datetime | None = None):
+    """
+    Applies up to `batch_size` scheduled movements that are due, oldest first, in one
+    transaction, and returns how many were applied.
+
+    The due rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL), so
+    several scheduler processes take disjoint batches instead of waiting on each other.
+    Their products are then locked in id order like any other batch, the quantities are
+    applied in schedule order, and the rows flip to COMPLETED with the actual resulting
+    level in new_quantity_on_hand. Their created_at becomes the time they were applied,
+    like any movement recorded now, so the ledger stays in time order for the series,
+    the checkpoints and the anomaly scan; scheduled_for keeps the requested time.
+    """
+    now = now or datetime.now(timezone.utc)
+    due = db.query(
+        inventory_model.InventoryMovement.id,
+        inventory_model.InventoryMovement.product_id,
+        inventory_model.InventoryMovement.change_quantity
+    ).filter(
+        inventory_model.InventoryMovement.is_scheduled,
+        inventory_model.InventoryMovement.scheduled_for <= now
+    ).order_by(
+        inventory_model.InventoryMovement.scheduled_for.asc(), inventory_model.InventoryMovement.id.asc()
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not due:
+        db.rollback()
+        return 0
+
+    locked_products = _lock_products(db, [product_id for _, product_id, _ in due])
+    was_low_stock = {
+        product_id: crud_stats.is_low_stock(db_product) for product_id, db_product in locked_products.items()
+    }
+    applied_at = datetime.now(timezone.utc)
+    applied = []
+    for movement_id, product_id, change_quantity in due:
+        db_product = locked_products[product_id]
+        db_product.quantity_on_hand += change_quantity
+        applied.append({
+            "id": movement_id, "status": 'COMPLETED', "created_at": applied_at,
+            "new_quantity_on_hand": db_product.quantity_on_hand
+        })
+    # Bulk UPDATE by primary key, one statement for the whole batch
+    db.execute(update(inventory_model.InventoryMovement), applied)
+    crossed = [
+        db_product for product_id, db_product in locked_products.items()
+        if crud_stats.is_low_stock(db_product) != was_low_stock[product_id]
+    ]
+    crud_stats.adjust_stock_stats(db, low_stock_delta=sum(
+        1 if crud_stats.is_low_stock(db_product) else -1 for db_product in crossed
+    ))
+    events = [stock_events.threshold_event(db_product) for db_product in crossed]
+    db.commit()
+    stock_events.publish(events)
+    response_cache.invalidate_products(locked_products)
+    return len(applied)
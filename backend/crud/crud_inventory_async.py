@@ -0,0 +1,102 @@
+# backend/crud/crud_inventory_async.py
+# AsyncSession versions of crud_inventory, used by the async routes (DB_ASYNC_MODE).
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import product as product_model, inventory as inventory_model
+from schemas import inventory as inventory_schema
+from crud import crud_stats
+import stock_events
+import response_cache
+from crud.crud_inventory import _combined_results, _plan_combined_movements, _plan_movements
+import uuid
+
+async def _lock_products(db: AsyncSession, product_ids):
+    """
+    Lock the given product rows with SELECT ... FOR UPDATE in ascending id order and
+    return them keyed by id (see crud_inventory._lock_products).
+    """
+    unique_ids = sorted(set(product_ids))
+    if not unique_ids:
+        return {}
+    db_products = (await db.scalars(
+        select(product_model.Product).where(
+            product_model.Product.id.in_(unique_ids)
+        ).order_by(product_model.Product.id.asc()).with_for_update()
+    )).all()
+    return {db_product.id: db_product for db_product in db_products}
+
+async def create_inventory_movement(
+    db: AsyncSession, movement: inventory_schema.InventoryMovementCreate, user_id: uuid.UUID
+):
+    # Get the product and lock the row for update
+    db_product = await db.scalar(
+        select(product_model.Product).where(
+            product_model.Product.id == movement.product_id
+        ).with_for_update()
+    )
+
+    if not db_product:
+        return None
+
+    was_low_stock = crud_stats.is_low_stock(db_product)
+    db_product.quantity_on_hand += movement.change_quantity
+    # Only movements that cross the reorder point change the low-stock count
+    low_stock_delta = int(crud_stats.is_low_stock(db_product)) - int(was_low_stock)
+    await crud_stats.adjust_stock_stats_async(db, low_stock_delta=low_stock_delta)
+    events = [stock_events.threshold_event(db_product)] if low_stock_delta else []
+
+    # Create the movement log record
+    db_movement = inventory_model.InventoryMovement(
+        product_id=movement.product_id,
+        user_id=user_id,
+        change_quantity=movement.change_quantity,
+        new_quantity_on_hand=db_product.quantity_on_hand,
+        reason=movement.reason,
+        status='COMPLETED'
+    )
+
+    db.add(db_movement)
+    db.add(db_product)
+    await db.commit()
+    stock_events.publish(events)
+    await db.refresh(db_product)
+    await response_cache.invalidate_products_async([db_product.id])
+    return db_product
+
+async def apply_combined_movements(db: AsyncSession, entries):
+    """Applies the combined single movements of one product; see crud_inventory.apply_combined_movements."""
+    db_product = await db.scalar(
+        select(product_model.Product).where(
+            product_model.Product.id == entries[0][0].product_id
+        ).with_for_update()
+    )
+    if not db_product:
+        return None
+
+    movement_rows, levels, low_stock_delta, events = _plan_combined_movements(db_product, entries)
+    await db.execute(insert(inventory_model.InventoryMovement), movement_rows)
+    await crud_stats.adjust_stock_stats_async(db, low_stock_delta=low_stock_delta)
+    await db.commit()
+    stock_events.publish(events)
+    await db.refresh(db_product)
+    await response_cache.invalidate_products_async([db_product.id])
+    return _combined_results(db_product, levels)
+
+async def create_inventory_movements(
+    db: AsyncSession,
+    movements: list[inventory_schema.InventoryMovementCreate],
+    user_id: uuid.UUID
+):
+    """
+    Apply a batch of movements in a single transaction; see
+    crud_inventory.create_inventory_movements.
+    """
+    locked_products = await _lock_products(db, [movement.product_id for movement in movements])
+    results, movement_rows, low_stock_delta, events = _plan_movements(locked_products, movements, user_id)
+    if movement_rows:
+        await db.execute(insert(inventory_model.InventoryMovement), movement_rows)
+    await crud_stats.adjust_stock_stats_async(db, low_stock_delta=low_stock_delta)
+    await db.commit()
+    stock_events.publish(events)
+    await response_cache.invalidate_products_async(locked_products)
+    return results
@@ -0,0 +1,169 @@
+# backend/crud/crud_ledger.py
+"""
+The movement ledger's cold history.
+
+On PostgreSQL `inventory_movements` is partitioned by created_at month (migration 0003).
+jobs/movement_retention.py turns old months into per-product daily rollups
+(`movement_daily_rollups`), writes their raw rows to a gzip CSV file and drops them.
+Months are archived oldest first, so everything before the archive horizon (the end of
+the newest archived month) is read from the rollups and everything after it from the
+ledger; see archive_horizon() and its callers in crud_analytics and crud_snapshots.
+"""
+import csv
+import gzip
+import os
+from datetime import datetime, timezone
+from sqlalchemy import delete, func, insert, text
+from sqlalchemy.orm import Session
+from database import as_utc
+from models import inventory as inventory_model, rollup as rollup_model
+
+# Columns of an archive file, in order
+ARCHIVE_COLUMNS = [
+    "id", "product_id", "user_id", "change_quantity", "new_quantity_on_hand", "reason", "status", "created_at"
+]
+
+
+def month_start(value: datetime, months: int = 0):
+    """First instant (UTC) of the month of `value`, shifted by `months`."""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+def partition_name(month: datetime):
+    return f"inventory_movements_y{month.year}m{month.month:02d}"
+
+def archive_horizon(db: Session):
+    """End of the newest archived month, or None while nothing has been archived."""
+    newest = db.query(func.max(rollup_model.MovementArchive.month)).scalar()
+    return None if newest is None else month_start(as_utc(newest), 1)
+
+def is_partitioned(db: Session):
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('inventory_movements')"
+    )).scalar() is True
+
+def ensure_partition(db: Session, month: datetime):
+    """
+    Creates the partition of `month` unless it exists (PostgreSQL, partitioned ledger).
+    Rows of that month already sitting in the default partition are moved into it.
+    Returns whether a partition was created. Does not commit.
+    """
+    name = partition_name(month)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+    bounds = {"start": month, "end": month_start(month, 1)}
+    db.execute(text(f"CREATE TABLE {name} (LIKE inventory_movements INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    # Attaching fails while the default partition still holds rows of the new range
+    db.execute(text(
+        f"WITH moved AS (DELETE FROM inventory_movements_default "
+        f"WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    db.execute(text(
+        f"ALTER TABLE inventory_movements ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+    ))
+    return True
+
+def oldest_unarchived_month(db: Session):
+    """Month of the oldest movement still in the ledger, or None if it is empty."""
+    oldest = db.query(func.min(inventory_model.InventoryMovement.created_at)).scalar()
+    return None if oldest is None else month_start(as_utc(oldest))
+
+def has_scheduled_movements(db: Session, start: datetime, end: datetime):
+    movement = inventory_model.InventoryMovement
+    return db.query(movement.id).filter(
+        movement.is_scheduled, movement.created_at >= start, movement.created_at < end
+    ).first() is not None
+
+def _daily_rollups(rows):
+    """
+    Folds completed movements ordered by (product_id, created_at, id) into rollup rows,
+    one per product and UTC day.
+    """
+    current = None
+    for product_id, change_quantity, quantity, created_at in rows:
+        created_at = as_utc(created_at)
+        day = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        if current is None or current["product_id"] != product_id or current["day"] != day:
+            if current is not None:
+                yield current
+            current = {
+                "product_id": product_id, "day": day, "movement_count": 0, "net_change": 0,
+                "sales_quantity": 0, "sales_count": 0,
+                "min_quantity": quantity, "min_at": created_at, "max_quantity": quantity, "max_at": created_at,
+            }
+        current["movement_count"] += 1
+        current["net_change"] += change_quantity
+        if change_quantity < 0:
+            current["sales_quantity"] -= change_quantity
+            current["sales_count"] += 1
+        current["closing_quantity"], current["last_at"] = quantity, created_at
+        if quantity < current["min_quantity"]:
+            current["min_quantity"], current["min_at"] = quantity, created_at
+        if quantity > current["max_quantity"]:
+            current["max_quantity"], current["max_at"] = quantity, created_at
+    if current is not None:
+        yield current
+
+def archive_month(db: Session, month: datetime, archive_dir: str, batch_size: int = 10_000):
+    """
+    Archives one month of the ledger: streams its rows into `archive_dir` as gzip CSV
+    (ordered by product and time), folds the completed ones into daily rollups, records
+    the archive and removes the raw rows (dropping the month's partition when there is
+    one), all in one transaction. Returns the number of rows archived.
+
+    The file is written before the transaction commits; if the commit fails, the next
+    run rewrites it.
+    """
+    start, end = month, month_start(month, 1)
+    movement = inventory_model.InventoryMovement
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{partition_name(month)}.csv.gz")
+
+    db.execute(delete(rollup_model.MovementDailyRollup).where(
+        rollup_model.MovementDailyRollup.day >= start, rollup_model.MovementDailyRollup.day < end
+    ))
+    result = db.execute(
+        db.query(*(getattr(movement, column) for column in ARCHIVE_COLUMNS)).filter(
+            movement.created_at >= start, movement.created_at < end
+        ).order_by(movement.product_id, movement.created_at, movement.id).statement,
+        execution_options={"stream_results": True, "yield_per": batch_size},
+    )
+    row_count = 0
+
+    def completed_rows(writer):
+        nonlocal row_count
+        for row in result:
+            writer.writerow([as_utc(value).isoformat() if isinstance(value, datetime) else value for value in row])
+            row_count += 1
+            if row.status == 'COMPLETED':
+                yield row.product_id, row.change_quantity, row.new_quantity_on_hand, row.created_at
+
+    with gzip.open(path + ".tmp", "wt", newline="") as archive_file, result:
+        writer = csv.writer(archive_file)
+        writer.writerow(ARCHIVE_COLUMNS)
+        batch = []
+        for rollup in _daily_rollups(completed_rows(writer)):
+            batch.append(rollup)
+            if len(batch) >= batch_size:
+                db.execute(insert(rollup_model.MovementDailyRollup), batch)
+                batch = []
+        if batch:
+            db.execute(insert(rollup_model.MovementDailyRollup), batch)
+    os.replace(path + ".tmp", path)
+
+    db.merge(rollup_model.MovementArchive(
+        month=start, row_count=row_count, path=path, archived_at=datetime.now(timezone.utc)
+    ))
+    if is_partitioned(db) and db.execute(
+        text("SELECT to_regclass(:name)"), {"name": partition_name(month)}
+    ).scalar() is not None:
+        db.execute(text(f"ALTER TABLE inventory_movements DETACH PARTITION {partition_name(month)}"))
+        db.execute(text(f"DROP TABLE {partition_name(month)}"))
+    # Rows outside a partition of their own (default partition, or an unpartitioned ledger)
+    db.execute(delete(movement).where(movement.created_at >= start, movement.created_at < end))
+    db.commit()
+    return row_count
@@ -1,9 +1,28 @@
 # backend/crud/crud_product.py
 
+from sqlalchemy import and_, collate, func, literal, literal_column, or_, text, tuple_
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
+import base64
+import binascii
+import csv
+import io
+import json
 import uuid
+from database import SessionLocal, dialect_insert
 from models import product as product_model
 from schemas import product as product_schema
+from crud import crud_stats
+import stock_events
+import response_cache
+
+# Columns of the bulk import/export formats
+PRODUCT_EXPORT_COLUMNS = ["id", "sku", "name", "description", "reorder_point", "quantity_on_hand"]
+PRODUCT_IMPORT_COLUMNS = ["sku", "name", "description", "reorder_point"]
+
+# Shorter search queries have no trigram to look up, so they only match SKU/name prefixes
+SEARCH_MIN_TRIGRAM_LENGTH = 3
 
 def create_product(db: Session, product: product_schema.ProductCreate):
     """
@@ -13,11 +32,17 @@ def create_product(db: Session, product: product_schema.ProductCreate):
         sku=product.sku,
         name=product.name,
         description=product.description,
-        reorder_point=product.reorder_point 
+        reorder_point=product.reorder_point,
+        quantity_on_hand=0,
+        is_deleted=False
     )
     db.add(db_product)
+    crud_stats.adjust_stock_stats(
+        db, total_delta=1, low_stock_delta=int(crud_stats.is_low_stock(db_product))
+    )
     db.commit()
     db.refresh(db_product)
+    response_cache.invalidate_products([db_product.id])
     return db_product
 
 # --- THIS IS THE MISSING FUNCTION ---
@@ -30,15 +55,228 @@ def get_product(db: Session, product_id: uuid.UUID):
         product_model.Product.is_deleted == False
     ).first()
 
-def get_products(db: Session, skip: int = 0, limit: int = 100):
+def _encode_cursor(values: list) -> str:
+    payload = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+def encode_product_cursor(db_product: product_model.Product) -> str:
     """
-    Get a list of all products with pagination, sorted by name.
+    Opaque keyset cursor pointing just after the given product in (name, id) order.
     """
-    return db.query(product_model.Product).filter(
+    return _encode_cursor([db_product.name, str(db_product.id)])
+
+def decode_product_cursor(cursor: str):
+    """
+    Inverse of encode_product_cursor. Raises ValueError for a malformed cursor.
+    """
+    try:
+        name, product_id = _decode_cursor(cursor)
+        return str(name), uuid.UUID(product_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def encode_low_stock_cursor(db_product: product_model.Product) -> str:
+    """
+    Opaque keyset cursor pointing just after the given product in low-stock order.
+    """
+    return _encode_cursor([db_product.reorder_point - db_product.quantity_on_hand, str(db_product.id)])
+
+def decode_low_stock_cursor(cursor: str):
+    """
+    Inverse of encode_low_stock_cursor. Raises ValueError for a malformed cursor.
+    """
+    try:
+        shortfall, product_id = _decode_cursor(cursor)
+        if not isinstance(shortfall, int):
+            raise ValueError("Invalid cursor")
+        return shortfall, uuid.UUID(product_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def get_products(db: Session, skip: int = 0, limit: int = 100, after: tuple[str, uuid.UUID] | None = None):
+    """
+    Get a page of products sorted by name (id breaks ties).
+    With `after` (a decoded cursor) the page starts right after that product using a keyset
+    seek, which costs the same on every page; otherwise `skip` rows are skipped with OFFSET.
+    """
+    query = db.query(product_model.Product).filter(
         product_model.Product.is_deleted == False
     ).order_by(
-        product_model.Product.name.asc()
-    ).offset(skip).limit(limit).all()
+        product_model.Product.name.asc(), product_model.Product.id.asc()
+    )
+    if after is not None:
+        query = query.filter(
+            tuple_(product_model.Product.name, product_model.Product.id) > tuple_(*after)
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_low_stock_products(db: Session, limit: int = 100, after: tuple[int, uuid.UUID] | None = None):
+    """
+    Get a page of the products below their reorder point, largest shortfall
+    (reorder_point - quantity_on_hand) first, id breaking ties. `after` is a decoded
+    low-stock cursor. The filter and sort match the partial index ix_products_low_stock,
+    so a page reads only its own index entries, never the whole catalog.
+    """
+    shortfall = product_model.Product.reorder_point - product_model.Product.quantity_on_hand
+    query = db.query(product_model.Product).filter(
+        product_model.Product.is_deleted == False,
+        product_model.Product.quantity_on_hand < product_model.Product.reorder_point
+    ).order_by(
+        shortfall.desc(), product_model.Product.id.asc()
+    )
+    if after is not None:
+        after_shortfall, after_id = after
+        # Mixed sort directions, so the seek is spelled out instead of a row comparison
+        query = query.filter(or_(
+            shortfall < after_shortfall,
+            and_(shortfall == after_shortfall, product_model.Product.id > after_id)
+        ))
+    return query.limit(limit).all()
+
+# Search index kind per database URL, see _search_index()
+_search_indexes: dict[str, str] = {}
+
+def _search_index(db: Session):
+    """
+    "trigram" (PostgreSQL) or "fts5" (SQLite) once migration 0004 has created the search
+    indexes, else None. Only a positive answer is cached, per database.
+    """
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _search_indexes:
+        if bind.dialect.name == "postgresql":
+            found = db.execute(text("SELECT to_regclass('ix_products_search_trgm')")).scalar() is not None
+        else:
+            found = db.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_search'"
+            )).first() is not None
+        if not found:
+            return None
+        _search_indexes[key] = "trigram" if bind.dialect.name == "postgresql" else "fts5"
+    return _search_indexes[key]
+
+def _search_key(db: Session, column):
+    # Byte order on PostgreSQL, so a prefix is a key range (see migration 0004)
+    key = func.lower(column)
+    return collate(key, "C") if db.get_bind().dialect.name == "postgresql" else key
+
+def _search_document():
+    # The expression of ix_products_search_trgm. Literal separators keep it matching the
+    # index whatever the driver's parameter style; it is grouped because pg_trgm's
+    # operators bind as tightly as ||
+    product = product_model.Product
+    separator = literal_column("' '")
+    return func.lower(product.sku).concat(separator).concat(func.lower(product.name)).concat(separator).concat(
+        func.lower(func.coalesce(product.description, literal_column("''")))
+    ).self_group()
+
+def _prefix_matches(db: Session, column, q: str, limit: int):
+    key = _search_key(db, column)
+    return db.query(product_model.Product).filter(
+        product_model.Product.is_deleted == False,
+        key >= q,
+        key < q + "\U0010ffff"
+    ).order_by(key.asc(), product_model.Product.id.asc()).limit(limit).all()
+
+def _fts5_matches(db: Session, match: str, limit: int, ranked: bool):
+    # search.products_search is FTS5's hidden column named after the table
+    statement = text(
+        "SELECT products.* FROM products_search AS search JOIN products ON products.rowid = search.rowid "
+        "WHERE search.products_search MATCH :match AND products.is_deleted = 0 "
+        + ("ORDER BY search.rank " if ranked else "") + "LIMIT :limit"
+    )
+    return db.query(product_model.Product).from_statement(statement).params(match=match, limit=limit).all()
+
+def _fts5_phrase(value: str):
+    return '"' + value.replace('"', '""') + '"'
+
+def _text_matches(db: Session, index: str | None, q: str, limit: int):
+    """Products whose SKU, name or description contain `q` or something close to it."""
+    if index == "trigram":
+        # Nearest first straight from the GiST index: `<%` keeps word similarities above
+        # pg_trgm.word_similarity_threshold, `<<->` is one minus the similarity
+        document = _search_document()
+        return db.query(product_model.Product).filter(
+            product_model.Product.is_deleted == False,
+            literal(q).op("<%")(document)
+        ).order_by(
+            literal(q).op("<<->")(document)
+        ).limit(limit).all()
+    if index == "fts5":
+        # A quoted string is a substring match for the trigram tokenizer. Ranking scores
+        # every match, so substring hits come unranked, and the typo-tolerant pass (any
+        # of the query's trigrams in the name or description, best bm25 first) only runs
+        # when there are none. It leaves SKUs out: codes share their digit trigrams with
+        # most of the catalog
+        matches = _fts5_matches(db, _fts5_phrase(q), limit, ranked=False)
+        if not matches:
+            trigrams = list(dict.fromkeys(q[i:i + 3] for i in range(len(q) - 2)))
+            fuzzy = _fts5_matches(
+                db, "{name description} : (" + " OR ".join(map(_fts5_phrase, trigrams)) + ")", limit, ranked=True
+            )
+            # In the spirit of pg_trgm's threshold: at least half of the trigrams in common
+            for db_product in fuzzy:
+                document = f"{db_product.name} {db_product.description or ''}".lower()
+                if 2 * sum(trigram in document for trigram in trigrams) >= len(trigrams):
+                    matches.append(db_product)
+        return matches
+    # Search indexes not migrated yet: a scan, correct but slow
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return db.query(product_model.Product).filter(
+        product_model.Product.is_deleted == False,
+        _search_document().like(pattern, escape="\\")
+    ).order_by(product_model.Product.name.asc(), product_model.Product.id.asc()).limit(limit).all()
+
+def _search_rank(db_product: product_model.Product, q: str):
+    sku, name = db_product.sku.lower(), db_product.name.lower()
+    if sku == q:
+        return 0
+    if sku.startswith(q):
+        return 1
+    if name.startswith(q):
+        return 2
+    if any(word.startswith(q) for word in name.split()):
+        return 3
+    if q in sku or q in name:
+        return 4
+    if q in (db_product.description or "").lower():
+        return 5
+    return 6
+
+def search_products(db: Session, q: str, limit: int = 20):
+    """
+    Non-deleted products matching `q`, best first: exact SKU, SKU prefix, name prefix,
+    a word of the name starting with `q`, substring of SKU or name, substring of the
+    description, then fuzzy (trigram) matches. Each kind of match is a bounded read of
+    its own index (see migration 0004), and the candidates are ranked here; ties keep
+    the index order, which for fuzzy matches is by similarity.
+    """
+    q = " ".join(q.lower().split())
+    if not q:
+        return []
+    candidates = _prefix_matches(db, product_model.Product.sku, q, limit)
+    candidates += _prefix_matches(db, product_model.Product.name, q, limit)
+    index = _search_index(db)
+    if len(q) >= SEARCH_MIN_TRIGRAM_LENGTH or index is None:
+        candidates += _text_matches(db, index, q, limit)
+    unique = {}
+    for db_product in candidates:
+        unique.setdefault(db_product.id, db_product)
+    positions = {product_id: position for position, product_id in enumerate(unique)}
+    return sorted(
+        unique.values(), key=lambda db_product: (_search_rank(db_product, q), positions[db_product.id])
+    )[:limit]
 
 def update_product(
     db: Session,
@@ -48,12 +286,19 @@ def update_product(
     """
     Update a product's details.
     """
+    was_low_stock = crud_stats.is_low_stock(db_product)
     update_data = product_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_product, key, value)
     db.add(db_product)
+    # A new reorder point can move the product in or out of the low-stock count
+    low_stock_delta = int(crud_stats.is_low_stock(db_product)) - int(was_low_stock)
+    crud_stats.adjust_stock_stats(db, low_stock_delta=low_stock_delta)
+    events = [stock_events.threshold_event(db_product)] if low_stock_delta else []
     db.commit()
+    stock_events.publish(events)
     db.refresh(db_product)
+    response_cache.invalidate_products([db_product.id])
     return db_product
 
 def delete_product(db: Session, product_id: uuid.UUID):
@@ -62,8 +307,170 @@ def delete_product(db: Session, product_id: uuid.UUID):
     """
     db_product = db.query(product_model.Product).filter(product_model.Product.id == product_id).first()
     if db_product:
+        if not db_product.is_deleted:
+            crud_stats.adjust_stock_stats(
+                db, total_delta=-1, low_stock_delta=-int(crud_stats.is_low_stock(db_product))
+            )
         db_product.is_deleted = True
         db.add(db_product)
         db.commit()
         db.refresh(db_product)
-    return db_product
\ No newline at end of file
+        response_cache.invalidate_products([db_product.id])
+    return db_product
+
+def read_product_import_rows(text_stream, file_format: str):
+    """
+    Yields (row_number, fields) from a CSV (with a header row) or NDJSON text stream, one
+    row at a time. Rows that cannot be parsed at all are yielded as (row_number, error).
+    """
+    if file_format == "csv":
+        for row_number, record in enumerate(csv.DictReader(text_stream), start=1):
+            # Empty cells fall back to the schema defaults
+            yield row_number, {
+                key: value for key, value in record.items()
+                if key in PRODUCT_IMPORT_COLUMNS and value not in (None, "")
+            }
+        return
+    for row_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, "Expected a JSON object"
+            continue
+        yield row_number, record
+
+def upsert_products(db: Session, products: list[product_schema.ProductCreate]):
+    """
+    Inserts the products, or updates name/description/reorder point of the existing
+    product with the same SKU (reviving it if it was soft-deleted), in one statement.
+    Stock levels of existing products are left alone. Adjusts the dashboard counters by
+    what the batch changed. Does not commit.
+    """
+    if not products:
+        return
+    # Existing rows are locked first, so their state cannot change before the upsert
+    existing = {
+        sku: (is_deleted, quantity_on_hand, reorder_point)
+        for sku, is_deleted, quantity_on_hand, reorder_point in db.query(
+            product_model.Product.sku, product_model.Product.is_deleted,
+            product_model.Product.quantity_on_hand, product_model.Product.reorder_point
+        ).filter(
+            product_model.Product.sku.in_([product.sku for product in products])
+        ).with_for_update()
+    }
+    total_delta = low_stock_delta = 0
+    for product in products:
+        is_deleted, quantity_on_hand, reorder_point = existing.get(product.sku, (True, 0, None))
+        # New and revived products count again; live ones may cross their new reorder point
+        was_low_stock = not is_deleted and quantity_on_hand < reorder_point
+        total_delta += int(is_deleted)
+        low_stock_delta += int(quantity_on_hand < product.reorder_point) - int(was_low_stock)
+
+    table = product_model.Product.__table__
+    statement = dialect_insert(db, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.sku],
+        set_={
+            "name": statement.excluded.name,
+            "description": statement.excluded.description,
+            "reorder_point": statement.excluded.reorder_point,
+            "is_deleted": False,
+        },
+    )
+    db.execute(statement, [
+        {
+            "id": uuid.uuid4(), "sku": product.sku, "name": product.name,
+            "description": product.description, "reorder_point": product.reorder_point,
+            "quantity_on_hand": 0, "is_deleted": False,
+        }
+        for product in products
+    ])
+    crud_stats.adjust_stock_stats(db, total_delta=total_delta, low_stock_delta=low_stock_delta)
+
+def import_products(db: Session, rows, batch_size: int, max_errors: int = 1000):
+    """
+    Validates and upserts rows from read_product_import_rows, committing every
+    `batch_size` valid rows, so memory stays flat however large the file is. Within one
+    batch the last row for a SKU wins. Returns a ProductImportSummary dict.
+    """
+    summary = {"processed": 0, "imported": 0, "failed": 0, "errors": []}
+
+    def fail(row_number, sku, detail):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": row_number, "sku": sku, "detail": detail})
+
+    def flush(batch, valid_rows):
+        # batch: {sku: (row_number, product)}, deduplicated so one statement never
+        # touches the same row twice
+        try:
+            upsert_products(db, [product for _, product in batch.values()])
+            db.commit()
+            summary["imported"] += valid_rows
+        except DBAPIError as e:
+            db.rollback()
+            summary["failed"] += valid_rows - len(batch)
+            for row_number, product in batch.values():
+                fail(row_number, product.sku, f"Database error: {e.orig}")
+
+    batch = {}
+    valid_rows = 0
+    for row_number, fields in rows:
+        summary["processed"] += 1
+        if isinstance(fields, str):
+            fail(row_number, None, fields)
+            continue
+        try:
+            product = product_schema.ProductCreate.model_validate(fields)
+        except ValidationError as e:
+            fail(row_number, fields.get("sku"), "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            continue
+        batch.pop(product.sku, None)
+        batch[product.sku] = (row_number, product)
+        valid_rows += 1
+        if len(batch) >= batch_size:
+            flush(batch, valid_rows)
+            batch, valid_rows = {}, 0
+    flush(batch, valid_rows)
+
+    response_cache.invalidate_all_products()
+    return summary
+
+def export_products(file_format: str, batch_size: int = 1000):
+    """
+    Yields the non-deleted catalog as CSV or NDJSON text chunks, read through a
+    server-side cursor in `batch_size` rows. Opens its own session because it runs while
+    the response streams, after the request's session has been closed.
+    """
+    columns = [getattr(product_model.Product, name) for name in PRODUCT_EXPORT_COLUMNS]
+    with SessionLocal() as db:
+        result = db.execute(
+            db.query(*columns).filter(
+                product_model.Product.is_deleted == False
+            ).order_by(product_model.Product.sku.asc()).statement,
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        if file_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(PRODUCT_EXPORT_COLUMNS)
+            for partition in result.partitions():
+                writer.writerows(
+                    [str(row.id), *row[1:]] for row in partition
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield "".join(
+                    json.dumps({**row._asdict(), "id": str(row.id)}) + "\n" for row in partition
+                )
\ No newline at end of file
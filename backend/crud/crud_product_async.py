@@ -0,0 +1,109 @@
+# backend/crud/crud_product_async.py
+# AsyncSession versions of crud_product, used by the async routes (DB_ASYNC_MODE).
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+from models import product as product_model
+from schemas import product as product_schema
+from crud import crud_product, crud_stats
+import stock_events
+import response_cache
+
+async def create_product(db: AsyncSession, product: product_schema.ProductCreate):
+    """
+    Create a new product in the database.
+    """
+    db_product = product_model.Product(
+        sku=product.sku,
+        name=product.name,
+        description=product.description,
+        reorder_point=product.reorder_point,
+        quantity_on_hand=0,
+        is_deleted=False
+    )
+    db.add(db_product)
+    await crud_stats.adjust_stock_stats_async(
+        db, total_delta=1, low_stock_delta=int(crud_stats.is_low_stock(db_product))
+    )
+    await db.commit()
+    await db.refresh(db_product)
+    await response_cache.invalidate_products_async([db_product.id])
+    return db_product
+
+async def get_product(db: AsyncSession, product_id: uuid.UUID):
+    """
+    Get a single product by its ID.
+    """
+    return await db.scalar(
+        select(product_model.Product).where(
+            product_model.Product.id == product_id,
+            product_model.Product.is_deleted == False
+        )
+    )
+
+async def get_products(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after: tuple[str, uuid.UUID] | None = None
+):
+    """
+    Get a page of products sorted by name (id breaks ties); see crud_product.get_products.
+    """
+    query = select(product_model.Product).where(
+        product_model.Product.is_deleted == False
+    ).order_by(
+        product_model.Product.name.asc(), product_model.Product.id.asc()
+    )
+    if after is not None:
+        query = query.where(
+            tuple_(product_model.Product.name, product_model.Product.id) > tuple_(*after)
+        )
+    else:
+        query = query.offset(skip)
+    return (await db.scalars(query.limit(limit))).all()
+
+async def search_products(db: AsyncSession, q: str, limit: int = 20):
+    """
+    crud_product.search_products on the session's connection (through run_sync), so
+    both route variants share one ranking.
+    """
+    return await db.run_sync(crud_product.search_products, q, limit)
+
+async def update_product(
+    db: AsyncSession,
+    db_product: product_model.Product,
+    product_in: product_schema.ProductUpdate
+):
+    """
+    Update a product's details.
+    """
+    was_low_stock = crud_stats.is_low_stock(db_product)
+    update_data = product_in.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_product, key, value)
+    db.add(db_product)
+    # A new reorder point can move the product in or out of the low-stock count
+    low_stock_delta = int(crud_stats.is_low_stock(db_product)) - int(was_low_stock)
+    await crud_stats.adjust_stock_stats_async(db, low_stock_delta=low_stock_delta)
+    events = [stock_events.threshold_event(db_product)] if low_stock_delta else []
+    await db.commit()
+    stock_events.publish(events)
+    await db.refresh(db_product)
+    await response_cache.invalidate_products_async([db_product.id])
+    return db_product
+
+async def delete_product(db: AsyncSession, product_id: uuid.UUID):
+    """
+    Soft-delete a product by setting `is_deleted` flag.
+    """
+    db_product = await db.get(product_model.Product, product_id)
+    if db_product:
+        if not db_product.is_deleted:
+            await crud_stats.adjust_stock_stats_async(
+                db, total_delta=-1, low_stock_delta=-int(crud_stats.is_low_stock(db_product))
+            )
+        db_product.is_deleted = True
+        db.add(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        await response_cache.invalidate_products_async([db_product.id])
+    return db_product
@@ -0,0 +1,132 @@
+# backend/crud/crud_snapshots.py
+"""
+Point-in-time stock levels from checkpoints.
+
+Stock only ever changes through COMPLETED movements, so the level of a product at any
+time is a checkpoint plus the net change of the movements between the two. That sum
+does not depend on the order of the movements, and it works from an earlier checkpoint
+(add the changes since) as well as from a later one (subtract the changes after `ts`).
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+from models import inventory as inventory_model, product as product_model, rollup as rollup_model, snapshot as snapshot_model
+from crud import crud_ledger
+from database import as_utc
+
+
+def _net_changes(db: Session, after: datetime | None, until: datetime):
+    """
+    {product_id: net change} of the COMPLETED movements with after < created_at <= until.
+    Archived days count through their rollups when they lie entirely inside the range, so
+    before the archive horizon the changes are exact between midnights (which is where
+    the daily checkpoints fall).
+    """
+    movement = inventory_model.InventoryMovement
+    query = db.query(movement.product_id, func.sum(movement.change_quantity)).filter(
+        movement.status == 'COMPLETED',
+        movement.created_at <= until
+    )
+    if after is not None:
+        query = query.filter(movement.created_at > after)
+    changes = dict(query.group_by(movement.product_id).all())
+
+    horizon = crud_ledger.archive_horizon(db)
+    if horizon is None or (after is not None and after >= horizon):
+        return changes
+    rollup = rollup_model.MovementDailyRollup
+    archived = db.query(rollup.product_id, func.sum(rollup.net_change)).filter(
+        rollup.day <= until - timedelta(days=1)
+    )
+    if after is not None:
+        archived = archived.filter(rollup.day >= after)
+    for product_id, change in archived.group_by(rollup.product_id):
+        changes[product_id] = changes.get(product_id, 0) + change
+    return changes
+
+def _snapshot_levels(db: Session, snapshot_at: datetime):
+    snapshot = snapshot_model.StockSnapshot
+    return dict(
+        db.query(snapshot.product_id, snapshot.quantity_on_hand).filter(snapshot.snapshot_at == snapshot_at).all()
+    )
+
+def latest_snapshot_at(db: Session):
+    return as_utc(db.query(func.max(snapshot_model.StockSnapshot.snapshot_at)).scalar())
+
+def nearest_snapshot_at(db: Session, ts: datetime):
+    """The checkpoint closest to `ts` on either side, or None if there is none yet."""
+    snapshot = snapshot_model.StockSnapshot
+    before = as_utc(db.query(func.max(snapshot.snapshot_at)).filter(snapshot.snapshot_at <= ts).scalar())
+    after = as_utc(db.query(func.min(snapshot.snapshot_at)).filter(snapshot.snapshot_at > ts).scalar())
+    if before is None or after is None:
+        return before or after
+    return before if ts - before <= after - ts else after
+
+def effective_as_of(db: Session, ts: datetime):
+    """
+    The time stock levels can be given for when asked for `ts`: `ts` itself, or the
+    midnight (UTC) starting its day if that day is archived. Archived days only keep
+    daily totals, so the level inside one is not known.
+    """
+    ts = as_utc(ts)
+    horizon = crud_ledger.archive_horizon(db)
+    if horizon is None or ts >= horizon:
+        return ts
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def stock_levels_as_of(db: Session, ts: datetime):
+    """
+    Returns ({product_id: quantity_on_hand}, checkpoint used or None, effective time) for
+    `ts`, snapped by effective_as_of(). Products with nothing on hand may be missing.
+    Reads one checkpoint and the movements between it and `ts`, never the history before it.
+    """
+    ts = effective_as_of(db, ts)
+    base = nearest_snapshot_at(db, ts)
+    if base is None:
+        # No checkpoint yet: aggregate the whole ledger up to ts
+        return _net_changes(db, None, ts), None, ts
+
+    levels = _snapshot_levels(db, base)
+    if base <= ts:
+        changes, sign = _net_changes(db, base, ts), 1
+    else:
+        changes, sign = _net_changes(db, ts, base), -1
+    for product_id, change in changes.items():
+        levels[product_id] = levels.get(product_id, 0) + sign * change
+    return levels, base, ts
+
+def get_stock_as_of(db: Session, ts: datetime):
+    """
+    Every current (non-deleted) product with its quantity on hand at `ts`, by name.
+    Returns (rows, checkpoint used or None, effective time).
+    """
+    levels, base, effective_at = stock_levels_as_of(db, ts)
+    products = db.query(
+        product_model.Product.id, product_model.Product.sku, product_model.Product.name
+    ).filter(
+        product_model.Product.is_deleted == False
+    ).order_by(product_model.Product.name.asc(), product_model.Product.id.asc()).all()
+    return [
+        {"product_id": product_id, "sku": sku, "name": name, "quantity_on_hand": levels.get(product_id, 0)}
+        for product_id, sku, name in products
+    ], base, effective_at
+
+def take_snapshot(db: Session, snapshot_at: datetime):
+    """
+    Writes (or rewrites) the checkpoint at `snapshot_at`; returns the number of rows.
+    Nothing is written inside an archived day, where the level would not be exact.
+    """
+    snapshot_at = as_utc(snapshot_at)
+    if effective_as_of(db, snapshot_at) != snapshot_at:
+        return 0
+    # Removed first, so an existing checkpoint is recomputed from its neighbours
+    db.execute(delete(snapshot_model.StockSnapshot).where(snapshot_model.StockSnapshot.snapshot_at == snapshot_at))
+    levels, _, _ = stock_levels_as_of(db, snapshot_at)
+    rows = [
+        {"snapshot_at": snapshot_at, "product_id": product_id, "quantity_on_hand": quantity}
+        for product_id, quantity in levels.items() if quantity
+    ]
+    if rows:
+        db.execute(insert(snapshot_model.StockSnapshot), rows)
+    db.commit()
+    return len(rows)
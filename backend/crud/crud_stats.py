@@ -0,0 +1,88 @@
+# backend/crud/crud_stats.py
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models import product as product_model, stats as stats_model
+
+STATS_ROW_ID = 1
+
+def is_low_stock(db_product: product_model.Product) -> bool:
+    """Whether a product counts towards the low-stock KPI."""
+    return not db_product.is_deleted and db_product.quantity_on_hand < db_product.reorder_point
+
+def _stock_stats_delta(total_delta: int, low_stock_delta: int):
+    # If the row does not exist yet there is nothing to adjust: the first read computes it
+    return update(stats_model.StockStats).where(
+        stats_model.StockStats.id == STATS_ROW_ID
+    ).values({
+        stats_model.StockStats.total_products: stats_model.StockStats.total_products + total_delta,
+        stats_model.StockStats.low_stock_items: stats_model.StockStats.low_stock_items + low_stock_delta,
+        stats_model.StockStats.updated_at: func.now(),
+    }).execution_options(synchronize_session=False)
+
+def adjust_stock_stats(db: Session, total_delta: int = 0, low_stock_delta: int = 0):
+    """
+    Applies counter deltas inside the caller's transaction with one atomic UPDATE, so they
+    commit or roll back together with the product change. Callers update the stats row
+    after locking their product rows, which keeps the lock order consistent.
+    """
+    if not total_delta and not low_stock_delta:
+        return
+    db.execute(_stock_stats_delta(total_delta, low_stock_delta))
+
+async def adjust_stock_stats_async(db, total_delta: int = 0, low_stock_delta: int = 0):
+    """adjust_stock_stats for an AsyncSession."""
+    if not total_delta and not low_stock_delta:
+        return
+    await db.execute(_stock_stats_delta(total_delta, low_stock_delta))
+
+def compute_stock_stats(db: Session):
+    """Recomputes the counters from the products table (full scan)."""
+    total_products = db.query(func.count(product_model.Product.id)).filter(
+        product_model.Product.is_deleted == False
+    ).scalar()
+    low_stock_items = db.query(func.count(product_model.Product.id)).filter(
+        product_model.Product.is_deleted == False,
+        product_model.Product.quantity_on_hand < product_model.Product.reorder_point
+    ).scalar()
+    return {"total_products": total_products, "low_stock_items": low_stock_items}
+
+def get_stock_stats(db: Session):
+    """Reads the maintained counters, initialising them on first use."""
+    db_stats = db.get(stats_model.StockStats, STATS_ROW_ID)
+    if db_stats is None:
+        db.execute(
+            dialect_insert(db, stats_model.StockStats.__table__).values(
+                id=STATS_ROW_ID, **compute_stock_stats(db)
+            ).on_conflict_do_nothing()
+        )
+        db.commit()
+        db_stats = db.get(stats_model.StockStats, STATS_ROW_ID)
+    return {"total_products": db_stats.total_products, "low_stock_items": db_stats.low_stock_items}
+
+def reconcile_stock_stats(db: Session, fix: bool = False):
+    """
+    Recomputes the counters from scratch and reports the drift of the maintained values
+    ({counter: (stored, actual)} for every counter that differs). With `fix`, the stored
+    values are overwritten. The stats row is locked first, so writers that change the
+    counters meanwhile wait and apply their deltas on top of the recomputed values.
+    """
+    db_stats = db.query(stats_model.StockStats).filter(
+        stats_model.StockStats.id == STATS_ROW_ID
+    ).with_for_update().first()
+    actual = compute_stock_stats(db)
+    if db_stats is None:
+        drift = {name: (None, value) for name, value in actual.items()}
+        if fix:
+            db.add(stats_model.StockStats(id=STATS_ROW_ID, **actual))
+    else:
+        drift = {
+            name: (getattr(db_stats, name), value)
+            for name, value in actual.items() if getattr(db_stats, name) != value
+        }
+        if fix:
+            for name, value in actual.items():
+                setattr(db_stats, name, value)
+    db.commit()
+    return drift
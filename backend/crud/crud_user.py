@@ -1,17 +1,23 @@
 # backend/crud/crud_user.py
 
+import uuid
 from sqlalchemy.orm import Session
 from models import user as user_model
 from schemas import user as user_schema
-from security import get_password_hash
+from security import get_password_hash, invalidate_principal
+
+def get_user(db: Session, user_id: uuid.UUID):
+    """Fetches a user by id."""
+    return db.query(user_model.User).filter(user_model.User.id == user_id).first()
 
 def get_user_by_email(db: Session, email: str):
     """Fetches a user by their email address."""
     return db.query(user_model.User).filter(user_model.User.email == email).first()
 
-def create_user(db: Session, user: user_schema.UserCreate):
-    """Creates a new user, hashing the password before storing."""
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: user_schema.UserCreate, hashed_password: str | None = None):
+    """Creates a new user, hashing the password before storing unless a hash is passed in."""
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     user_count = db.query(user_model.User).count()
     user_role = "manager" if user_count == 0 else "operator"
 
@@ -23,4 +29,20 @@ def create_user(db: Session, user: user_schema.UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    return db_user
+
+def update_user_role(db: Session, db_user: user_model.User, role: str):
+    """Changes a user's role and drops their cached principal so it applies immediately."""
+    db_user.role = role
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    invalidate_principal(db_user.email)
+    return db_user
+
+def update_password_hash(db: Session, db_user: user_model.User, hashed_password: str):
+    """Replaces a stored hash, e.g. one rehashed on login with the current cost factor."""
+    db_user.hashed_password = hashed_password
+    db.add(db_user)
+    db.commit()
     return db_user
\ No newline at end of file
@@ -0,0 +1,36 @@
+# backend/crud/crud_user_async.py
+# AsyncSession versions of crud_user, used by the async routes (DB_ASYNC_MODE).
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import user as user_model
+from schemas import user as user_schema
+from security import get_password_hash_offloaded
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    """Fetches a user by their email address."""
+    return await db.scalar(select(user_model.User).where(user_model.User.email == email))
+
+async def create_user(db: AsyncSession, user: user_schema.UserCreate, hashed_password: str | None = None):
+    """Creates a new user, hashing the password before storing unless a hash is passed in."""
+    if hashed_password is None:
+        hashed_password = await get_password_hash_offloaded(user.password)
+    user_count = await db.scalar(select(func.count()).select_from(user_model.User))
+    user_role = "manager" if user_count == 0 else "operator"
+
+    db_user = user_model.User(
+        email=user.email,
+        hashed_password=hashed_password,
+        role=user_role # Assign the determined role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_password_hash(db: AsyncSession, db_user: user_model.User, hashed_password: str):
+    """Replaces a stored hash, e.g. one rehashed on login with the current cost factor."""
+    db_user.hashed_password = hashed_password
+    db.add(db_user)
+    await db.commit()
+    return db_user
@@ -1,11 +1,39 @@
 # backend/database.py
 
+from datetime import datetime, timezone
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from config import settings
+import metrics
+
+# Async drivers used when ASYNC_DATABASE_URL is not set
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def _pool_options(url: str, is_async: bool = False) -> dict:
+    """Pool settings from config; SQLite keeps SQLAlchemy's default pool."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        # Same pools SQLAlchemy would pick, with checkout wait recorded (see metrics)
+        "poolclass": metrics.timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+def async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    return url.set(drivername=_ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(hide_password=False)
 
 # Create the SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **_pool_options(settings.DATABASE_URL))
 
 # Create a SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -13,9 +41,59 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create a Base class for our models to inherit from
 Base = declarative_base()
 
+# The async engine is only created on first use, so the sync-only setup needs neither
+# greenlet nor an async driver installed
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **_pool_options(url, is_async=True))
+    return _async_engine
+
+def AsyncSessionLocal():
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        # Attributes stay loaded after commit: an expired attribute would need implicit IO,
+        # which AsyncSession does not allow
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _AsyncSessionLocal()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def as_utc(value: datetime | None):
+    """
+    An aware UTC datetime. Naive values are taken as UTC, which is what the database stores
+    (SQLite hands timestamps back naive).
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def dialect_insert(db, table):
+    """
+    INSERT construct for the session's dialect, so callers can use
+    on_conflict_do_nothing / on_conflict_do_update on PostgreSQL and SQLite alike.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
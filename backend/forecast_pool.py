@@ -0,0 +1,101 @@
+# backend/forecast_pool.py
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import settings
+
+
+# Start method for every pool of model-fitting processes (this one and the refresh jobs').
+# spawn, not fork: the parent has running threads (thread pools) and open database
+# connections that a forked child must not inherit.
+WORKER_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class ForecastTimeout(Exception):
+    """A fit did not finish within the per-product timeout."""
+
+
+def _fit(bucket_starts, demand, bucket):
+    # Runs in a worker process, which imports the analytics engines once on its first fit
+    from crud import crud_analytics
+    return crud_analytics.fit_demand_forecast(bucket_starts, demand, bucket)
+
+
+class ForecastPool:
+    """
+    Worker processes for the Prophet fits of POST /analytics/forecast/batch, shared by
+    every request of an API process and started on first use.
+
+    At most `workers` fits run at a time across all requests; the rest wait for a slot
+    here rather than in the executor's queue, so the per-product timeout only counts the
+    fit itself. A fit that times out keeps its worker (a running process cannot be
+    interrupted) and its slot until it really finishes, so a stuck SKU shows up as
+    reduced capacity instead of unbounded queueing.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = None
+        self._slots_loop = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=WORKER_CONTEXT)
+            return self._executor
+
+    def _get_slots(self):
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.workers), loop
+        return self._slots, loop
+
+    async def fit(self, bucket_starts, demand, bucket: str, timeout: float):
+        """Fits one demand series; returns the forecast points (None if fitting failed)."""
+        slots, loop = self._get_slots()
+        await slots.acquire()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_fit, bucket_starts, demand, bucket)
+        except BaseException as e:
+            slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+            raise
+        future.add_done_callback(lambda _: self._release(loop, slots))
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            raise ForecastTimeout() from None
+        except asyncio.CancelledError:
+            # The client went away: drop the fit if it has not started yet
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+
+    @staticmethod
+    def _release(loop, slots):
+        # A timed-out fit can outlive the event loop it was started from (worker
+        # shutdown); its slots went with that loop
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            pass
+
+    def _discard_executor(self, executor):
+        # A worker died (e.g. killed for memory): the next fit starts a fresh pool
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+forecast_pool = ForecastPool(workers=settings.FORECAST_BATCH_WORKERS)
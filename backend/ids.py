@@ -0,0 +1,16 @@
+# backend/ids.py
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    A time-ordered UUID (version 7, RFC 9562): 48 bits of Unix milliseconds followed by
+    random bits. Rows inserted over time get increasing ids, so they land at the end of
+    a primary key index instead of on random pages.
+    """
+    value = (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version
+    value = value & ~(0x3 << 62) | 0x2 << 62  # variant
+    return uuid.UUID(int=value)
@@ -0,0 +1,348 @@
+# backend/jobs/anomaly_refresh.py
+"""
+Incremental anomaly detection, catalog-wide and per product.
+
+Catalog-wide: the IsolationForest is trained on a bounded sample (the most recent
+movements inside a rolling window) rather than the whole ledger. Only completed movements
+recorded after the stored watermark, and at least ANOMALY_SCAN_LAG_SECONDS ago, are then
+read, as plain column tuples in keyset-ordered chunks, scored chunk by chunk, and the
+flagged ones are appended to `movement_anomalies`. Each chunk commits together with the
+watermark, so an interrupted run resumes where it stopped.
+
+Per product: each product keeps a versioned, pickled model in `anomaly_models`. New
+movements are scored in micro-batches with the stored model. A product is retrained on a
+process pool when it has no model yet, when ANOMALY_RETRAIN_ROWS movements arrived since
+training, or when a scoring batch flagged far more than the model did on its training data.
+Like the catalog-wide model, it trains on the ANOMALY_TRAINING_WINDOW_DAYS window only.
+Deleted products lose their models.
+
+    python -m jobs.anomaly_refresh
+    python -m jobs.anomaly_refresh --loop --interval 60 --workers 4
+"""
+import argparse
+import pickle
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from sklearn.ensemble import IsolationForest
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from config import settings
+from crud import crud_analytics
+from database import SessionLocal, dialect_insert
+from forecast_pool import WORKER_CONTEXT
+from models import anomaly as anomaly_model, inventory as inventory_model, product as product_model
+import response_cache
+
+GLOBAL_DETECTOR = "global"
+PRODUCT_DETECTOR = "product"
+
+# Products whose movements are loaded at a time by the per-product refresh
+CHUNK_SIZE = 200
+
+
+def _flag_rows(detector, movements, is_anomaly, scores):
+    """Rows for movement_anomalies from (id, product_id, change_quantity, reason, created_at) tuples."""
+    return [
+        {
+            "detector": detector, "movement_id": movements[i][0], "product_id": movements[i][1],
+            "change_quantity": movements[i][2], "reason": movements[i][3],
+            "created_at": movements[i][4], "score": float(scores[i]),
+        }
+        for i in is_anomaly.nonzero()[0]
+    ]
+
+
+def scan_horizon():
+    """
+    Movements dated up to this are scored. It lags now by ANOMALY_SCAN_LAG_SECONDS: a
+    movement is dated when its transaction writes it, so one still uncommitted when the
+    pass reads would otherwise fall behind the watermark and never be scored.
+    """
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.ANOMALY_SCAN_LAG_SECONDS)
+
+
+def training_window_start():
+    return datetime.now(timezone.utc) - timedelta(days=settings.ANOMALY_TRAINING_WINDOW_DAYS)
+
+
+def train_global_model(db: Session):
+    """Fits the catalog-wide model on the newest movements inside the training window."""
+    window_start = training_window_start()
+    sample = db.query(
+        inventory_model.InventoryMovement.change_quantity,
+        inventory_model.InventoryMovement.created_at
+    ).filter(
+        inventory_model.InventoryMovement.status == "COMPLETED",
+        inventory_model.InventoryMovement.created_at >= window_start
+    ).order_by(
+        inventory_model.InventoryMovement.created_at.desc()
+    ).limit(settings.ANOMALY_TRAINING_SAMPLE_SIZE).all()
+
+    if len(sample) < 10:
+        return None
+    change_quantity, created_at = zip(*sample)
+    model = IsolationForest(contamination='auto', random_state=42)
+    return model.fit(crud_analytics.anomaly_features(change_quantity, created_at))
+
+
+def refresh_global_anomalies(db: Session):
+    """Scores every movement newer than the watermark. Returns (scored, flagged) counts."""
+    model = train_global_model(db)
+    if model is None:
+        return 0, 0
+
+    state = db.get(anomaly_model.AnomalyScanState, GLOBAL_DETECTOR)
+    if state is None:
+        state = anomaly_model.AnomalyScanState(detector=GLOBAL_DETECTOR)
+        db.add(state)
+
+    scan_until = scan_horizon()
+    movement = inventory_model.InventoryMovement
+    scored = flagged = 0
+    while True:
+        query = db.query(
+            movement.id, movement.product_id, movement.change_quantity,
+            movement.reason, movement.created_at
+        ).filter(movement.status == "COMPLETED", movement.created_at <= scan_until)
+        if state.scanned_through is not None:
+            query = query.filter(
+                tuple_(movement.created_at, movement.id) > tuple_(state.scanned_through, state.scanned_through_id)
+            )
+        chunk = query.order_by(
+            movement.created_at.asc(), movement.id.asc()
+        ).limit(settings.ANOMALY_SCAN_CHUNK_SIZE).all()
+        if not chunk:
+            break
+
+        ids, _, change_quantity, _, created_at = zip(*chunk)
+        features = crud_analytics.anomaly_features(change_quantity, created_at)
+        is_anomaly = model.predict(features) == -1
+        rows = _flag_rows(GLOBAL_DETECTOR, chunk, is_anomaly, model.score_samples(features))
+        if rows:
+            db.execute(
+                dialect_insert(db, anomaly_model.MovementAnomaly.__table__).on_conflict_do_nothing(),
+                rows
+            )
+        state.scanned_through, state.scanned_through_id = created_at[-1], ids[-1]
+        db.commit()
+
+        scored += len(chunk)
+        flagged += len(rows)
+    return scored, flagged
+
+
+def _train_product_model_job(product_id, change_quantity, created_at):
+    """Runs in a worker process: fits a product's model and scores its history with it."""
+    features = crud_analytics.anomaly_features(change_quantity, created_at)
+    model = IsolationForest(contamination='auto', random_state=42).fit(features)
+    return product_id, pickle.dumps(model), model.predict(features) == -1, model.score_samples(features)
+
+
+def _load_product_movements(db: Session, product_ids, scan_until, newer_than_model=False, since=None):
+    """Movement tuples of several products in one query, grouped per product and ordered by time."""
+    movement = inventory_model.InventoryMovement
+    query = db.query(
+        movement.id, movement.product_id, movement.change_quantity, movement.reason, movement.created_at
+    ).filter(
+        movement.product_id.in_(product_ids),
+        movement.status == "COMPLETED",
+        movement.created_at <= scan_until
+    )
+    if since is not None:
+        query = query.filter(movement.created_at >= since)
+    if newer_than_model:
+        query = query.join(
+            anomaly_model.AnomalyModel, anomaly_model.AnomalyModel.product_id == movement.product_id
+        ).filter(
+            tuple_(movement.created_at, movement.id) > tuple_(
+                anomaly_model.AnomalyModel.scored_through, anomaly_model.AnomalyModel.scored_through_id
+            )
+        )
+    grouped = defaultdict(list)
+    for row in query.order_by(movement.created_at.asc(), movement.id.asc()):
+        grouped[row.product_id].append(tuple(row))
+    return grouped
+
+
+def _score_with_stored_models(db: Session, scan_until):
+    """Scores movements newer than each product's model watermark. Returns the number scored."""
+    movement = inventory_model.InventoryMovement
+    has_new_movements = db.query(movement.id).filter(
+        movement.product_id == anomaly_model.AnomalyModel.product_id,
+        movement.status == "COMPLETED",
+        movement.created_at <= scan_until,
+        tuple_(movement.created_at, movement.id) > tuple_(
+            anomaly_model.AnomalyModel.scored_through, anomaly_model.AnomalyModel.scored_through_id
+        )
+    ).exists()
+    pending = [
+        product_id for (product_id,) in db.query(anomaly_model.AnomalyModel.product_id).filter(has_new_movements)
+    ]
+
+    scored = 0
+    for start in range(0, len(pending), CHUNK_SIZE):
+        chunk = pending[start:start + CHUNK_SIZE]
+        new_movements = _load_product_movements(db, chunk, scan_until, newer_than_model=True)
+        stored_models = {
+            stored.product_id: stored
+            for stored in db.query(anomaly_model.AnomalyModel).filter(
+                anomaly_model.AnomalyModel.product_id.in_(chunk)
+            )
+        }
+        for product_id, movements in new_movements.items():
+            stored = stored_models[product_id]
+            model = pickle.loads(stored.model)
+            _, _, change_quantity, _, created_at = zip(*movements)
+            features = crud_analytics.anomaly_features(change_quantity, created_at)
+            is_anomaly = model.predict(features) == -1
+            rows = _flag_rows(PRODUCT_DETECTOR, movements, is_anomaly, model.score_samples(features))
+            if rows:
+                db.execute(
+                    dialect_insert(db, anomaly_model.MovementAnomaly.__table__).on_conflict_do_nothing(),
+                    rows
+                )
+            stored.scored_through, stored.scored_through_id = movements[-1][4], movements[-1][0]
+            stored.rows_since_training += len(movements)
+            if (
+                len(movements) >= settings.ANOMALY_DRIFT_MIN_ROWS
+                and is_anomaly.mean() > stored.training_anomaly_rate + settings.ANOMALY_DRIFT_MARGIN
+            ):
+                stored.needs_retraining = True
+            scored += len(movements)
+        db.commit()
+    return scored
+
+
+def _drop_deleted_product_models(db: Session):
+    """Deletes the stored models of deleted products; their flags are kept."""
+    deleted = db.query(product_model.Product.id).filter(product_model.Product.is_deleted == True)
+    dropped = db.query(anomaly_model.AnomalyModel).filter(
+        anomaly_model.AnomalyModel.product_id.in_(deleted.scalar_subquery())
+    ).delete(synchronize_session=False)
+    db.commit()
+    return dropped
+
+
+def _products_to_retrain(db: Session, scan_until, window_start):
+    """
+    Live products without a model (and enough history in the training window), past the
+    row threshold, or drifted.
+    """
+    movement = inventory_model.InventoryMovement
+    untrained = db.query(movement.product_id).join(
+        product_model.Product, product_model.Product.id == movement.product_id
+    ).outerjoin(
+        anomaly_model.AnomalyModel, anomaly_model.AnomalyModel.product_id == movement.product_id
+    ).filter(
+        product_model.Product.is_deleted == False,
+        anomaly_model.AnomalyModel.product_id.is_(None),
+        movement.status == "COMPLETED",
+        movement.created_at >= window_start,
+        movement.created_at <= scan_until
+    ).group_by(movement.product_id).having(func.count(movement.id) >= 10)
+
+    stale = db.query(anomaly_model.AnomalyModel.product_id).join(
+        product_model.Product, product_model.Product.id == anomaly_model.AnomalyModel.product_id
+    ).filter(
+        product_model.Product.is_deleted == False,
+        (anomaly_model.AnomalyModel.rows_since_training >= settings.ANOMALY_RETRAIN_ROWS)
+        | (anomaly_model.AnomalyModel.needs_retraining == True)
+    )
+    return [product_id for (product_id,) in untrained] + [product_id for (product_id,) in stale]
+
+
+def refresh_product_anomalies(db: Session, max_workers: int | None = None):
+    """
+    Drops the models of deleted products, scores new movements with the stored models,
+    then retrains the products that need it on a process pool, on their movements inside
+    the training window. Returns (scored, retrained) counts.
+    """
+    _drop_deleted_product_models(db)
+    scan_until = scan_horizon()
+    scored = _score_with_stored_models(db, scan_until)
+
+    window_start = training_window_start()
+    to_retrain = _products_to_retrain(db, scan_until, window_start)
+    if not to_retrain:
+        return scored, 0
+
+    retrained = 0
+    # Spawned: this process holds an open session and the engine's pooled connections
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=WORKER_CONTEXT) as pool:
+        for start in range(0, len(to_retrain), CHUNK_SIZE):
+            chunk = to_retrain[start:start + CHUNK_SIZE]
+            histories = _load_product_movements(db, chunk, scan_until, since=window_start)
+            futures = []
+            for product_id in chunk:
+                movements = histories.get(product_id, [])
+                if len(movements) < 10:
+                    # Too little recent history to train on: keep the current model
+                    db.query(anomaly_model.AnomalyModel).filter(
+                        anomaly_model.AnomalyModel.product_id == product_id
+                    ).update({"rows_since_training": 0, "needs_retraining": False}, synchronize_session=False)
+                    continue
+                _, _, change_quantity, _, created_at = zip(*movements)
+                futures.append(pool.submit(_train_product_model_job, product_id, change_quantity, created_at))
+
+            for future in as_completed(futures):
+                product_id, model_bytes, is_anomaly, scores = future.result()
+                movements = histories[product_id]
+                stored = db.get(anomaly_model.AnomalyModel, product_id)
+                if stored is None:
+                    stored = anomaly_model.AnomalyModel(product_id=product_id, version=0)
+                    db.add(stored)
+                stored.version += 1
+                stored.model = model_bytes
+                stored.trained_at = datetime.now(timezone.utc)
+                stored.training_rows = len(movements)
+                stored.training_anomaly_rate = float(is_anomaly.mean())
+                stored.scored_through, stored.scored_through_id = movements[-1][4], movements[-1][0]
+                stored.rows_since_training = 0
+                stored.needs_retraining = False
+
+                # The new version rescored the training window, so its flags replace the old
+                # ones there; older flags stay as the previous versions left them
+                db.query(anomaly_model.MovementAnomaly).filter(
+                    anomaly_model.MovementAnomaly.detector == PRODUCT_DETECTOR,
+                    anomaly_model.MovementAnomaly.product_id == product_id,
+                    anomaly_model.MovementAnomaly.created_at >= window_start
+                ).delete(synchronize_session=False)
+                rows = _flag_rows(PRODUCT_DETECTOR, movements, is_anomaly, scores)
+                if rows:
+                    db.execute(anomaly_model.MovementAnomaly.__table__.insert(), rows)
+                retrained += 1
+            db.commit()
+    return scored, retrained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loop", action="store_true", help="keep running, scanning new movements every --interval")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between passes with --loop")
+    parser.add_argument("--workers", type=int, default=None, help="retraining processes (default: one per core)")
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            scored, flagged = refresh_global_anomalies(db)
+            product_scored, retrained = refresh_product_anomalies(db, max_workers=args.workers)
+        if flagged or product_scored or retrained:
+            response_cache.invalidate_from_job(response_cache.ANOMALIES_SCOPE)
+        elapsed = time.perf_counter() - started
+        print(
+            f"Global: scored {scored} movements, flagged {flagged}. "
+            f"Per product: scored {product_scored} movements, retrained {retrained} models. "
+            f"Took {elapsed:.2f}s"
+        )
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# backend/jobs/apply_scheduled.py
+"""
+Scheduler for movements enqueued through POST /inventory/schedule.
+
+Each pass applies every due movement in batches of SCHEDULER_BATCH_SIZE, one transaction
+per batch (see crud_inventory.apply_due_movements). Due rows are claimed with
+FOR UPDATE SKIP LOCKED, so on PostgreSQL any number of these processes can run side by
+side. On SQLite, which has no row locks, run a single scheduler.
+
+The same loop can run inside the API process instead (SCHEDULER_IN_API), where the
+low-stock events and response cache invalidations of applied movements reach that
+process's clients. From a separate process the events are lost, and the invalidations
+only reach the API with RESPONSE_CACHE_BACKEND=sqlite; with "memory", cached responses
+show applied movements once they expire (RESPONSE_CACHE_TTL_SECONDS).
+
+    python -m jobs.apply_scheduled
+    python -m jobs.apply_scheduled --loop --interval 5
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+
+from config import settings
+from crud import crud_inventory
+from database import SessionLocal
+
+
+def apply_due(batch_size: int):
+    """Drains the due movements; returns how many were applied."""
+    # Movements that come due during the pass wait for the next one, so a steady stream
+    # of new schedules cannot keep a pass running forever
+    now = datetime.now(timezone.utc)
+    total = 0
+    with SessionLocal() as db:
+        while True:
+            applied = crud_inventory.apply_due_movements(db, batch_size=batch_size, now=now)
+            total += applied
+            if applied < batch_size:
+                return total
+
+
+async def run_in_api(batch_size: int, interval: float):
+    """
+    The scheduler loop for SCHEDULER_IN_API, run as a task of the API's event loop. The
+    passes run on a worker thread, and a failed pass is logged and retried next interval.
+    """
+    while True:
+        try:
+            await run_in_threadpool(apply_due, batch_size)
+        except Exception:
+            logging.getLogger(__name__).exception("Applying scheduled movements failed")
+        await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=settings.SCHEDULER_BATCH_SIZE)
+    parser.add_argument("--loop", action="store_true", help="keep running, applying due movements every --interval")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between passes with --loop")
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        applied = apply_due(args.batch_size)
+        elapsed = time.perf_counter() - started
+        if applied or not args.loop:
+            rate = applied / elapsed * 60 if elapsed > 0 else 0.0
+            print(f"Applied {applied} scheduled movements in {elapsed:.2f}s ({rate:.0f} movements/min)")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
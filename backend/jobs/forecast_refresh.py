@@ -0,0 +1,137 @@
+# backend/jobs/forecast_refresh.py
+"""
+Background refresh of the precomputed demand forecasts in `product_forecasts`.
+
+Prophet fitting is CPU-bound, so the fits run on a process pool (one worker per core by
+default) while the parent process does the database work. Only products whose sales
+watermark moved since their stored forecast ("dirty" products) are refitted unless a full
+refresh is requested.
+
+    python -m jobs.forecast_refresh                  # refresh dirty products once
+    python -m jobs.forecast_refresh --all            # refit every product
+    python -m jobs.forecast_refresh --loop --interval 300
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from config import settings
+from crud import crud_analytics
+from database import SessionLocal
+from forecast_pool import WORKER_CONTEXT
+from models import forecast as forecast_model, inventory as inventory_model, product as product_model
+import response_cache
+
+# Products whose histories are loaded and submitted to the pool at a time
+CHUNK_SIZE = 200
+
+
+def _fit_forecast_job(product_id, bucket_starts, demand, bucket):
+    """Runs in a worker process."""
+    return product_id, crud_analytics.fit_demand_forecast(bucket_starts, demand, bucket)
+
+
+def _find_dirty_products(db: Session, refresh_all: bool):
+    """Returns {product_id: (latest_sale, sale_count)} for the products that need a refit."""
+    sales_watermarks = db.query(
+        product_model.Product.id,
+        func.max(inventory_model.InventoryMovement.created_at),
+        func.count(inventory_model.InventoryMovement.id)
+    ).outerjoin(
+        inventory_model.InventoryMovement,
+        and_(
+            inventory_model.InventoryMovement.product_id == product_model.Product.id,
+            inventory_model.InventoryMovement.is_sale
+        )
+    ).filter(
+        product_model.Product.is_deleted == False
+    ).group_by(product_model.Product.id).all()
+
+    stored_watermarks = {} if refresh_all else {
+        row.product_id: (row.sales_watermark, row.sales_count)
+        for row in db.query(
+            forecast_model.ProductForecast.product_id,
+            forecast_model.ProductForecast.sales_watermark,
+            forecast_model.ProductForecast.sales_count
+        )
+    }
+
+    return {
+        product_id: (latest_sale, sale_count)
+        for product_id, latest_sale, sale_count in sales_watermarks
+        if stored_watermarks.get(product_id) != (latest_sale, sale_count)
+    }
+
+
+def refresh_forecasts(db: Session, max_workers: int | None = None, refresh_all: bool = False):
+    """
+    Refits the forecasts of dirty products (or of every product) and stores them.
+    Returns the number of products refreshed.
+    """
+    dirty = _find_dirty_products(db, refresh_all)
+    if not dirty:
+        return 0
+
+    product_ids = list(dirty)
+    bucket = settings.FORECAST_BUCKET
+    refreshed = 0
+    # Spawned: this process holds an open session and the engine's pooled connections
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=WORKER_CONTEXT) as pool:
+        for start in range(0, len(product_ids), CHUNK_SIZE):
+            chunk = product_ids[start:start + CHUNK_SIZE]
+            series = crud_analytics.load_demand_series(db, chunk, bucket)
+            futures = [
+                pool.submit(_fit_forecast_job, product_id, bucket_starts, demand, bucket)
+                for product_id, (bucket_starts, demand) in series.items()
+            ]
+            for future in as_completed(futures):
+                product_id, points = future.result()
+                if points is None:
+                    # Fitting failed; leave the product dirty so the next pass retries it
+                    continue
+                latest_sale, sale_count = dirty[product_id]
+                db.merge(forecast_model.ProductForecast(
+                    product_id=product_id,
+                    points=[
+                        {"timestamp": point["timestamp"].isoformat(), "quantity": point["quantity"]}
+                        for point in points
+                    ],
+                    sales_watermark=latest_sale,
+                    sales_count=sale_count,
+                    computed_at=datetime.now(timezone.utc)
+                ))
+                refreshed += 1
+            db.commit()
+    if refreshed:
+        response_cache.invalidate_from_job(response_cache.FORECASTS_SCOPE)
+    return refreshed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="refit every product, not only dirty ones")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--loop", action="store_true", help="keep running, refreshing dirty products every --interval")
+    parser.add_argument("--interval", type=float, default=300, help="seconds between passes with --loop")
+    args = parser.parse_args()
+
+    refresh_all = args.all
+    while True:
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            refreshed = refresh_forecasts(db, max_workers=args.workers, refresh_all=refresh_all)
+        elapsed = time.perf_counter() - started
+        rate = refreshed / elapsed if elapsed > 0 else 0.0
+        print(f"Refreshed {refreshed} forecasts in {elapsed:.2f}s ({rate:.1f} products/s)")
+        if not args.loop:
+            break
+        refresh_all = False
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/jobs/movement_retention.py
+"""
+Keeps the movement ledger bounded.
+
+Each pass archives, oldest first, every month older than MOVEMENT_RETENTION_MONTHS: its
+rows go to a gzip CSV file under MOVEMENT_ARCHIVE_DIR, its completed movements become
+per-product daily rollups, and the raw rows are dropped (with the month's partition on
+PostgreSQL). See crud_ledger. A month still inside the anomaly training window is kept,
+and archiving stops at a month that still holds scheduled movements, so the archived
+months stay contiguous. On a partitioned ledger the pass also creates the partitions of
+the current month and the MOVEMENT_PARTITIONS_AHEAD months after it.
+
+    python -m jobs.movement_retention
+    python -m jobs.movement_retention --dry-run
+    python -m jobs.movement_retention --loop --interval 86400
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from crud import crud_ledger
+from database import SessionLocal
+# Registers the tables the ledger and the rollups reference
+from models import product as product_model, user as user_model  # noqa: F401
+import response_cache
+
+
+def archive_cutoff(now: datetime):
+    """Months starting before this are archived."""
+    retention = crud_ledger.month_start(now, -settings.MOVEMENT_RETENTION_MONTHS)
+    # The anomaly detectors train on raw movements
+    training = crud_ledger.month_start(now - timedelta(days=settings.ANOMALY_TRAINING_WINDOW_DAYS))
+    return min(retention, training)
+
+
+def ensure_partitions(now: datetime):
+    """Creates the missing partitions of the coming months; returns how many."""
+    with SessionLocal() as db:
+        if not crud_ledger.is_partitioned(db):
+            return 0
+        created = sum(
+            crud_ledger.ensure_partition(db, crud_ledger.month_start(now, months))
+            for months in range(settings.MOVEMENT_PARTITIONS_AHEAD + 1)
+        )
+        db.commit()
+    return created
+
+
+def archive_due_months(now: datetime, dry_run: bool = False):
+    """Archives the due months; returns [(month, rows)] archived (or due, with dry_run)."""
+    cutoff = archive_cutoff(now)
+    archived = []
+    with SessionLocal() as db:
+        month = crud_ledger.oldest_unarchived_month(db)
+        while month is not None and month < cutoff:
+            following = crud_ledger.month_start(month, 1)
+            if crud_ledger.has_scheduled_movements(db, month, following):
+                print(f"Stopping at {month:%Y-%m}: it still holds scheduled movements")
+                break
+            if dry_run:
+                archived.append((month, None))
+            else:
+                archived.append((month, crud_ledger.archive_month(db, month, settings.MOVEMENT_ARCHIVE_DIR)))
+            month = following
+    if archived and not dry_run:
+        # Histories over the archived months now come from the rollups
+        response_cache.invalidate_from_job(response_cache.CATALOG_SCOPE, response_cache.PRODUCTS_SCOPE)
+    return archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only list the months that are due")
+    parser.add_argument("--loop", action="store_true", help="keep running, checking for due months every --interval")
+    parser.add_argument("--interval", type=float, default=86400, help="seconds between passes with --loop")
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        partitions = 0 if args.dry_run else ensure_partitions(now)
+        archived = archive_due_months(now, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - started
+        for month, rows in archived:
+            print(f"{month:%Y-%m}: " + ("due" if rows is None else f"archived {rows} movements"))
+        verb = "found" if args.dry_run else "archived"
+        print(f"Created {partitions} partitions, {verb} {len(archived)} due months in {elapsed:.2f}s")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
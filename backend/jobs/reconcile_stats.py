@@ -0,0 +1,37 @@
+# backend/jobs/reconcile_stats.py
+"""
+Consistency check for the maintained dashboard counters in `stock_stats`.
+
+Recomputes the counters from the products table and reports any drift. Exits with
+status 1 when drift is found, so it can run from cron or CI.
+
+    python -m jobs.reconcile_stats          # report only
+    python -m jobs.reconcile_stats --fix    # report and overwrite the stored counters
+"""
+import argparse
+import sys
+
+from crud import crud_stats
+from database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="overwrite the stored counters with the recomputed ones")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        drift = crud_stats.reconcile_stock_stats(db, fix=args.fix)
+
+    if not drift:
+        print("Stock stats are consistent")
+        return
+    for name, (stored, actual) in drift.items():
+        print(f"{name}: stored={stored} actual={actual}")
+    if args.fix:
+        print("Stored counters were overwritten with the recomputed values")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
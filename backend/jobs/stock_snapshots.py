@@ -0,0 +1,77 @@
+# backend/jobs/stock_snapshots.py
+"""
+Writes the stock checkpoints behind GET /analytics/stock-as-of.
+
+Each pass writes a checkpoint at every STOCK_SNAPSHOT_INTERVAL_HOURS boundary (UTC,
+aligned to midnight) since the latest stored one. Each checkpoint is computed from its
+predecessor plus the movements in between (see crud_snapshots). On the first run only
+the most recent boundary is written unless --since asks for a backfill. Boundaries
+less than STOCK_SNAPSHOT_LAG_MINUTES old are left for the next pass, so transactions
+still in flight at the boundary are included. Boundaries inside days already archived by
+jobs.movement_retention get no checkpoint, except midnights.
+
+    python -m jobs.stock_snapshots
+    python -m jobs.stock_snapshots --loop --interval 3600
+    python -m jobs.stock_snapshots --since 2026-01-01
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from crud import crud_snapshots
+from crud.crud_analytics import HISTORY_BUCKET_ANCHOR
+from database import SessionLocal, as_utc
+
+
+def due_boundaries(latest: datetime | None, since: datetime | None, now: datetime):
+    """Checkpoint times to write, oldest first."""
+    interval = settings.STOCK_SNAPSHOT_INTERVAL_HOURS * 3600
+    # Aligned like the historical buckets, so daily checkpoints fall on midnight UTC
+    limit = (now - timedelta(minutes=settings.STOCK_SNAPSHOT_LAG_MINUTES)).timestamp()
+    last = (limit - HISTORY_BUCKET_ANCHOR) // interval * interval + HISTORY_BUCKET_ANCHOR
+    if since is not None:
+        first = -((HISTORY_BUCKET_ANCHOR - since.timestamp()) // interval) * interval + HISTORY_BUCKET_ANCHOR
+    elif latest is not None:
+        first = latest.timestamp() + interval
+    else:
+        first = last
+    return [
+        datetime.fromtimestamp(boundary, tz=timezone.utc)
+        for boundary in range(int(first), int(last) + 1, interval)
+    ]
+
+
+def take_due_snapshots(since: datetime | None = None):
+    """Writes the due checkpoints; returns (checkpoints, rows) written."""
+    checkpoints = rows = 0
+    with SessionLocal() as db:
+        latest = crud_snapshots.latest_snapshot_at(db)
+        for snapshot_at in due_boundaries(latest, since, datetime.now(timezone.utc)):
+            rows += crud_snapshots.take_snapshot(db, snapshot_at)
+            checkpoints += 1
+    return checkpoints, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="also write (or rewrite) every checkpoint from this date on")
+    parser.add_argument("--loop", action="store_true", help="keep running, checking for due checkpoints every --interval")
+    parser.add_argument("--interval", type=float, default=3600, help="seconds between passes with --loop")
+    args = parser.parse_args()
+
+    since = as_utc(args.since)
+    while True:
+        started = time.perf_counter()
+        checkpoints, rows = take_due_snapshots(since)
+        elapsed = time.perf_counter() - started
+        print(f"Wrote {checkpoints} checkpoints ({rows} product rows) in {elapsed:.2f}s")
+        if not args.loop:
+            break
+        since = None
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
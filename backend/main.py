@@ -1,10 +1,18 @@
 # In backend/main.py
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from database import engine
-from models import product, user, inventory
+from models import product, user, inventory, forecast, anomaly, stats, snapshot, rollup
 from api import routes
+from crud import crud_analytics
+from config import settings
+from password_hashing import PasswordHashingBusy, password_hasher
+from response_cache import response_cache
+import metrics
 from datetime import datetime
 
 def custom_json_encoder(obj):
@@ -13,8 +21,20 @@ def custom_json_encoder(obj):
     from pydantic.json import pydantic_encoder
     return pydantic_encoder(obj)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler = None
+    if settings.SCHEDULER_IN_API:
+        from jobs.apply_scheduled import run_in_api
+        scheduler = asyncio.create_task(
+            run_in_api(settings.SCHEDULER_BATCH_SIZE, settings.SCHEDULER_INTERVAL_SECONDS)
+        )
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+
 # Create the FastAPI app
-app = FastAPI(title="Smart Inventory Manager API")
+app = FastAPI(title="Smart Inventory Manager API", lifespan=lifespan)
 
 # This logic checks your FastAPI version and applies the correct setting.
 try:
@@ -28,10 +48,27 @@ except ImportError:
 
 
 
+if settings.ANALYTICS_PRELOAD:
+    crud_analytics.preload()
+
 # Create all tables
 product.Base.metadata.create_all(bind=engine)
 user.Base.metadata.create_all(bind=engine)
 inventory.Base.metadata.create_all(bind=engine)
+forecast.Base.metadata.create_all(bind=engine)
+anomaly.Base.metadata.create_all(bind=engine)
+stats.Base.metadata.create_all(bind=engine)
+snapshot.Base.metadata.create_all(bind=engine)
+rollup.Base.metadata.create_all(bind=engine)
+
+@app.exception_handler(PasswordHashingBusy)
+def password_hashing_busy(request: Request, exc: PasswordHashingBusy):
+    # The bcrypt pool is saturated (e.g. a login storm): shed load instead of queueing
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many concurrent sign-ins, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 origins = [
     "http://localhost:3000",
@@ -42,8 +79,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Forecast-Computed-At", "X-Next-Cursor", "X-Snapshot-At", "X-Effective-At", "ETag"],
 )
-app.include_router(routes.router)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+def _component_metrics():
+    # Components that keep their own counters, reported at scrape time
+    hashing = password_hasher.stats()
+    cache = response_cache.stats()
+    return [
+        ("password_hash_running", "gauge", "bcrypt jobs running.", [({}, hashing["running"])]),
+        ("password_hash_queued", "gauge", "bcrypt jobs waiting for a worker.", [({}, hashing["queued"])]),
+        ("password_hash_completed_total", "counter", "bcrypt jobs completed.", [({}, hashing["completed"])]),
+        ("password_hash_rejected_total", "counter", "Sign-ins shed with a 503.", [({}, hashing["rejected"])]),
+        ("password_hash_seconds_total", "counter", "Time spent hashing.", [({}, hashing["hash_seconds_total"])]),
+        ("response_cache_lookups_total", "counter", "Response cache lookups by result.", [
+            ({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])
+        ]),
+        ("response_cache_not_modified_total", "counter", "Responses answered with a 304.", [
+            ({}, cache["not_modified"])
+        ]),
+    ]
+
+metrics.registry.add_collector(metrics.pool_collector(engine))
+metrics.registry.add_collector(metrics.process_collector)
+metrics.registry.add_collector(_component_metrics)
+
+if settings.DB_ASYNC_MODE:
+    # Serve the product, user and inventory routes from the async handlers
+    from api import async_routes
+    app.include_router(async_routes.with_async_routes(routes.router))
+else:
+    app.include_router(routes.router)
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Smart Inventory Manager API"}
\ No newline at end of file
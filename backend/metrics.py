@@ -0,0 +1,307 @@
+# backend/metrics.py
+"""
+Process-local instrumentation, rendered in the Prometheus text format at GET /metrics.
+
+- MetricsMiddleware times every request per route template and reports how many SQL
+  statements it ran and how long they took (SQLAlchemy cursor events on every Engine).
+- timed_pool_class() wraps a pool class so connection checkout wait is measured.
+- span() times a block of work, e.g. a Prophet fit or an IsolationForest fit.
+
+Each API worker process keeps its own numbers; Prometheus sums them across targets.
+"""
+import bisect
+import contextvars
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SPAN_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yields (name, labels, value) tuples."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (last one is +Inf), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    """
+    Metrics owned by this module plus collectors: callables returning
+    [(name, type, documentation, [(labels, value), ...]), ...] at scrape time, for
+    components that already keep their own counters.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(
+                f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in metric.samples()
+            )
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template.",
+    ("method", "route", "status")
+))
+request_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request.",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+))
+request_query_seconds = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.",
+    ("method", "route")
+))
+query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of every SQL statement run by this process."
+))
+pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, including opening a new one."
+))
+span_duration = registry.register(Histogram(
+    "span_duration_seconds", "Duration of instrumented work such as model fits.",
+    ("span",), buckets=SPAN_BUCKETS
+))
+span_failures = registry.register(Counter(
+    "span_failures_total", "Instrumented blocks that raised.", ("span",)
+))
+movement_batch_size = registry.register(Histogram(
+    "inventory_move_batch_size", "Single movements applied per combined write (MOVEMENT_COMBINING).",
+    buckets=BATCH_SIZE_BUCKETS
+))
+
+
+class _RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+# Set by the middleware for the duration of a request. Sync routes run in the threadpool
+# with a copy of the context, which still points at the same stats object.
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    query_duration.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def timed_pool_class(pool_class):
+    """Subclass of `pool_class` that records how long each checkout waited."""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                pool_checkout_wait.observe(time.perf_counter() - started)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+def pool_collector(engine):
+    """Collector reporting the engine's current pool occupancy (QueuePool and subclasses)."""
+
+    def collect():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            return []
+        return [
+            ("db_pool_size", "gauge", "Configured pool size.", [({}, pool.size())]),
+            ("db_pool_checked_out", "gauge", "Connections currently in use.", [({}, pool.checkedout())]),
+            ("db_pool_overflow", "gauge", "Connections open beyond the pool size.", [({}, pool.overflow())]),
+        ]
+
+    return collect
+
+
+def resident_memory_bytes() -> int:
+    """Current RSS of this process (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KiB on Linux
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def process_collector():
+    """Memory of this worker, and whether it has loaded the analytics engines yet."""
+    return [
+        ("process_resident_memory_bytes", "gauge", "Resident memory of this process.",
+         [({}, resident_memory_bytes())]),
+        ("analytics_engines_loaded", "gauge", "1 once pandas/Prophet/scikit-learn are imported.",
+         [({}, int("prophet" in sys.modules or "sklearn" in sys.modules))]),
+    ]
+
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block as span_duration_seconds{span=name}."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        span_failures.inc(span=name)
+        raise
+    finally:
+        span_duration.observe(time.perf_counter() - started, span=name)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware (not BaseHTTPMiddleware, so streamed responses pass straight through)
+    recording latency and SQL statements per request. Requests are labelled with the
+    matched route template, never the raw path, to keep the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            request_duration.observe(elapsed, method=method, route=route, status=status_code)
+            request_queries.observe(stats.queries, method=method, route=route)
+            request_query_seconds.observe(stats.query_seconds, method=method, route=route)
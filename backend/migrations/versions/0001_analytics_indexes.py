@@ -0,0 +1,70 @@
+"""Indexes for the analytics and product listing query patterns
+
+Tables are created by the API on startup (Base.metadata.create_all); migrations carry the
+schema changes create_all cannot apply to an existing database, starting with these
+composite, partial and expression indexes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Historical / scheduled series: product_id + status, ordered by created_at
+    op.create_index(
+        "ix_inventory_movements_product_status_created_at",
+        "inventory_movements",
+        ["product_id", "status", "created_at"],
+        if_not_exists=True,
+    )
+    # Sales only (forecast series and watermark): product_id, ordered by created_at
+    op.create_index(
+        "ix_inventory_movements_sales",
+        "inventory_movements",
+        ["product_id", "created_at"],
+        postgresql_where=sa.text("change_quantity < 0"),
+        sqlite_where=sa.text("change_quantity < 0"),
+        if_not_exists=True,
+    )
+    # Ledger-wide scans in (created_at, id) order (anomaly scan, training window)
+    op.create_index(
+        "ix_inventory_movements_created_at_id",
+        "inventory_movements",
+        ["created_at", "id"],
+        if_not_exists=True,
+    )
+    # Product listing: non-deleted rows ordered by name (id breaks ties)
+    op.create_index(
+        "ix_products_active_name",
+        "products",
+        ["name", "id"],
+        postgresql_where=sa.text("is_deleted = false"),
+        sqlite_where=sa.text("is_deleted = 0"),
+        if_not_exists=True,
+    )
+    # Low-stock lookups: only products below their reorder point, largest shortfall first
+    op.create_index(
+        "ix_products_low_stock",
+        "products",
+        [sa.text("(reorder_point - quantity_on_hand) DESC"), "id"],
+        postgresql_where=sa.text("is_deleted = false AND quantity_on_hand < reorder_point"),
+        sqlite_where=sa.text("is_deleted = 0 AND quantity_on_hand < reorder_point"),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_products_low_stock", table_name="products", if_exists=True)
+    op.drop_index("ix_products_active_name", table_name="products", if_exists=True)
+    op.drop_index("ix_inventory_movements_created_at_id", table_name="inventory_movements", if_exists=True)
+    op.drop_index("ix_inventory_movements_sales", table_name="inventory_movements", if_exists=True)
+    op.drop_index("ix_inventory_movements_product_status_created_at", table_name="inventory_movements", if_exists=True)
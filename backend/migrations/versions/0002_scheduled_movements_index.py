@@ -0,0 +1,33 @@
+"""Partial index for picking up due scheduled movements
+
+The scheduler (jobs/apply_scheduled.py) repeatedly asks for the oldest movements with
+status 'SCHEDULED' whose created_at has passed. Indexing only those rows keeps the index
+as small as the backlog of pending movements, however long the ledger grows.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_inventory_movements_scheduled_due",
+        "inventory_movements",
+        ["created_at", "id"],
+        postgresql_where=sa.text("status = 'SCHEDULED'"),
+        sqlite_where=sa.text("status = 'SCHEDULED'"),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_inventory_movements_scheduled_due", table_name="inventory_movements", if_exists=True)
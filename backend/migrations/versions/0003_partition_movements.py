@@ -0,0 +1,158 @@
+"""Partition inventory_movements by created_at month (PostgreSQL)
+
+The ledger becomes a range-partitioned table with one partition per month, from the
+month of its oldest row to MOVEMENT_PARTITIONS_AHEAD months ahead, plus a default
+partition for anything outside them (e.g. movements scheduled far ahead). Queries with a
+time range only touch the months they cover, and jobs/movement_retention.py archives a
+month by dropping its partition. It also creates the partitions of the coming months.
+
+A partitioned table's primary key has to include the partition key, so the key becomes
+(id, created_at); ids stay unique on their own since they are generated time-ordered
+(UUIDv7). The rows are copied over and the indexes of 0001/0002 recreated on the new
+table, where PostgreSQL maintains them per partition.
+
+SQLite keeps the plain table: the retention job deletes the archived rows instead.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from config import settings
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = "id, product_id, user_id, change_quantity, new_quantity_on_hand, reason, status, created_at"
+
+
+def _copy_columns(bind, source):
+    """
+    Columns to copy from `source`. A table created by a newer main.py (create_all) already
+    has scheduled_for (see 0005); its pending scheduled times must survive the copy.
+    """
+    columns = {column["name"] for column in sa.inspect(bind).get_columns(source)}
+    return _COLUMNS + (", scheduled_for" if "scheduled_for" in columns else "")
+
+
+def _month_start(value, months=0):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_indexes():
+    # Same definitions as 0001 and 0002, now on the partitioned parent
+    op.create_index(
+        "ix_inventory_movements_product_status_created_at",
+        "inventory_movements",
+        ["product_id", "status", "created_at"],
+    )
+    op.create_index(
+        "ix_inventory_movements_sales",
+        "inventory_movements",
+        ["product_id", "created_at"],
+        postgresql_where=sa.text("change_quantity < 0"),
+    )
+    op.create_index("ix_inventory_movements_created_at_id", "inventory_movements", ["created_at", "id"])
+    op.create_index(
+        "ix_inventory_movements_scheduled_due",
+        "inventory_movements",
+        ["created_at", "id"],
+        postgresql_where=sa.text("status = 'SCHEDULED'"),
+    )
+
+
+def _relkind(bind):
+    return bind.exec_driver_sql("SELECT relkind FROM pg_class WHERE oid = to_regclass('inventory_movements')").scalar()
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or _relkind(bind) == "p":
+        return
+
+    # Index and constraint names are schema-wide; free them for the new table
+    op.execute("ALTER TABLE inventory_movements RENAME TO inventory_movements_unpartitioned")
+    op.execute("ALTER INDEX inventory_movements_pkey RENAME TO inventory_movements_unpartitioned_pkey")
+    for index in (
+        "ix_inventory_movements_product_status_created_at", "ix_inventory_movements_sales",
+        "ix_inventory_movements_created_at_id", "ix_inventory_movements_scheduled_due",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute("""
+        CREATE TABLE inventory_movements (
+            id UUID NOT NULL,
+            product_id UUID NOT NULL REFERENCES products (id),
+            user_id UUID NOT NULL REFERENCES users (id),
+            change_quantity INTEGER NOT NULL,
+            new_quantity_on_hand INTEGER NOT NULL,
+            reason VARCHAR,
+            status VARCHAR NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            scheduled_for TIMESTAMP WITH TIME ZONE NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    now = datetime.now(timezone.utc)
+    oldest = bind.exec_driver_sql("SELECT min(created_at) FROM inventory_movements_unpartitioned").scalar()
+    month = _month_start(oldest if oldest is not None and oldest < now else now)
+    last = _month_start(now, settings.MOVEMENT_PARTITIONS_AHEAD)
+    while month <= last:
+        following = _month_start(month, 1)
+        op.execute(
+            f"CREATE TABLE inventory_movements_y{month.year}m{month.month:02d} PARTITION OF inventory_movements "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+    op.execute("CREATE TABLE inventory_movements_default PARTITION OF inventory_movements DEFAULT")
+
+    columns = _copy_columns(bind, "inventory_movements_unpartitioned")
+    op.execute(
+        f"INSERT INTO inventory_movements ({columns}) SELECT {columns} FROM inventory_movements_unpartitioned"
+    )
+    op.execute("DROP TABLE inventory_movements_unpartitioned")
+    # Built after the copy, which is faster than maintaining them row by row
+    _create_indexes()
+    op.execute("ANALYZE inventory_movements")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or _relkind(bind) != "p":
+        return
+
+    op.execute("ALTER TABLE inventory_movements RENAME TO inventory_movements_partitioned")
+    for index in (
+        "ix_inventory_movements_product_status_created_at", "ix_inventory_movements_sales",
+        "ix_inventory_movements_created_at_id", "ix_inventory_movements_scheduled_due",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+    op.execute("ALTER INDEX inventory_movements_pkey RENAME TO inventory_movements_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE inventory_movements (
+            id UUID PRIMARY KEY,
+            product_id UUID NOT NULL REFERENCES products (id),
+            user_id UUID NOT NULL REFERENCES users (id),
+            change_quantity INTEGER NOT NULL,
+            new_quantity_on_hand INTEGER NOT NULL,
+            reason VARCHAR,
+            status VARCHAR NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            scheduled_for TIMESTAMP WITH TIME ZONE NULL
+        )
+    """)
+    columns = _copy_columns(bind, "inventory_movements_partitioned")
+    op.execute(
+        f"INSERT INTO inventory_movements ({columns}) SELECT {columns} FROM inventory_movements_partitioned"
+    )
+    # Drops every partition with it
+    op.execute("DROP TABLE inventory_movements_partitioned")
+    _create_indexes()
@@ -0,0 +1,87 @@
+"""Indexes for product search (GET /products/search)
+
+Prefix matches on SKU and name read expression indexes on lower(sku) and lower(name).
+They are in "C" collation on PostgreSQL, where a prefix is a plain key range. Substring
+and fuzzy matches over sku, name and description read a trigram index: pg_trgm (GiST,
+which also returns nearest matches first) on PostgreSQL, and an FTS5 table with the
+trigram tokenizer on SQLite. The FTS5 table is an external-content table over
+`products`, kept in step by triggers.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Must match crud_product._search_document()
+SEARCH_DOCUMENT = "(lower(sku) || ' ' || lower(name) || ' ' || lower(coalesce(description, '')))"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in ("sku", "name"):
+            op.execute(
+                f'CREATE INDEX IF NOT EXISTS ix_products_search_{column} ON products '
+                f'((lower({column}) COLLATE "C"), id) WHERE is_deleted = false'
+            )
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_products_search_trgm ON products "
+            f"USING gist ({SEARCH_DOCUMENT} gist_trgm_ops) WHERE is_deleted = false"
+        )
+        return
+
+    for column in ("sku", "name"):
+        op.create_index(
+            f"ix_products_search_{column}",
+            "products",
+            [sa.text(f"lower({column})"), "id"],
+            sqlite_where=sa.text("is_deleted = 0"),
+            if_not_exists=True,
+        )
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_search USING fts5("
+        "sku, name, description, content='products', content_rowid='rowid', tokenize='trigram')"
+    )
+    op.execute("INSERT INTO products_search (products_search) VALUES ('rebuild')")
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_search_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_search (rowid, sku, name, description)
+            VALUES (new.rowid, new.sku, new.name, new.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_search_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_search (products_search, rowid, sku, name, description)
+            VALUES ('delete', old.rowid, old.sku, old.name, old.description);
+        END
+    """)
+    # Only the searched columns: stock updates never touch the search index
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_search_update AFTER UPDATE OF sku, name, description ON products BEGIN
+            INSERT INTO products_search (products_search, rowid, sku, name, description)
+            VALUES ('delete', old.rowid, old.sku, old.name, old.description);
+            INSERT INTO products_search (rowid, sku, name, description)
+            VALUES (new.rowid, new.sku, new.name, new.description);
+        END
+    """)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_products_search_trgm")
+    else:
+        for trigger in ("products_search_insert", "products_search_delete", "products_search_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_search")
+    op.drop_index("ix_products_search_name", table_name="products", if_exists=True)
+    op.drop_index("ix_products_search_sku", table_name="products", if_exists=True)
@@ -0,0 +1,56 @@
+"""Keep the scheduled time of a movement in its own column
+
+Scheduled movements used to carry their scheduled time in created_at and kept it once
+applied, which put ledger rows in the past. `scheduled_for` now holds the requested time
+and created_at is the time of recording (of applying, once the scheduler has run). The
+scheduler's partial index moves to (scheduled_for, id).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("inventory_movements")}
+    if "scheduled_for" not in columns:
+        op.add_column("inventory_movements", sa.Column("scheduled_for", sa.DateTime(timezone=True), nullable=True))
+        # Pending movements from before the column: created_at still holds their scheduled
+        # time. A table that already had the column (create_all) has created_at as the
+        # recording time, so copying it would make every pending movement due at once.
+        op.execute(
+            "UPDATE inventory_movements SET scheduled_for = created_at "
+            "WHERE status = 'SCHEDULED' AND scheduled_for IS NULL"
+        )
+    op.drop_index("ix_inventory_movements_scheduled_due", table_name="inventory_movements", if_exists=True)
+    op.create_index(
+        "ix_inventory_movements_scheduled_due",
+        "inventory_movements",
+        ["scheduled_for", "id"],
+        postgresql_where=sa.text("status = 'SCHEDULED'"),
+        sqlite_where=sa.text("status = 'SCHEDULED'"),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_inventory_movements_scheduled_due", table_name="inventory_movements", if_exists=True)
+    op.execute("UPDATE inventory_movements SET created_at = scheduled_for WHERE status = 'SCHEDULED'")
+    op.create_index(
+        "ix_inventory_movements_scheduled_due",
+        "inventory_movements",
+        ["created_at", "id"],
+        postgresql_where=sa.text("status = 'SCHEDULED'"),
+        sqlite_where=sa.text("status = 'SCHEDULED'"),
+        if_not_exists=True,
+    )
+    with op.batch_alter_table("inventory_movements") as batch:
+        batch.drop_column("scheduled_for")
@@ -0,0 +1,54 @@
+# backend/models/anomaly.py
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Index, LargeBinary, Boolean, func
+from sqlalchemy.dialects.postgresql import UUID
+from database import Base
+
+class MovementAnomaly(Base):
+    __tablename__ = "movement_anomalies"
+
+    # Which detector flagged the movement: "global" for the catalog-wide scan,
+    # "product" for the per-product models in AnomalyModel
+    detector = Column(String, primary_key=True)
+    # No foreign key: flags are kept even if the raw movement is archived later
+    movement_id = Column(UUID(as_uuid=True), primary_key=True)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
+    change_quantity = Column(Integer, nullable=False)
+    reason = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    score = Column(Float, nullable=False)
+    detected_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Newest-first pages per detector
+        Index("ix_movement_anomalies_detector_created_at", "detector", "created_at"),
+        # A product's flags, newest first
+        Index("ix_movement_anomalies_product_detector_created_at", "product_id", "detector", "created_at"),
+    )
+
+class AnomalyScanState(Base):
+    __tablename__ = "anomaly_scan_state"
+
+    detector = Column(String, primary_key=True)
+    # (created_at, id) of the newest movement scored so far
+    scanned_through = Column(DateTime(timezone=True), nullable=True)
+    scanned_through_id = Column(UUID(as_uuid=True), nullable=True)
+
+class AnomalyModel(Base):
+    __tablename__ = "anomaly_models"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), primary_key=True)
+    # Bumped on every retrain; flags from older versions are replaced
+    version = Column(Integer, default=1, nullable=False)
+    trained_at = Column(DateTime(timezone=True), nullable=False)
+    training_rows = Column(Integer, nullable=False)
+    # Share of the training rows the model flagged; scoring batches well above it signal drift
+    training_anomaly_rate = Column(Float, nullable=False)
+    # (created_at, id) of the newest movement scored with this model
+    scored_through = Column(DateTime(timezone=True), nullable=False)
+    scored_through_id = Column(UUID(as_uuid=True), nullable=False)
+    rows_since_training = Column(Integer, default=0, nullable=False)
+    # Set when a scoring batch drifted; the next refresh retrains the model
+    needs_retraining = Column(Boolean, default=False, nullable=False)
+    # Pickled IsolationForest. Only loaded for the products being scored: the queries that
+    # pick products to score or retrain select product_id alone.
+    model = Column(LargeBinary, nullable=False)
@@ -0,0 +1,15 @@
+# backend/models/forecast.py
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from database import Base
+
+class ProductForecast(Base):
+    __tablename__ = "product_forecasts"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), primary_key=True)
+    # Forecast points as [{"timestamp": iso8601, "quantity": int}, ...]
+    points = Column(JSON, nullable=False)
+    # Sales watermark (latest sale timestamp and sale count) the forecast was fitted on
+    sales_watermark = Column(DateTime(timezone=True), nullable=True)
+    sales_count = Column(Integer, default=0, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,17 +1,44 @@
 # backend/models/inventory.py
-import uuid
-from sqlalchemy import Column, Integer, String, ForeignKey, func, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, and_, func, DateTime, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.dialects.postgresql import UUID
 from database import Base
+from ids import uuid7
 
 class InventoryMovement(Base):
     __tablename__ = "inventory_movements"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Time-ordered ids: new rows append to the primary key index. On PostgreSQL the table
+    # is partitioned by created_at month and its primary key is (id, created_at); see
+    # migration 0003.
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     change_quantity = Column(Integer, nullable=False)
     new_quantity_on_hand = Column(Integer, nullable=False)
     reason = Column(String, nullable=True)
     status = Column(String, default='COMPLETED', nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    # When the movement was recorded; for a scheduled one, when it was applied
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Only set on movements made through POST /inventory/schedule
+    scheduled_for = Column(DateTime(timezone=True), nullable=True)
+
+    @hybrid_property
+    def is_sale(self):
+        # Scheduled (not yet applied) and cancelled movements are not sales
+        return self.change_quantity < 0 and self.status == 'COMPLETED'
+
+    @is_sale.expression
+    def is_sale(cls):
+        # Rendered as a literal rather than a bound parameter so the planner can match
+        # the partial index on sales (WHERE change_quantity < 0)
+        return and_(cls.change_quantity < literal_column("0"), cls.status == 'COMPLETED')
+
+    @hybrid_property
+    def is_scheduled(self):
+        return self.status == 'SCHEDULED'
+
+    @is_scheduled.expression
+    def is_scheduled(cls):
+        # Literal for the same reason: matches the partial index on scheduled movements
+        return cls.status == literal_column("'SCHEDULED'")
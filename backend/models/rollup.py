@@ -0,0 +1,37 @@
+# backend/models/rollup.py
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID
+from database import Base
+
+class MovementDailyRollup(Base):
+    """
+    A product's completed movements on one UTC day, for the months whose raw rows were
+    archived by jobs/movement_retention.py. Holds what the analytics read from the
+    ledger: the net change, the units sold, and the stock level at the end of the day
+    and at its lowest and highest point (with the times they were reached).
+    """
+    __tablename__ = "movement_daily_rollups"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), primary_key=True)
+    day = Column(DateTime(timezone=True), primary_key=True)
+    movement_count = Column(Integer, nullable=False)
+    net_change = Column(Integer, nullable=False)
+    sales_quantity = Column(Integer, nullable=False)
+    sales_count = Column(Integer, nullable=False)
+    closing_quantity = Column(Integer, nullable=False)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+    min_quantity = Column(Integer, nullable=False)
+    min_at = Column(DateTime(timezone=True), nullable=False)
+    max_quantity = Column(Integer, nullable=False)
+    max_at = Column(DateTime(timezone=True), nullable=False)
+
+class MovementArchive(Base):
+    """One archived month of the ledger: its rows are in `path` and its rollups above."""
+    __tablename__ = "movement_archives"
+
+    # First instant of the month (UTC); months are archived oldest first, so the newest
+    # one marks the archive horizon
+    month = Column(DateTime(timezone=True), primary_key=True)
+    row_count = Column(Integer, nullable=False)
+    path = Column(String, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
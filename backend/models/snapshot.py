@@ -0,0 +1,17 @@
+# backend/models/snapshot.py
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from database import Base
+
+class StockSnapshot(Base):
+    """
+    Quantity on hand of every product at a checkpoint, written by jobs/stock_snapshots.py.
+    Products with nothing on hand are left out, so a checkpoint only holds stocked SKUs.
+    """
+    __tablename__ = "stock_snapshots"
+
+    # Leading primary key column: finding the nearest checkpoint and reading all of its
+    # rows are both range scans of the primary key
+    snapshot_at = Column(DateTime(timezone=True), primary_key=True)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), primary_key=True)
+    quantity_on_hand = Column(Integer, nullable=False)
@@ -0,0 +1,12 @@
+# backend/models/stats.py
+from sqlalchemy import Column, Integer, DateTime, func
+from database import Base
+
+class StockStats(Base):
+    """Single-row table of dashboard counters, kept up to date by the product and inventory CRUD."""
+    __tablename__ = "stock_stats"
+
+    id = Column(Integer, primary_key=True)
+    total_products = Column(Integer, default=0, nullable=False)
+    low_stock_items = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
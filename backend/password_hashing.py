@@ -0,0 +1,83 @@
+# backend/password_hashing.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool already has its maximum number of pending jobs."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt work on a small dedicated thread pool (bcrypt releases the GIL), so a burst
+    of logins queues here instead of occupying the threads that serve every other request.
+    At most `max_pending` jobs (running plus queued) are accepted; further calls fail
+    immediately with PasswordHashingBusy so the API can answer 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._hash_seconds_total = 0.0
+        self._hash_seconds_max = 0.0
+        self._wait_seconds_total = 0.0
+
+    def _timed(self, submitted_at, fn, args):
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_seconds_total += started_at - submitted_at
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._hash_seconds_total += elapsed
+                self._hash_seconds_max = max(self._hash_seconds_max, elapsed)
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHashingBusy()
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._timed, time.perf_counter(), fn, args)
+            return await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        """Queue depth and latency counters (seconds) since the process started."""
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "hash_seconds_total": self._hash_seconds_total,
+                "hash_seconds_avg": self._hash_seconds_total / completed if completed else 0.0,
+                "hash_seconds_max": self._hash_seconds_max,
+                "wait_seconds_avg": self._wait_seconds_total / completed if completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
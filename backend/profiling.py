@@ -0,0 +1,71 @@
+# backend/profiling.py
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for a running API process. While started, a background
+    thread records the stack of every other thread every `interval` seconds; stop()
+    returns the samples in the collapsed-stack format flame graph tools read
+    ("outer;inner;leaf count" per line). It stops by itself after `max_seconds`, so a
+    forgotten session does not keep sampling.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stacks = Counter()
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float, max_seconds: float) -> bool:
+        """Returns False if a session is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._stacks = Counter()
+            self.samples = 0
+            self._thread = threading.Thread(
+                target=self._run, args=(interval, time.monotonic() + max_seconds),
+                name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def _run(self, interval: float, deadline: float):
+        own_id = threading.get_ident()
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> str:
+        """Stops the session (if it is still running) and returns the collapsed stacks."""
+        with self._lock:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+            return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,265 @@
+# backend/response_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+
+from cache import TTLCache
+from config import settings
+
+# Version scopes. Every cached response is keyed by the versions of the scopes it reads,
+# so bumping a scope makes those entries unreachable without having to find them.
+CATALOG_SCOPE = "catalog"          # any product or stock level change
+PRODUCTS_SCOPE = "products"        # bulk changes to many products (imports)
+FORECASTS_SCOPE = "forecasts"      # stored forecasts refreshed
+ANOMALIES_SCOPE = "anomalies"      # stored anomaly flags refreshed
+
+def product_scopes(product_id) -> tuple[str, ...]:
+    """Scopes of a response about one product."""
+    return (PRODUCTS_SCOPE, f"product:{product_id}")
+
+
+class MemoryCacheBackend:
+    """In-process backend: an LRU of responses plus a dict of version counters."""
+
+    # Never waits on I/O, so the async routes call it directly
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value):
+        self._entries.set(key, value)
+
+    def get_versions(self, scopes):
+        with self._lock:
+            return [self._versions.get(scope, 0) for scope in scopes]
+
+    def bump(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+
+
+class SQLiteCacheBackend:
+    """
+    Local stand-in for a shared cache such as Redis: a SQLite file that every API worker
+    and background job on the host reads and bumps, so versions bumped by one process
+    invalidate the responses cached by the others.
+    """
+
+    # File I/O that can wait on other writers' locks: the async routes call it from the threadpool
+    blocking = True
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS versions (scope TEXT PRIMARY KEY, version INTEGER)")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def set(self, key, value):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, _pack(value), time.time() + self.ttl)
+        )
+        # Expired entries are cleared on write, a few at a time
+        connection.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses WHERE expires_at <= ? LIMIT 100)",
+            (time.time(),)
+        )
+
+    def get_versions(self, scopes):
+        rows = dict(self._connection().execute(
+            f"SELECT scope, version FROM versions WHERE scope IN ({', '.join('?' * len(scopes))})", scopes
+        ).fetchall())
+        return [rows.get(scope, 0) for scope in scopes]
+
+    def bump(self, scopes):
+        self._connection().executemany(
+            "INSERT INTO versions (scope, version) VALUES (?, 1) "
+            "ON CONFLICT (scope) DO UPDATE SET version = version + 1",
+            [(scope,) for scope in scopes]
+        )
+
+
+def _pack(value):
+    etag, body, headers = value
+    return json.dumps({"etag": etag, "headers": headers, "body": body.decode()})
+
+def _unpack(blob):
+    value = json.loads(blob)
+    return value["etag"], value["body"].encode(), value["headers"]
+
+_type_adapters = {}
+
+def _type_adapter(response_model):
+    adapter = _type_adapters.get(response_model)
+    if adapter is None:
+        adapter = _type_adapters[response_model] = TypeAdapter(response_model)
+    return adapter
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+class ResponseCache:
+    """
+    Serialized responses with strong ETags for the polled read endpoints.
+
+    A response is stored under its URL plus the current versions of the scopes it depends
+    on; writers bump those versions. A request with a matching If-None-Match gets a 304
+    without touching the database or re-serializing anything.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def invalidate(self, *scopes):
+        if self.backend is not None and scopes:
+            self.backend.bump(list(scopes))
+
+    def _key(self, request: Request, scopes):
+        versions = self.backend.get_versions(list(scopes))
+        query = "&".join(sorted(f"{name}={value}" for name, value in request.query_params.multi_items()))
+        version_tag = ",".join(f"{scope}={version}" for scope, version in zip(scopes, versions))
+        return f"{request.url.path}?{query}|{version_tag}"
+
+    def _response(self, request: Request, etag, body, headers):
+        headers = {**headers, "ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(etag, request.headers.get("if-none-match", "")):
+            self._count("not_modified")
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def lookup(self, request: Request, scopes):
+        """Returns (key, response); the response is None on a miss."""
+        if self.backend is None:
+            return None, None
+        key = self._key(request, scopes)
+        cached = self.backend.get(key)
+        if cached is None:
+            self._count("misses")
+            return key, None
+        self._count("hits")
+        return key, self._response(request, *cached)
+
+    def store(self, request: Request, key, payload, response_model, headers=None):
+        adapter = _type_adapter(response_model)
+        # Same validation and JSON the route's response_model would have produced
+        body = adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        headers = headers or {}
+        if key is not None:
+            self.backend.set(key, (etag, body, headers))
+        return self._response(request, etag, body, headers)
+
+    def respond(self, request: Request, scopes, build, response_model):
+        """
+        Serves the cached response for the request, or calls build() -> (payload, headers),
+        serializes the payload as `response_model` and caches it.
+        """
+        key, response = self.lookup(request, scopes)
+        if response is not None:
+            return response
+        payload, headers = build()
+        return self.store(request, key, payload, response_model, headers)
+
+    async def _call(self, function, *args):
+        # Runs a backend call from the event loop without blocking it on a blocking backend
+        if self.backend is not None and self.backend.blocking:
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
+    async def invalidate_async(self, *scopes):
+        """invalidate() for the async routes."""
+        await self._call(self.invalidate, *scopes)
+
+    async def respond_async(self, request: Request, scopes, build, response_model):
+        """respond() for an async build()."""
+        key, response = await self._call(self.lookup, request, scopes)
+        if response is not None:
+            return response
+        payload, headers = await build()
+        return await self._call(self.store, request, key, payload, response_model, headers)
+
+
+def _create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+        path = settings.RESPONSE_CACHE_SQLITE_PATH or os.path.join(
+            tempfile.gettempdir(), "inventory_response_cache.db"
+        )
+        return SQLiteCacheBackend(path, ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(
+            maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+        )
+    return None
+
+
+response_cache = ResponseCache(_create_backend())
+
+
+def invalidate_products(product_ids):
+    """Called by the writers after committing product or stock changes."""
+    response_cache.invalidate(CATALOG_SCOPE, *(f"product:{product_id}" for product_id in set(product_ids)))
+
+async def invalidate_products_async(product_ids):
+    """invalidate_products() for the async CRUD modules."""
+    await response_cache.invalidate_async(
+        CATALOG_SCOPE, *(f"product:{product_id}" for product_id in set(product_ids))
+    )
+
+def invalidate_all_products():
+    """For bulk changes (imports), instead of bumping every product's version."""
+    response_cache.invalidate(CATALOG_SCOPE, PRODUCTS_SCOPE)
+
+def invalidate_from_job(*scopes):
+    """
+    For the jobs run as their own processes. Only the sqlite backend is shared with the
+    API processes; a "memory" cache lives in each API process, out of a job's reach, so
+    there its entries show job-made changes once they expire (RESPONSE_CACHE_TTL_SECONDS).
+    """
+    if isinstance(response_cache.backend, SQLiteCacheBackend):
+        response_cache.invalidate(*scopes)
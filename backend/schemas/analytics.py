@@ -1,6 +1,7 @@
 # backend/schemas/analytics.py
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Literal
 import uuid 
 
 class DashboardKPIs(BaseModel):
@@ -11,6 +12,22 @@ class HistoricalDataPoint(BaseModel):
     timestamp: datetime
     quantity: int
 
+class ForecastBatchItem(BaseModel):
+    """One NDJSON line of POST /analytics/forecast/batch."""
+    product_id: uuid.UUID
+    status: Literal["ok", "not_found", "failed", "timeout"]
+    # Where an "ok" forecast came from: the refresh job's table, this process's cache, or a fit
+    source: Literal["stored", "cache", "fitted"] | None = None
+    computed_at: datetime | None = None
+    points: list[HistoricalDataPoint] = []
+    detail: str | None = None
+
+class StockLevel(BaseModel):
+    product_id: uuid.UUID
+    sku: str
+    name: str
+    quantity_on_hand: int
+
 class AnomalyDataPoint(BaseModel):
     id: uuid.UUID
     product_id: uuid.UUID
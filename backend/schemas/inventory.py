@@ -1,8 +1,41 @@
 # backend/schemas/inventory.py
 import uuid
-from pydantic import BaseModel
+from datetime import datetime, timezone
+from pydantic import BaseModel, field_validator
 
 class InventoryMovementCreate(BaseModel):
     product_id: uuid.UUID
     change_quantity: int
-    reason: str
\ No newline at end of file
+    reason: str
+
+class InventoryMovementResult(BaseModel):
+    index: int
+    product_id: uuid.UUID
+    status: str  # "applied" or "not_found"
+    movement_id: uuid.UUID | None = None
+    new_quantity_on_hand: int | None = None
+
+class InventoryMovementSchedule(InventoryMovementCreate):
+    scheduled_for: datetime
+
+    @field_validator("scheduled_for")
+    @classmethod
+    def in_the_future(cls, value: datetime):
+        # Naive times are taken as UTC, and stored in UTC so SQLite compares them correctly
+        value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+        if value <= datetime.now(timezone.utc):
+            raise ValueError("must be in the future; use POST /inventory/move for a movement now")
+        return value
+
+class ScheduledMovement(BaseModel):
+    id: uuid.UUID
+    product_id: uuid.UUID
+    change_quantity: int
+    reason: str | None
+    status: str  # "SCHEDULED", then "COMPLETED" once applied or "CANCELLED"
+    scheduled_for: datetime
+    # Projected level when scheduled; the actual level once applied
+    new_quantity_on_hand: int
+
+    class Config:
+        from_attributes = True
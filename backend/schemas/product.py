@@ -26,4 +26,16 @@ class Product(ProductBase):
     quantity_on_hand: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Result of POST /products/import
+class ProductImportError(BaseModel):
+    row: int  # 1-based data row (CSV record after the header, or NDJSON line)
+    sku: str | None = None
+    detail: str
+
+class ProductImportSummary(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    errors: list[ProductImportError]  # capped; `failed` has the full count
\ No newline at end of file
@@ -1,5 +1,6 @@
 # backend/schemas/user.py
 import uuid
+from typing import Literal
 from pydantic import BaseModel, EmailStr
 
 class UserBase(BaseModel):
@@ -8,6 +9,9 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserRoleUpdate(BaseModel):
+    role: Literal["manager", "operator"]
+
 class User(UserBase):
     id: uuid.UUID
     role: str
@@ -1,4 +1,5 @@
 # backend/security.py
+import time
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -7,15 +8,17 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from pydantic import ValidationError
 
+from cache import TTLCache
 from config import settings
-from database import get_db
+from database import get_async_db, get_db
+from password_hashing import password_hasher
 # Use absolute imports for our own modules
 from crud import crud_user
 from schemas import user as user_schema
 from models import user as user_model
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +26,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# The request handlers use these: bcrypt runs on the bounded hashing pool, and both raise
+# PasswordHashingBusy when it is saturated.
+async def verify_password_offloaded(plain_password: str, hashed_password: str):
+    """
+    Returns (verified, new_hash). new_hash is set when the stored hash uses an outdated
+    scheme or cost factor and should be replaced.
+    """
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_offloaded(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
+
+# Authenticated principals keyed by token subject, so most requests skip the users lookup
+_principal_cache = TTLCache(maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE, ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(email: str):
+    """
+    Drops a cached principal, e.g. after the user's role changed. Only in this process:
+    other workers drop theirs when it expires (AUTH_PRINCIPAL_CACHE_TTL_SECONDS).
+    """
+    _principal_cache.pop(email)
+
 def create_access_token(data: dict, user_role: str):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -30,26 +55,62 @@ def create_access_token(data: dict, user_role: str):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _principal_from_token(token: str):
+    """
+    Decodes the token and returns (payload, principal). The principal comes from the signed
+    claims (AUTH_TRUST_TOKEN_CLAIMS) or the principal cache; it is None when the caller still
+    has to look the user up and pass the row to _cache_principal.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
+        if settings.AUTH_TRUST_TOKEN_CLAIMS and payload.get("uid") and payload.get("role"):
+            # The signed claims are trusted as-is: no database round trip at all
+            return payload, user_schema.User(id=payload["uid"], email=email, role=payload["role"])
     except (JWTError, ValidationError):
-        raise credentials_exception
-    user = crud_user.get_user_by_email(db, email=email)
+        raise _credentials_exception()
+    return payload, _principal_cache.get(email)
+
+def _cache_principal(payload: dict, user: user_model.User | None):
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    principal = user_schema.User.model_validate(user)
+    # Never cache a principal for longer than the token it came from is valid
+    ttl = min(settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS, payload["exp"] - time.time())
+    if ttl > 0:
+        _principal_cache.set(payload["sub"], principal, ttl=ttl)
+    return principal
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    payload, principal = _principal_from_token(token)
+    if principal is not None:
+        return principal
+    return _cache_principal(payload, crud_user.get_user_by_email(db, email=payload["sub"]))
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db=Depends(get_async_db)
+):
+    # Same as get_current_user, for the async routes (DB_ASYNC_MODE).
+    # Imported here because crud_user_async imports this module.
+    from crud import crud_user_async
+
+    payload, principal = _principal_from_token(token)
+    if principal is not None:
+        return principal
+    return _cache_principal(payload, await crud_user_async.get_user_by_email(db, email=payload["sub"]))
 
 def get_current_manager(
     current_user: user_schema.User = Depends(get_current_user)
@@ -59,4 +120,9 @@ def get_current_manager(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="The user does not have permissions for this resource"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_manager_async(
+    current_user: user_schema.User = Depends(get_current_user_async)
+):
+    return get_current_manager(current_user)
\ No newline at end of file
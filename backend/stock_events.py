@@ -0,0 +1,68 @@
+# backend/stock_events.py
+import asyncio
+import threading
+
+from crud.crud_stats import is_low_stock
+from schemas import product as product_schema
+
+
+class StockEventBroker:
+    """
+    In-process fan-out of low-stock threshold crossings to the SSE subscribers of this API
+    process. Publishing is thread-safe (the sync routes run on worker threads); every
+    subscriber gets a bounded queue on its own event loop, and events for a subscriber that
+    falls too far behind are dropped rather than buffered without limit.
+    """
+
+    def __init__(self, max_queued: int = 1000):
+        self.max_queued = max_queued
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registers a subscriber; must be called from the event loop that will read the queue."""
+        queue = asyncio.Queue(maxsize=self.max_queued)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; it unsubscribes on its way out
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+
+broker = StockEventBroker()
+
+
+def threshold_event(db_product) -> dict:
+    """
+    Event for a product that just crossed its reorder point: "low_stock" when it fell
+    below it, "restocked" when it climbed back. Build it before the commit expires the
+    product's attributes, publish it after the commit.
+    """
+    return {
+        "event": "low_stock" if is_low_stock(db_product) else "restocked",
+        "product": product_schema.Product.model_validate(db_product).model_dump(mode="json"),
+    }
+
+
+def publish(events):
+    for event in events:
+        broker.publish(event)
@@ -0,0 +1,136 @@
+# backend/write_combining.py
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+from config import settings
+import metrics
+
+
+class _Batch:
+    def __init__(self, previous):
+        self.items = []
+        self.futures = []
+        self.closed = False
+        # Completion of the batch before this one on the same product, and of this one
+        self.previous = previous.done if previous is not None else None
+        self.done = Future()
+
+
+class MovementCombiner:
+    """
+    Coalesces the single movements (POST /inventory/move) that hit the same product
+    within `window` seconds, so they are applied under one row lock and one commit
+    instead of queueing one by one behind the lock.
+
+    The first caller for a product opens a batch and becomes its leader: it waits out the
+    window and for the previous batch on the product to commit, then closes the batch and
+    applies every movement collected meanwhile, in arrival order, with its own database
+    session. The other callers just wait for their result. Batches on one product are thus
+    applied one after the other, and under load each one keeps filling while its
+    predecessor holds the lock. A batch also closes once it holds `max_batch` movements;
+    later callers open the next one. If applying fails, every caller of the batch gets the
+    exception.
+
+    Combining is per API process: writers in other processes still meet at the row lock.
+    """
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open = {}
+        self._last = {}
+
+    def _join(self, key, item):
+        """Adds `item` to the open batch for `key`; returns (batch, future) with future None for the leader."""
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch(self._last.get(key))
+                self._last[key] = batch
+            future = None if leader else Future()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch:
+                del self._open[key]
+            return batch, future
+
+    def _close(self, key, batch):
+        with self._lock:
+            if batch.closed:
+                return
+            batch.closed = True
+            if self._open.get(key) is batch:
+                del self._open[key]
+        metrics.movement_batch_size.observe(len(batch.items))
+
+    def _release(self, key, batch):
+        with self._lock:
+            if self._last.get(key) is batch:
+                del self._last[key]
+        batch.done.set_result(None)
+
+    @staticmethod
+    def _finish(batch, results):
+        # The leader (first item) takes its own result from the return value
+        if results is None:
+            results = [None] * len(batch.items)
+        for future, result in zip(batch.futures[1:], results[1:]):
+            future.set_result(result)
+        return results[0]
+
+    @staticmethod
+    def _fail(batch, error):
+        if isinstance(error, asyncio.CancelledError):
+            # The leader's request went away before the batch was applied
+            error = RuntimeError("The combined movement batch was abandoned")
+        for future in batch.futures[1:]:
+            future.set_exception(error)
+
+    def submit(self, key, item, apply):
+        """
+        Runs `item` through the combined `apply(items)` from a worker thread and returns
+        this item's result. `apply` returns one result per item, in order, or None for all.
+        """
+        batch, future = self._join(key, item)
+        if future is not None:
+            return future.result()
+        try:
+            time.sleep(self.window)
+            if batch.previous is not None:
+                batch.previous.result()
+            self._close(key, batch)
+            results = apply(batch.items)
+        except BaseException as e:
+            self._close(key, batch)
+            self._fail(batch, e)
+            raise
+        finally:
+            self._release(key, batch)
+        return self._finish(batch, results)
+
+    async def submit_async(self, key, item, apply):
+        """The submit() of async handlers; `apply` is a coroutine function."""
+        batch, future = self._join(key, item)
+        if future is not None:
+            return await asyncio.wrap_future(future)
+        try:
+            await asyncio.sleep(self.window)
+            if batch.previous is not None:
+                await asyncio.wrap_future(batch.previous)
+            self._close(key, batch)
+            results = await apply(batch.items)
+        except BaseException as e:
+            self._close(key, batch)
+            self._fail(batch, e)
+            raise
+        finally:
+            self._release(key, batch)
+        return self._finish(batch, results)
+
+movement_combiner = MovementCombiner(
+    window=settings.MOVEMENT_COMBINE_WINDOW_MS / 1000, max_batch=settings.MOVEMENT_COMBINE_MAX_BATCH
+)